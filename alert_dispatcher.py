@@ -0,0 +1,235 @@
+# alert_dispatcher.py
+"""
+Central outbound alert queue.
+
+Monitors call `enqueue(bot, chat_id, text, ...)` and return immediately;
+sending happens in background workers, so a slow Telegram call never
+stalls detection.
+
+- Per-chat queues: alerts for one chat are delivered in order, by one
+  worker at a time.
+- Priority lanes: when several chats are ready, godmode chats go before
+  alpha, standard and free (by the chat's group tier in tiers.json).
+- Coalescing: the first alert for an idle chat opens a short window;
+  everything queued for that chat meanwhile is merged into as few messages
+  as fit Telegram's 4096-character limit. Only whole alerts are joined, so
+  a cut never lands inside a Markdown/HTML entity (Telegram would reject
+  the whole batch); an alert longer than the limit on its own is split at
+  line breaks.
+
+Sends go through telegram_sender, so the global/per-chat rate limits and
+flood-wait handling apply.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import telegram_sender
+from utils import tier_registry
+
+# ===== Config =====
+MAX_MESSAGE_LEN = 4096
+SEPARATOR = "\n\n"
+WORKERS = 8
+
+# lane -> priority (lower is served first) and coalescing window (seconds)
+LANES: Dict[str, Tuple[int, float]] = {
+    "godmode":  (0, 0.5),
+    "alpha":    (1, 2.0),
+    "standard": (2, 5.0),
+    "free":     (3, 10.0),
+}
+DEFAULT_LANE = "free"
+
+
+@dataclass
+class Alert:
+    chat_id: int
+    text: str
+    priority: int
+    window: float
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    enqueued_at: float = field(default_factory=time.time)
+    chain: Optional[str] = None     # "BTC", "ETH", ... (metadata, not sent)
+    usd: Optional[float] = None     # estimated value, None if unknown
+
+
+def lane_for_chat(chat_id: int) -> str:
+    lane = tier_registry.group_tier(chat_id, DEFAULT_LANE)
+    return lane if lane in LANES else DEFAULT_LANE
+
+def split_text(text: str, limit: int = MAX_MESSAGE_LEN) -> List[str]:
+    """
+    Split one over-long alert at line breaks only. A single line longer
+    than `limit` is kept whole (a cut inside it could break an entity).
+    """
+    parts: List[str] = []
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit)
+        if cut <= 0:
+            cut = text.find("\n", limit)
+            if cut < 0:
+                break
+        parts.append(text[:cut])
+        text = text[cut:].lstrip("\n")
+    if text:
+        parts.append(text)
+    return parts
+
+def coalesce(texts: List[str], limit: int = MAX_MESSAGE_LEN) -> List[str]:
+    """
+    Greedily pack whole alerts into messages no longer than `limit`; the
+    batch is flushed before an alert that would overflow it. Only an alert
+    over the limit by itself is split (see split_text).
+    """
+    out: List[str] = []
+    cur = ""
+    for text in texts:
+        if len(text) > limit:
+            if cur:
+                out.append(cur)
+                cur = ""
+            out.extend(split_text(text, limit))
+        elif not cur:
+            cur = text
+        elif len(cur) + len(SEPARATOR) + len(text) <= limit:
+            cur += SEPARATOR + text
+        else:
+            out.append(cur)
+            cur = text
+    if cur:
+        out.append(cur)
+    return out
+
+
+class AlertDispatcher:
+    def __init__(self, bot, workers: int = WORKERS):
+        self.bot = bot
+        self.n_workers = workers
+        self.sent_messages = 0      # Telegram calls made
+        self.sent_alerts = 0        # alerts delivered (merged or not)
+        self._pending: Dict[int, List[Alert]] = {}
+        self._scheduled: set = set()   # waiting for their window / a worker
+        self._busy: set = set()        # being sent right now
+        self._timers: List[Tuple[float, int, int]] = []  # (due, seq, chat_id)
+        self._ready: Optional[asyncio.PriorityQueue] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._seq = itertools.count()
+
+    # ---------- lifecycle ----------
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._ready = asyncio.PriorityQueue()
+        self._wakeup = asyncio.Event()
+        self._tasks.append(asyncio.create_task(self._scheduler()))
+        for _ in range(self.n_workers):
+            self._tasks.append(asyncio.create_task(self._worker()))
+
+    async def stop(self, drain: bool = True, timeout: float = 30.0) -> None:
+        if drain:
+            deadline = time.monotonic() + timeout
+            # flush windows immediately and wait for workers to empty the queues
+            self._timers = [(0.0, s, c) for _, s, c in self._timers]
+            heapq.heapify(self._timers)
+            if self._wakeup:
+                self._wakeup.set()
+            while (self._pending or self._busy) and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    # ---------- public API ----------
+    def enqueue(self, chat_id: int, text: str, *, lane: Optional[str] = None,
+                chain: Optional[str] = None, usd: Optional[float] = None, **kwargs: Any) -> None:
+        """
+        Queue an alert; returns immediately. kwargs go to bot.send_message;
+        `chain` and `usd` describe the alert (for routing/replay) and are not sent.
+        """
+        self.start()
+        lane = lane if lane in LANES else lane_for_chat(chat_id)
+        priority, window = LANES[lane]
+        self._pending.setdefault(chat_id, []).append(
+            Alert(chat_id, text, priority, window, kwargs, chain=chain, usd=usd))
+        if chat_id not in self._scheduled and chat_id not in self._busy:
+            self._schedule(chat_id, window)
+
+    def pending_count(self) -> int:
+        return sum(len(v) for v in self._pending.values())
+
+    # ---------- internals ----------
+    def _schedule(self, chat_id: int, window: float) -> None:
+        self._scheduled.add(chat_id)
+        heapq.heappush(self._timers, (time.monotonic() + window, next(self._seq), chat_id))
+        self._wakeup.set()
+
+    async def _scheduler(self) -> None:
+        while True:
+            now = time.monotonic()
+            while self._timers and self._timers[0][0] <= now:
+                due, seq, chat_id = heapq.heappop(self._timers)
+                alerts = self._pending.get(chat_id) or []
+                prio = min((a.priority for a in alerts), default=LANES[DEFAULT_LANE][0])
+                self._ready.put_nowait((prio, due, seq, chat_id))
+            timeout = self._timers[0][0] - now if self._timers else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _worker(self) -> None:
+        while True:
+            _, _, _, chat_id = await self._ready.get()
+            self._scheduled.discard(chat_id)
+            self._busy.add(chat_id)
+            try:
+                await self._deliver(chat_id, self._pending.pop(chat_id, []))
+            except Exception as e:
+                logging.exception(f"[dispatch] delivery to {chat_id} failed: {e}")
+            finally:
+                self._busy.discard(chat_id)
+                more = self._pending.get(chat_id)
+                if more:
+                    self._schedule(chat_id, min(a.window for a in more))
+
+    async def _deliver(self, chat_id: int, alerts: List[Alert]) -> None:
+        # merge runs of alerts that share send options (parse_mode etc.)
+        groups: List[Tuple[Dict[str, Any], List[str]]] = []
+        for a in alerts:
+            if groups and groups[-1][0] == a.kwargs:
+                groups[-1][1].append(a.text)
+            else:
+                groups.append((a.kwargs, [a.text]))
+        for kwargs, texts in groups:
+            for msg in coalesce(texts):
+                outcome = await telegram_sender.send_message(self.bot, chat_id, msg, **kwargs)
+                self.sent_messages += 1
+                if not outcome.ok:
+                    logging.warning(f"[dispatch] send to {chat_id} failed: {outcome.error}")
+            self.sent_alerts += len(texts)
+
+
+_dispatcher: Optional[AlertDispatcher] = None
+
+def get_dispatcher(bot) -> AlertDispatcher:
+    global _dispatcher
+    if _dispatcher is None or _dispatcher.bot is not bot:
+        _dispatcher = AlertDispatcher(bot)
+    return _dispatcher
+
+def enqueue(bot, chat_id: int, text: str, **kwargs: Any) -> None:
+    """Module-level shortcut used by the monitors."""
+    get_dispatcher(bot).enqueue(chat_id, text, **kwargs)
+
+async def close() -> None:
+    """Drain queued alerts and stop the workers (call on shutdown)."""
+    if _dispatcher is not None:
+        await _dispatcher.stop(drain=True)
@@ -1,38 +1,26 @@
 # alert_router.py
-import json
 import logging
-from pathlib import Path
+
+from utils import tier_registry
 
 # Injected by main.py
 BOT = None
 
-# tiers.json will hold your chat IDs per tier
-TIERS_PATH = Path("tiers.json")
-
-_cache = {
-    "DEFAULT_GROUP_ID": None,
-    "TIERS": {}
-}
+# tiers.json will hold your chat IDs per tier (shared, hot-reloaded registry)
+TIERS_PATH = tier_registry.ROUTING_PATH
 
 def _load():
-    global _cache
-    try:
-        data = json.loads(TIERS_PATH.read_text(encoding="utf-8"))
-        _cache["DEFAULT_GROUP_ID"] = data.get("DEFAULT_GROUP_ID")
-        _cache["TIERS"] = data.get("TIERS", {})
-    except Exception as e:
-        logging.warning(f"[alert_router] Could not load tiers.json: {e}. Using defaults.")
-        # If tiers.json missing, everything falls back to DEFAULT_GROUP_ID=None
+    return tier_registry.routing()
 
 def _get_chat_id(tier: str | None) -> int | None:
-    if not _cache["TIERS"] and _cache["DEFAULT_GROUP_ID"] is None:
-        _load()
+    cfg = _load()
     if tier:
         # normalize like "T1", "ALPHA", "alpha", etc.
         key = str(tier).strip().upper()
-        if key in _cache["TIERS"]:
-            return _cache["TIERS"][key]
-    return _cache["DEFAULT_GROUP_ID"]
+        chats = cfg.get("TIERS") or {}
+        if key in chats:
+            return chats[key]
+    return cfg.get("DEFAULT_GROUP_ID")
 
 async def send(text: str, tier: str | None = None, parse_mode: str | None = "Markdown", disable_web_page_preview: bool = True):
     """
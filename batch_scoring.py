@@ -0,0 +1,142 @@
+# batch_scoring.py
+"""
+NumPy batch scorer for smart_signals.
+
+Takes a whole universe of coins as 2-D price/volume matrices
+(one row per coin, one column per hourly bar) and computes EMA20/EMA50,
+RSI(14), the 24-bar volatility proxy, volume surge and 24h change for every
+row in vectorized passes. Loops run over time columns, never over coins, so
+cost grows with bar count, not universe size.
+
+Column loops replay the same float operations as the scalar helpers in
+smart_signals (same order, same seeds), so each row's result is identical
+to `score_signal` on that row. The final per-coin dict (reasons, rounded
+risk) is built by `smart_signals.score_metrics`, shared with the scalar path.
+"""
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from smart_signals import score_metrics
+
+MIN_BARS = 30
+
+# Python 3.12+ sum() of floats uses Neumaier compensation; mirror it so the
+# batch path matches score_signal bit for bit on every interpreter.
+_COMPENSATED_SUM = sys.version_info >= (3, 12)
+
+
+def _ema_rows(P: np.ndarray, period: int, window: int) -> Optional[np.ndarray]:
+    T = P.shape[1]
+    W = P[:, -window:] if T >= window else P
+    if W.shape[1] < period:
+        return None
+    k = 2 / (period + 1)
+    e = W[:, 0].copy()
+    for j in range(1, W.shape[1]):
+        e = W[:, j] * k + e * (1 - k)
+    return e
+
+def _rsi_rows(P: np.ndarray, period: int = 14) -> Optional[np.ndarray]:
+    T = P.shape[1]
+    if T < period + 1:
+        return None
+    n = P.shape[0]
+    gains = np.zeros(n)
+    losses = np.zeros(n)
+    for i in range(1, period + 1):
+        d = P[:, i] - P[:, i - 1]
+        gains += np.where(d >= 0, d, 0.0)
+        losses -= np.where(d < 0, d, 0.0)
+    avg_gain = gains / period
+    avg_loss = np.where(losses != 0, losses / period, 1e-9)
+    for i in range(period + 1, T):
+        d = P[:, i] - P[:, i - 1]
+        avg_gain = (avg_gain * (period - 1) + np.maximum(d, 0.0)) / period
+        avg_loss = (avg_loss * (period - 1) + np.maximum(-d, 0.0)) / period
+    rs = avg_gain / np.where(avg_loss != 0, avg_loss, 1e-9)
+    return 100 - (100 / (1 + rs))
+
+def _seq_sum(M: np.ndarray) -> np.ndarray:
+    """Row sums computed exactly like Python's sum() (np.sum() is pairwise)."""
+    total = M[:, 0] + 0.0
+    if not _COMPENSATED_SUM:
+        for j in range(1, M.shape[1]):
+            total = total + M[:, j]
+        return total
+    c = np.zeros(M.shape[0])
+    for j in range(1, M.shape[1]):
+        x = M[:, j]
+        t = total + x
+        c += np.where(np.abs(total) >= np.abs(x), (total - t) + x, (x - t) + total)
+        total = t
+    return np.where((c != 0) & np.isfinite(c), total + c, total)
+
+def compute_metrics(P: np.ndarray, V: np.ndarray) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Vectorized score inputs for equal-length rows.
+    P, V: float arrays of shape (n_coins, n_bars). Returns None if n_bars < 30.
+    """
+    P = np.asarray(P, dtype=float)
+    V = np.asarray(V, dtype=float)
+    T = P.shape[1]
+    if T < MIN_BARS or V.shape[1] < MIN_BARS:
+        return None
+
+    last = P[:, -1]
+    prev_24 = P[:, -25] if T > 25 else P[:, 0]
+    safe_prev = np.where(prev_24 == 0, 1.0, prev_24)
+    chg_24h = np.where(prev_24 == 0, 0.0, (last - prev_24) / safe_prev * 100.0)
+
+    vol_now = V[:, -1]
+    if V.shape[1] >= 8:
+        vol_avg7 = _seq_sum(V[:, -8:-1]) / 7
+    else:
+        vol_avg7 = _seq_sum(V) / V.shape[1]
+    vol_surge = np.where(vol_avg7 > 0, vol_now / np.where(vol_avg7 > 0, vol_avg7, 1.0), 1.0)
+
+    window = P[:, -24:]
+    w = window.shape[1]
+    mean = _seq_sum(window) / w
+    var = _seq_sum((window - mean[:, None]) ** 2) / w
+    vol_proxy = np.where(mean > 0, np.sqrt(var) / np.where(mean > 0, mean, 1.0), 0.02)
+
+    return {
+        "last": last,
+        "chg_24h": chg_24h,
+        "ema20": _ema_rows(P, 20, 60),
+        "ema50": _ema_rows(P, 50, 120),
+        "rsi": _rsi_rows(P, 14),
+        "vol_surge": vol_surge,
+        "vol_proxy": vol_proxy,
+    }
+
+def score_matrix(coin_ids: Sequence[str], P: np.ndarray, V: np.ndarray) -> List[dict]:
+    """Score every row; returns the same dicts as score_signal, in row order."""
+    cols = compute_metrics(P, V)
+    if cols is None:
+        return []
+    as_lists = {k: (v.tolist() if v is not None else [None] * len(coin_ids)) for k, v in cols.items()}
+    out = []
+    for i, coin_id in enumerate(coin_ids):
+        out.append(score_metrics(coin_id, {k: vals[i] for k, vals in as_lists.items()}))
+    return out
+
+def score_universe(charts: Dict[str, Tuple[Sequence[float], Sequence[float]]]) -> List[dict]:
+    """
+    Score {coin_id: (prices, vols)} with ragged histories.
+    Coins are grouped by (len(prices), len(vols)) so each group is one matrix.
+    """
+    groups: Dict[Tuple[int, int], List[str]] = {}
+    for coin_id, (prices, vols) in charts.items():
+        if len(prices) < MIN_BARS or len(vols) < MIN_BARS:
+            continue
+        groups.setdefault((len(prices), len(vols)), []).append(coin_id)
+
+    results = []
+    for ids in groups.values():
+        P = np.array([charts[c][0] for c in ids], dtype=float)
+        V = np.array([charts[c][1] for c in ids], dtype=float)
+        results.extend(score_matrix(ids, P, V))
+    return results
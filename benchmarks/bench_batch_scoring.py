@@ -0,0 +1,63 @@
+# benchmarks/bench_batch_scoring.py
+"""
+Scalar vs vectorized signal scoring on a synthetic universe.
+
+    python -m benchmarks.bench_batch_scoring --coins 500 --bars 48
+
+Runs offline. Also checks that both paths return identical dicts.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from batch_scoring import score_matrix
+from smart_signals import score_signal
+
+
+def synthetic_universe(n_coins: int, n_bars: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    start = rng.uniform(0.01, 60_000, size=(n_coins, 1))
+    steps = rng.normal(0, 0.01, size=(n_coins, n_bars))
+    P = start * np.exp(np.cumsum(steps, axis=1))
+    V = rng.uniform(1e6, 5e9, size=(n_coins, n_bars))
+    ids = [f"coin-{i}" for i in range(n_coins)]
+    return ids, P, V
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--coins", type=int, default=500)
+    ap.add_argument("--bars", type=int, default=48)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    ids, P, V = synthetic_universe(args.coins, args.bars)
+    rows_p = P.tolist()
+    rows_v = V.tolist()
+
+    def scalar():
+        return [score_signal(c, p, v) for c, p, v in zip(ids, rows_p, rows_v)]
+
+    def vectorized():
+        return score_matrix(ids, P, V)
+
+    same = scalar() == vectorized()
+    t_scalar = _best_of(scalar, args.repeat)
+    t_vector = _best_of(vectorized, args.repeat)
+
+    print(f"universe: {args.coins} coins x {args.bars} bars (best of {args.repeat})")
+    print(f"scalar     : {t_scalar * 1000:9.2f} ms")
+    print(f"vectorized : {t_vector * 1000:9.2f} ms")
+    print(f"speedup    : {t_scalar / t_vector:9.1f}x")
+    print(f"identical  : {same}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/bench_routing.py
+"""
+TierRouter routing with thousands of fake groups and a stub bot.
+
+Telegram pacing (telegram_sender's token buckets) is lifted so the numbers
+are routing + fan-out overhead, not the 30 msg/s limit.
+"""
+import importlib.util
+import json
+import os
+import random
+from typing import List
+
+from benchmarks.harness import Case
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TIERS = {
+    "free":     {"chains": ["eth"],               "min_usd_buy": 50000, "delay_seconds": 1800},
+    "standard": {"chains": ["eth"],               "min_usd_buy": 25000, "delay_seconds": 900},
+    "alpha":    {"chains": ["eth", "btc", "xrp"], "min_usd_buy": 10000, "delay_seconds": 60},
+    "godmode":  {"chains": ["eth", "btc", "xrp"], "min_usd_buy": 0,     "delay_seconds": 0},
+}
+
+
+class StubBot:
+    def __init__(self):
+        self.sent = 0
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent += 1
+
+
+def _load_router():
+    # router.py is shadowed by the router/ package on sys.path
+    spec = importlib.util.spec_from_file_location("tier_router_bench", os.path.join(ROOT, "router.py"))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+def write_routing(path: str, n_groups: int, seed: int = 3) -> None:
+    rng = random.Random(seed)
+    names = list(TIERS)
+    cfg = {
+        "DEFAULT_GROUP_ID": None,
+        "tiers": TIERS,
+        "groups": {str(-1_000_000_000_000 - i): rng.choice(names) for i in range(n_groups)},
+        "users": {},
+    }
+    with open(path, "w") as f:
+        json.dump(cfg, f)
+
+
+def cases(quick: bool = False) -> List[Case]:
+    import telegram_sender
+    from utils import tier_registry
+
+    n_groups = 500 if quick else 5000
+    write_routing(tier_registry.ROUTING_PATH, n_groups)  # relative: the run's scratch dir
+    cfg = tier_registry.reload_routing()
+
+    for name in ("GLOBAL_RATE", "GLOBAL_BURST", "GROUP_RATE", "GROUP_BURST"):
+        setattr(telegram_sender, name, 1e12)
+    telegram_sender.reset()
+
+    router_mod = _load_router()
+    tr = router_mod.TierRouter(StubBot())
+    index = router_mod.routing_index()
+    rng = random.Random(5)
+    lookups = [(rng.choice(["eth", "btc", "xrp", "sol", ""]), rng.uniform(0, 100_000)) for _ in range(10_000)]
+
+    async def send():
+        tr.last_sent.clear()  # steady state: every eligible group is off cooldown
+        await tr.send(chain="eth", est_usd=75_000, text="bench")
+
+    params = {"groups": n_groups}
+    return [
+        Case("routing.index_build", lambda: router_mod.RoutingIndex(cfg), ops=n_groups, params=params),
+        Case("routing.recipients", lambda: [index.recipients(c, u) for c, u in lookups],
+             ops=len(lookups), params=params),
+        Case("routing.send", send, ops=len(index.recipients("eth", 75_000)), params=params),
+    ]
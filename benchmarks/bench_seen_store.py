@@ -0,0 +1,37 @@
+# benchmarks/bench_seen_store.py
+"""top_holder_tracker's seen-tx store (DedupStore): add + flush, lookups, reload."""
+import itertools
+from typing import List
+
+from benchmarks.harness import Case
+
+
+def cases(quick: bool = False) -> List[Case]:
+    import top_holder_tracker as th
+    from dedup_store import DedupStore
+
+    n_keys = 20_000 if quick else 100_000
+    batch = 1_000
+    path = th.BTC_SEEN_FILE
+
+    seed = DedupStore(path, ttl=th.SEEN_TTL)
+    for i in range(n_keys):
+        seed.add(f"{i:064x}")
+    seed.flush()
+
+    store = DedupStore(path, ttl=th.SEEN_TTL)
+    counter = itertools.count(n_keys)
+    probes = [f"{i * 2:064x}" for i in range(n_keys // 2)]   # half hits, half misses
+
+    def add_flush():
+        for _ in range(batch):
+            store.add(f"{next(counter):064x}")
+        store.flush()
+
+    params = {"keys": n_keys}
+    return [
+        # load first: add_flush grows the log
+        Case("seen.load", lambda: DedupStore(path, ttl=th.SEEN_TTL), ops=n_keys, params=params),
+        Case("seen.contains", lambda: sum(k in store for k in probes), ops=len(probes), params=params),
+        Case("seen.add_flush", add_flush, ops=batch, params=params),
+    ]
@@ -0,0 +1,27 @@
+# benchmarks/bench_signals.py
+"""smart_signals indicators and scoring on synthetic series (offline)."""
+from typing import List
+
+from benchmarks.bench_batch_scoring import synthetic_universe
+from benchmarks.harness import Case
+
+
+def cases(quick: bool = False) -> List[Case]:
+    from batch_scoring import score_matrix
+    from smart_signals import ema, rsi, score_signal
+
+    n_coins = 100 if quick else 500
+    n_bars = 120
+    ids, P, V = synthetic_universe(n_coins, n_bars)
+    rows_p = P.tolist()
+    rows_v = V.tolist()
+    params = {"coins": n_coins, "bars": n_bars}
+
+    return [
+        Case("signals.ema", lambda: [ema(p, 50) for p in rows_p], ops=n_coins, params=params),
+        Case("signals.rsi", lambda: [rsi(p, 14) for p in rows_p], ops=n_coins, params=params),
+        Case("signals.score_signal",
+             lambda: [score_signal(c, p, v) for c, p, v in zip(ids, rows_p, rows_v)],
+             ops=n_coins, params=params),
+        Case("signals.score_matrix", lambda: score_matrix(ids, P, V), ops=n_coins, params=params),
+    ]
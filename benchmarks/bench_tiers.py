@@ -0,0 +1,25 @@
+# benchmarks/bench_tiers.py
+"""utils.tier.get_tier lookup cost with a large assignments file."""
+import os
+import random
+from typing import List
+
+from benchmarks.harness import Case
+
+
+def cases(quick: bool = False) -> List[Case]:
+    from utils import tier, tier_registry
+
+    n_users = 5_000 if quick else 50_000
+    # keep the real data/tiers.json untouched: point the registry at the scratch dir
+    tier_registry._assignments = tier_registry.JsonDoc(os.path.abspath("assignments.json"), dict)
+    rng = random.Random(7)
+    names = ["Free", "Alpha", "GodMode", "standard"]
+    tier_registry.save_assignments({str(uid): rng.choice(names) for uid in range(n_users)})
+    # half assigned, half unknown (default path)
+    ids = [rng.randrange(2 * n_users) for _ in range(100_000)]
+
+    params = {"users": n_users}
+    return [
+        Case("tiers.get_tier", lambda: [tier.get_tier(u) for u in ids], ops=len(ids), params=params),
+    ]
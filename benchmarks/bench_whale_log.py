@@ -0,0 +1,48 @@
+# benchmarks/bench_whale_log.py
+"""whale_log.read_events over a large synthetic multi-day log."""
+import json
+import random
+import time
+from typing import List
+
+from benchmarks.harness import Case
+
+CHAINS = ["BTC", "ETH", "XRP"]
+
+
+def write_synthetic_log(n_events: int, days: float = 3.0, seed: int = 11) -> None:
+    """n_events spread evenly over the last `days` days, written as daily segments + indexes."""
+    import whale_log
+
+    rng = random.Random(seed)
+    end = time.time() - 60
+    start = end - days * 86400
+    step = (end - start) / n_events
+    w = whale_log._Writer()
+    for i in range(n_events):
+        t = start + i * step
+        e = {
+            "ts": whale_log._utc(t).isoformat() + "Z",
+            "t": round(t, 3),
+            "chain": rng.choice(CHAINS),
+            "message": f"Whale {i}: {rng.getrandbits(64):016x}",
+            "wallet": f"w{rng.randrange(5000)}",
+            "usd": round(rng.uniform(1e5, 5e7), 2),
+        }
+        w.write(t, (json.dumps(e) + "\n").encode("utf-8"))
+    w.close()
+
+
+def cases(quick: bool = False) -> List[Case]:
+    import whale_log
+
+    n_events = 30_000 if quick else 300_000
+    write_synthetic_log(n_events)
+    per_hour = n_events / 72
+    params = {"events": n_events, "days": 3}
+
+    return [
+        Case(f"whale_log.read_{h}h", lambda h=h: whale_log.read_events(hours=h),
+             ops=max(1, int(per_hour * h)), params=params)
+        for h in (1, 24, 72)
+    ]
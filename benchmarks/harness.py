@@ -0,0 +1,141 @@
+# benchmarks/harness.py
+"""
+Timing, result records and baseline comparison for benchmarks.run.
+
+A Case is one timed callable (sync or async) plus how many logical
+operations one call performs, so results can be compared per operation
+even if a suite's sizes change. Each case is warmed up, then timed
+`repeat` times with perf_counter; the median is the headline number.
+"""
+import asyncio
+import inspect
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+SCHEMA = 1
+
+
+@dataclass
+class Case:
+    name: str                          # "<area>.<what>", e.g. "routing.send"
+    fn: Callable[[], Any]              # one timed call; may return an awaitable
+    ops: int = 1                       # logical operations per call
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+def _call(fn: Callable[[], Any], loop: asyncio.AbstractEventLoop) -> Any:
+    res = fn()
+    if inspect.isawaitable(res):
+        res = loop.run_until_complete(res)
+    return res
+
+def measure(case: Case, repeat: int, loop: asyncio.AbstractEventLoop, warmup: int = 1) -> Dict[str, Any]:
+    for _ in range(warmup):
+        _call(case.fn, loop)
+    times: List[float] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        _call(case.fn, loop)
+        times.append(time.perf_counter() - t0)
+    median = statistics.median(times)
+    return {
+        "name": case.name,
+        "params": case.params,
+        "ops": case.ops,
+        "repeat": repeat,
+        "min_s": min(times),
+        "median_s": median,
+        "mean_s": statistics.fmean(times),
+        "stdev_s": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "per_op_us": median / case.ops * 1e6,
+    }
+
+
+def environment() -> Dict[str, Any]:
+    env = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    try:
+        import numpy
+        env["numpy"] = numpy.__version__
+    except ImportError:
+        pass
+    try:
+        env["git"] = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip() or None
+    except Exception:
+        env["git"] = None
+    return env
+
+def report(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"schema": SCHEMA, "env": environment(), "results": results}
+
+
+# ---------- Baseline comparison ----------
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """
+    Per case: median time per op, current vs baseline. A case is a
+    "regression" if it got slower by more than `threshold` (0.15 = 15%),
+    "improved" if faster by more than that, else "same". Cases whose
+    params differ from the baseline's are "incomparable".
+    """
+    base = {r["name"]: r for r in baseline.get("results", [])}
+    rows = []
+    for r in current.get("results", []):
+        b = base.get(r["name"])
+        row = {"name": r["name"], "current_us": r["per_op_us"], "baseline_us": None, "ratio": None}
+        if b is None:
+            row["status"] = "new"
+        elif b.get("params") != r.get("params"):
+            row["status"] = "incomparable"
+        else:
+            ratio = r["per_op_us"] / b["per_op_us"] if b["per_op_us"] else float("inf")
+            row.update(baseline_us=b["per_op_us"], ratio=ratio)
+            if ratio > 1 + threshold:
+                row["status"] = "regression"
+            elif ratio < 1 - threshold:
+                row["status"] = "improved"
+            else:
+                row["status"] = "same"
+        rows.append(row)
+    return rows
+
+
+# ---------- Output ----------
+def _us(v: Optional[float]) -> str:
+    if v is None:
+        return "-"
+    if v >= 1e6:
+        return f"{v / 1e6:.2f} s"
+    if v >= 1e3:
+        return f"{v / 1e3:.2f} ms"
+    return f"{v:.2f} us"
+
+def print_results(results: List[Dict[str, Any]], out=sys.stdout) -> None:
+    width = max((len(r["name"]) for r in results), default=10)
+    print(f"{'case':<{width}}  {'median':>10}  {'per op':>10}  {'ops':>8}  {'stdev':>7}", file=out)
+    for r in results:
+        rel = r["stdev_s"] / r["median_s"] * 100 if r["median_s"] else 0.0
+        print(f"{r['name']:<{width}}  {_us(r['median_s'] * 1e6):>10}  {_us(r['per_op_us']):>10}  "
+              f"{r['ops']:>8}  {rel:>6.1f}%", file=out)
+
+def print_comparison(rows: List[Dict[str, Any]], out=sys.stdout) -> None:
+    width = max((len(r["name"]) for r in rows), default=10)
+    print(f"{'case':<{width}}  {'baseline':>10}  {'current':>10}  {'ratio':>6}  status", file=out)
+    for r in rows:
+        ratio = f"{r['ratio']:.2f}x" if r["ratio"] is not None else "-"
+        print(f"{r['name']:<{width}}  {_us(r['baseline_us']):>10}  {_us(r['current_us']):>10}  "
+              f"{ratio:>6}  {r['status']}", file=out)
@@ -0,0 +1,101 @@
+# benchmarks/run.py
+"""
+Microbenchmarks for the hot paths, offline and reproducible.
+
+    python -m benchmarks.run                      # full sizes, table to stdout
+    python -m benchmarks.run --quick              # smaller sizes (CI smoke)
+    python -m benchmarks.run --json out.json      # machine-readable results
+    python -m benchmarks.run --save-baseline      # store as benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json --threshold 0.15
+
+With --baseline, exits 1 if any case is slower per op than the baseline by
+more than --threshold. Compare runs from the same machine and sizes only.
+
+Every suite runs inside a scratch directory, so file-backed modules
+(whale_log, tiers.json, dedup logs) never touch the repo's data files.
+Synthetic data is seeded, so runs see identical inputs.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from typing import List
+
+from benchmarks import harness
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+SUITES = ["signals", "routing", "whale_log", "seen_store", "tiers"]
+
+
+def _load_cases(suite: str, quick: bool) -> List[harness.Case]:
+    mod = __import__(f"benchmarks.bench_{suite}", fromlist=["cases"])
+    return mod.cases(quick=quick)
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--quick", action="store_true", help="smaller inputs")
+    ap.add_argument("--repeat", type=int, default=7)
+    ap.add_argument("--filter", default="", help="only cases whose name contains this")
+    ap.add_argument("--suite", action="append", choices=SUITES, help="run only these suites")
+    ap.add_argument("--json", metavar="PATH", help="write results as JSON ('-' for stdout)")
+    ap.add_argument("--baseline", metavar="PATH", help="compare against this results file")
+    ap.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown per op (0.15 = 15%%)")
+    ap.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, metavar="PATH",
+                    help=f"also write results as the baseline (default {os.path.relpath(DEFAULT_BASELINE, ROOT)})")
+    args = ap.parse_args()
+
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+
+    results = []
+    cwd = os.getcwd()
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    with tempfile.TemporaryDirectory(prefix="bench-") as scratch:
+        os.chdir(scratch)
+        try:
+            for suite in args.suite or SUITES:
+                for case in _load_cases(suite, args.quick):
+                    if args.filter and args.filter not in case.name:
+                        continue
+                    results.append(harness.measure(case, args.repeat, loop))
+                    print(f"  {case.name}: {results[-1]['per_op_us']:.2f} us/op", file=sys.stderr)
+        finally:
+            import whale_log
+            whale_log.close()
+            os.chdir(cwd)
+            loop.close()
+
+    report = harness.report(results)
+    report["env"]["quick"] = args.quick
+    print()
+    harness.print_results(results)
+
+    if args.json:
+        text = json.dumps(report, indent=2)
+        if args.json == "-":
+            print(text)
+        else:
+            with open(args.json, "w") as f:
+                f.write(text + "\n")
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            f.write(json.dumps(report, indent=2) + "\n")
+        print(f"\nbaseline saved to {args.save_baseline}")
+
+    if baseline is not None:
+        rows = harness.compare(report, baseline, args.threshold)
+        print(f"\nvs baseline {args.baseline} (git {baseline.get('env', {}).get('git')}):")
+        harness.print_comparison(rows)
+        if any(r["status"] == "regression" for r in rows):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,101 +1,145 @@
 # btc_wallet_watcher.py
-import aiohttp
+"""
+BTC plugin for watcher_engine, plus the Blockchair lookups it uses.
+Due wallets are looked up together in multi-address Blockchair calls.
+"""
 import asyncio
-import json
 import logging
+from typing import Any, Dict, List, Optional, Tuple
 from aiogram import Bot
 from config import GROUP_ID
 
+import http_client
+import watcher_engine
+from watcher_engine import ChainAdapter, Transfer
+
 # Will be set from main.py
 BOT: Bot | None = None
 
-TRACKED_FILE = "tracked_btc_wallets.json"
-SEEN_FILE = "btc_wallet_seen.json"
+SEEN_NAME = "btc_wallet_seen"               # journaled store: {address: latest txid}
+SEEN_LEGACY_FILE = "btc_wallet_seen.json"   # imported once, then unused
 
-# Blockchair address dashboard with tx details
-ADDR_API = "https://api.blockchair.com/bitcoin/dashboards/address/{}?transaction_details=true"
+# Blockchair dashboards: single address (txid list only) and multi-address sets
+ADDR_API = "https://api.blockchair.com/bitcoin/dashboards/address/{}"
+ADDRS_API = "https://api.blockchair.com/bitcoin/dashboards/addresses/{}"
+BATCH_SIZE = 100         # Blockchair's max addresses per dashboard call
+BATCH_WINDOW = 2.0       # seconds to collect due wallets into one call
+BATCH_TX_LIMIT = 100     # newest txs returned across the whole set
 
-async def _load_tracked():
-    """Return a flat list of wallets with address, label, tier."""
+async def _fetch_latest_tx(address: str) -> str | None:
+    """Return the latest txid for the address, or None (lightweight: txids only, limit 1)."""
+    url = ADDR_API.format(address)
+    data = await http_client.get_json(url, params={"limit": "1,0"})
+    if not data:
+        return None
     try:
-        with open(TRACKED_FILE, "r") as f:
-            data = json.load(f)
-        wallets = []
-        for tier, items in data.items():
-            for w in items:
-                addr = w.get("address") or w.get("addr")
-                if not addr:
-                    continue
-                label = w.get("label") or f"{addr[:6]}...{addr[-4:]}"
-                wallets.append({"address": addr, "label": label, "tier": tier})
-        return wallets
+        txs = data["data"][address]["transactions"]
+        return txs[0] if txs else None
     except Exception:
-        return []
+        return None
+
+async def _fetch_latest_txs(addresses: List[str]) -> Dict[str, Optional[str]]:
+    """
+    Latest txid per address with one multi-address call.
+    The set's transaction list is newest-first across all addresses; an
+    address whose latest tx fell outside BATCH_TX_LIMIT is fetched singly.
+    """
+    if len(addresses) == 1:
+        return {addresses[0]: await _fetch_latest_tx(addresses[0])}
+    url = ADDRS_API.format(",".join(addresses))
+    data = await http_client.get_json(url, params={"limit": f"{BATCH_TX_LIMIT},0"})
+    if not data:
+        return {a: None for a in addresses}
 
-def _load_seen():
+    out: Dict[str, Optional[str]] = {a: None for a in addresses}
     try:
-        with open(SEEN_FILE, "r") as f:
-            return json.load(f)
-    except Exception:
-        return {}
+        body = data["data"]
+        for tx in body.get("transactions") or []:
+            addr = tx.get("address")
+            if addr in out and out[addr] is None:
+                out[addr] = tx.get("hash")
+        info = body.get("addresses") or {}
+        missing = [
+            a for a in addresses
+            if out[a] is None and (info.get(a) or {}).get("transaction_count", 0) > 0
+        ]
+    except Exception as e:
+        logging.warning(f"[btc-watch] unexpected batch response: {e}")
+        return out
 
-def _save_seen(seen: dict):
-    with open(SEEN_FILE, "w") as f:
-        json.dump(seen, f)
+    if missing:
+        singles = await asyncio.gather(*(_fetch_latest_tx(a) for a in missing))
+        out.update(zip(missing, singles))
+    return out
 
-async def _fetch_latest_tx(session: aiohttp.ClientSession, address: str) -> str | None:
-    """Return the latest txid for the address, or None."""
-    url = ADDR_API.format(address)
-    async with session.get(url) as resp:
-        if resp.status != 200:
-            return None
-        data = await resp.json()
+
+class _LatestTxBatcher:
+    """Collects per-wallet lookups for BATCH_WINDOW seconds into one batch call."""
+
+    def __init__(self):
+        self.waiting: Dict[str, List[asyncio.Future]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+    async def latest(self, address: str) -> Optional[str]:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self.waiting.setdefault(address, []).append(fut)
+        if len(self.waiting) >= BATCH_SIZE:
+            self._fire()
+        elif self._timer is None:
+            self._timer = loop.call_later(BATCH_WINDOW, self._fire)
+        return await fut
+
+    def _fire(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self.waiting = self.waiting, {}
+        if batch:
+            task = asyncio.create_task(self._resolve(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _resolve(self, batch: Dict[str, List[asyncio.Future]]) -> None:
         try:
-            txs = data["data"][address]["transactions"]
-            return txs[0] if txs else None
-        except Exception:
+            results = await _fetch_latest_txs(list(batch))
+        except Exception as e:
+            logging.exception(f"[btc-watch] batch of {len(batch)} failed: {e}")
+            results = {}
+        for addr, futs in batch.items():
+            for f in futs:
+                if not f.done():
+                    f.set_result(results.get(addr))
+
+class BtcAdapter(ChainAdapter):
+    """Cursor is the wallet's latest txid; any change is one new transfer."""
+    chain = "BTC"
+    unit = "BTC"
+    tx_url = "https://blockchair.com/bitcoin/transaction/{}"
+    cursor_store = SEEN_NAME
+    cursor_legacy_json = SEEN_LEGACY_FILE
+
+    def __init__(self):
+        self._batcher: Optional[_LatestTxBatcher] = None
+
+    async def fetch_since(self, address: str, cursor: Any) -> Optional[Tuple[List[str], Optional[str]]]:
+        if self._batcher is None:
+            self._batcher = _LatestTxBatcher()
+        latest = await self._batcher.latest(address)
+        if not latest:
             return None
+        if isinstance(cursor, dict):
+            cursor = cursor.get("hash")  # entries saved by the old transaction_details fetch
+        if latest == cursor:
+            return [], latest
+        return [latest], latest
+
+    def normalize(self, address: str, raw: str) -> Optional[Transfer]:
+        return Transfer(self.chain, address, raw)
+
 
 async def monitor_btc_wallets(poll_seconds: int = 20):
-    logging.info("✅ BTC wallet watcher is live.")
+    """BTC-only watcher (kept for main.py); see watcher_engine.start_wallet_watchers for all chains."""
     await asyncio.sleep(5)  # give bot time to init
-
-    seen = _load_seen()
-
-    async with aiohttp.ClientSession() as session:
-        while True:
-            try:
-                wallets = await _load_tracked()
-                for w in wallets:
-                    addr = w["address"]
-                    latest = await _fetch_latest_tx(session, addr)
-                    if not latest:
-                        continue
-                    if seen.get(addr) == latest:
-                        continue  # no change
-
-                    # New activity for this wallet
-                    seen[addr] = latest
-                    _save_seen(seen)
-
-                    tx_link = f"https://blockchair.com/bitcoin/transaction/{latest}"
-                    text = (
-                        f"👀 **BTC Wallet Watch — {w['tier'].upper()}**\n"
-                        f"Label: {w['label']}\n"
-                        f"Address: `{addr}`\n"
-                        f"Latest tx: {latest}\n"
-                        f"{tx_link}"
-                    )
-
-                    if BOT:
-                        await BOT.send_message(
-                            GROUP_ID, text,
-                            disable_web_page_preview=True,
-                            parse_mode="Markdown"
-                        )
-                    logging.info("BTC wallet alert sent for %s (%s)", w['label'], latest)
-
-                await asyncio.sleep(poll_seconds)
-            except Exception as e:
-                logging.exception("BTC wallet watcher error: %s", e)
-                await asyncio.sleep(poll_seconds)
\ No newline at end of file
+    await watcher_engine.start_wallet_watchers(BOT, GROUP_ID, [BtcAdapter()], floor=poll_seconds)
@@ -1,58 +1,192 @@
 # btc_whale_tracker.py
+"""
+General BTC whale detector.
 
+Primary source is mempool.space's WebSocket mempool feed ("track-mempool"):
+every transaction entering the mempool is checked against the USD threshold
+as it arrives. The stream reconnects with jittered backoff, and each
+(re)connect runs one catch-up poll of mempool/recent. While the stream is
+down or silent, the old 60-second poll of mempool/recent takes over.
+SEEN_TX keeps the two paths from double-alerting.
+
+Stream txs carry their outputs, so alerts name the exchange (via
+exchange_labels) that receives the largest output when it is a known one.
+"""
 import asyncio
+import json
 import logging
-import aiohttp
+import os
+import random
 import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import aiohttp
+
+import alert_dispatcher
+import exchange_labels
+import http_client
+import price_oracle
+from dedup_store import DedupStore
 
 BTC_WHALE_THRESHOLD = 100_000  # USD threshold
-BTC_PRICE_API = "https://api.coingecko.com/api/v3/simple/price?ids=bitcoin&vs_currencies=usd"
 MEMPOOL_API = "https://mempool.space/api/mempool/recent"
-SEEN_TX = set()
+MEMPOOL_WS = os.getenv("MEMPOOL_WS", "wss://mempool.space/api/v1/ws")
+STREAM_ENABLED = os.getenv("BTC_MEMPOOL_STREAM", "1") != "0"
+POLL_SECONDS = 60
+STREAM_STALE = 90          # seconds without a message before polling resumes
+RECONNECT_BASE = 1.0       # seconds; doubled per failed attempt (full jitter)
+RECONNECT_CAP = 60.0
+SEEN_FILE = "btc_mempool_seen.log"
+SEEN_TTL = 6 * 3600  # mempool/recent only shows fresh txs
+SEEN_TX: DedupStore = None  # opened when the monitor starts
 bot = None
 GROUP_ID = None
 
+_last_stream_msg = 0.0     # monotonic time of the last stream message
+
+
 async def fetch_btc_price():
-    async with aiohttp.ClientSession() as session:
-        async with session.get(BTC_PRICE_API) as resp:
-            data = await resp.json()
-            return data["bitcoin"]["usd"]
+    # Shared oracle; None while the price is unknown or stale
+    return await price_oracle.wait_for("BTC")
 
 async def fetch_recent_txs():
-    async with aiohttp.ClientSession() as session:
-        async with session.get(MEMPOOL_API) as resp:
-            return await resp.json()
+    return await http_client.get_json(MEMPOOL_API) or []
 
-async def monitor_general_btc_whales():
-    global SEEN_TX
-    logging.info("🔍 BTC Whale tracker started.")
+
+# ---------- threshold check (shared by stream and poll) ----------
+def tx_value_sats(tx: Dict[str, Any]) -> int:
+    """Total output value. mempool/recent gives `value`; stream txs only have `vout`."""
+    if "value" in tx:
+        return tx.get("value") or 0
+    return sum(o.get("value") or 0 for o in tx.get("vout") or [])
+
+def tx_vsize(tx: Dict[str, Any]) -> int:
+    if "vsize" in tx:
+        return tx.get("vsize") or 0
+    return -(-(tx.get("weight") or 0) // 4)  # vbytes round up
+
+def largest_output_label(tx: Dict[str, Any]) -> Optional[str]:
+    """Exchange label of the biggest output's address (stream txs only; summaries have no vout)."""
+    outs = [o for o in tx.get("vout") or [] if o.get("scriptpubkey_address")]
+    if not outs:
+        return None
+    top = max(outs, key=lambda o: o.get("value") or 0)
+    return exchange_labels.labels([top["scriptpubkey_address"]])[0]
+
+def handle_tx(tx: Dict[str, Any], btc_price: float) -> bool:
+    """Alert on one mempool tx if it clears the threshold. Returns True if alerted."""
+    txid = tx.get("txid")
+    if not txid or txid in SEEN_TX:
+        return False
+
+    total_vbytes = tx_vsize(tx)
+    total_fee = tx.get("fee", 0)
+    value_btc = tx_value_sats(tx) / 1e8
+    value_usd = round(value_btc * btc_price)
+
+    if value_usd < BTC_WHALE_THRESHOLD:
+        return False
+    SEEN_TX.add(txid)
+    exch = largest_output_label(tx)
+    exch_line = f"🏦 To: {exch}\n" if exch else ""
+    message = (
+        f"🐳 BTC Whale Alert!\n"
+        f"TXID: `{txid}`\n"
+        f"💰 Value: {value_btc:.2f} BTC (~${value_usd:,})\n"
+        f"{exch_line}"
+        f"🔍 Size: {total_vbytes} vbytes\n"
+        f"⛽ Fee: {total_fee} sats"
+    )
+    if bot and GROUP_ID:
+        alert_dispatcher.enqueue(bot, GROUP_ID, message, chain="BTC", usd=value_usd)
+    logging.info(f"Whale BTC TX: {value_usd} USD")
+    return True
+
+def handle_txs(txs: Iterable[Dict[str, Any]]) -> int:
+    btc_price = price_oracle.get_usd("BTC")
+    if not btc_price:
+        return 0
+    return sum(handle_tx(tx, btc_price) for tx in txs)
+
+def _stream_txs(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Pull newly added txs out of a mempool.space WebSocket message."""
+    feed = payload.get("mempool-transactions")
+    if isinstance(feed, dict):
+        return feed.get("added") or []
+    return payload.get("transactions") or []
+
+
+# ---------- polling (fallback + catch-up) ----------
+async def poll_once() -> int:
+    n = handle_txs(await fetch_recent_txs())
+    SEEN_TX.flush()
+    return n
+
+def stream_healthy() -> bool:
+    return STREAM_ENABLED and time.monotonic() - _last_stream_msg < STREAM_STALE
+
+async def poll_fallback():
     while True:
         try:
-            btc_price = await fetch_btc_price()
-            txs = await fetch_recent_txs()
-            for tx in txs:
-                txid = tx.get("txid")
-                if txid in SEEN_TX:
-                    continue
-
-                total_vbytes = tx.get("vsize", 0)
-                total_fee = tx.get("fee", 0)
-                value_btc = tx.get("value", 0) / 1e8
-                value_usd = round(value_btc * btc_price)
-
-                if value_usd >= BTC_WHALE_THRESHOLD:
-                    SEEN_TX.add(txid)
-                    message = (
-                        f"🐳 BTC Whale Alert!\n"
-                        f"TXID: `{txid}`\n"
-                        f"💰 Value: {value_btc:.2f} BTC (~${value_usd:,})\n"
-                        f"🔍 Size: {total_vbytes} vbytes\n"
-                        f"⛽ Fee: {total_fee} sats"
-                    )
-                    if bot and GROUP_ID:
-                        await bot.send_message(chat_id=GROUP_ID, text=message)
-                    logging.info(f"Whale BTC TX: {value_usd} USD")
-
+            if not stream_healthy():
+                await poll_once()
         except Exception as e:
             logging.error(f"BTC whale monitor error: {e}")
-        await asyncio.sleep(60)
\ No newline at end of file
+        await asyncio.sleep(POLL_SECONDS)
+
+
+# ---------- streaming ----------
+def on_stream_payload(payload: Any) -> int:
+    """Handle one decoded stream message (live or replayed)."""
+    global _last_stream_msg
+    _last_stream_msg = time.monotonic()
+    n = handle_txs(_stream_txs(payload)) if isinstance(payload, dict) else 0
+    if n:
+        SEEN_TX.flush()
+    return n
+
+async def stream_mempool(url: str = MEMPOOL_WS):
+    global _last_stream_msg
+    attempt = 0
+    while True:
+        try:
+            session = await http_client.get_session()
+            async with session.ws_connect(url, heartbeat=30) as ws:
+                await ws.send_str(json.dumps({"track-mempool": True}))
+                logging.info(f"[btc-ws] connected to {url}")
+                _last_stream_msg = time.monotonic()
+                # resume: cover whatever arrived while we were disconnected
+                await poll_once()
+                async for msg in ws:
+                    if msg.type != aiohttp.WSMsgType.TEXT:
+                        if msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                            break
+                        continue
+                    attempt = 0
+                    try:
+                        payload = json.loads(msg.data)
+                    except ValueError:
+                        _last_stream_msg = time.monotonic()
+                        continue
+                    http_client.record_stream(url, payload)
+                    on_stream_payload(payload)
+            logging.warning("[btc-ws] stream closed")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.warning(f"[btc-ws] stream error: {type(e).__name__}: {e}")
+        delay = random.uniform(0, min(RECONNECT_CAP, RECONNECT_BASE * (2 ** attempt)))
+        attempt += 1
+        await asyncio.sleep(delay)
+
+
+async def monitor_general_btc_whales():
+    global SEEN_TX
+    if SEEN_TX is None:
+        SEEN_TX = DedupStore(SEEN_FILE, ttl=SEEN_TTL, max_items=50_000)
+    logging.info("🔍 BTC Whale tracker started.")
+    await fetch_btc_price()
+    tasks = [poll_fallback()]
+    if STREAM_ENABLED:
+        tasks.append(stream_mempool())
+    await asyncio.gather(*tasks)
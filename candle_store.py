@@ -0,0 +1,109 @@
+# candle_store.py
+"""
+Local hourly candle store (SQLite) for smart_signals.
+
+One row per (coin, bar): bar start in ms, last price seen in that bar and
+its volume. A newer point for the same bar overwrites it, so the newest
+row is the still-forming candle. `synced_at` per coin records the last
+successful fetch, letting callers skip the network entirely while the
+data is fresh and otherwise ask CoinGecko only for the missing range.
+"""
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DB = "candles.db"
+BAR_MS = 3600 * 1000       # hourly bars
+HISTORY_DAYS = 30          # rows older than this are pruned
+
+Candle = Tuple[int, float, float]  # (bar_start_ms, price, volume)
+
+_con: Optional[sqlite3.Connection] = None
+
+
+def _db() -> sqlite3.Connection:
+    global _con
+    if _con is None:
+        _con = sqlite3.connect(DB)
+        _con.execute("PRAGMA journal_mode=WAL")
+        _con.execute("PRAGMA synchronous=NORMAL")
+        _con.execute("""
+          CREATE TABLE IF NOT EXISTS candles(
+            coin TEXT NOT NULL,
+            ts INTEGER NOT NULL,
+            price REAL NOT NULL,
+            volume REAL NOT NULL,
+            PRIMARY KEY(coin, ts)
+          ) WITHOUT ROWID
+        """)
+        _con.execute("""
+          CREATE TABLE IF NOT EXISTS sync(
+            coin TEXT PRIMARY KEY,
+            synced_at REAL NOT NULL
+          )
+        """)
+        _con.commit()
+    return _con
+
+def close() -> None:
+    global _con
+    if _con is not None:
+        _con.close()
+        _con = None
+
+def bar_start(ts_ms: float) -> int:
+    return int(ts_ms // BAR_MS) * BAR_MS
+
+
+# ---------- Writes ----------
+def append(coin: str, points: Iterable[Tuple[float, float, float]]) -> int:
+    """
+    Upsert raw (ts_ms, price, volume) points, bucketed into bars; the latest
+    point in a bar wins. Marks the coin as synced. Returns rows written.
+    """
+    bars = {}
+    for ts, price, vol in sorted(points):
+        bars[bar_start(ts)] = (price, vol)
+    con = _db()
+    con.executemany(
+        "INSERT OR REPLACE INTO candles(coin, ts, price, volume) VALUES(?,?,?,?)",
+        [(coin, ts, p, v) for ts, (p, v) in bars.items()],
+    )
+    con.execute("INSERT OR REPLACE INTO sync(coin, synced_at) VALUES(?,?)", (coin, time.time()))
+    con.commit()
+    return len(bars)
+
+def prune(max_age_days: float = HISTORY_DAYS) -> int:
+    cutoff = int((time.time() - max_age_days * 86400) * 1000)
+    con = _db()
+    cur = con.execute("DELETE FROM candles WHERE ts < ?", (cutoff,))
+    con.commit()
+    return cur.rowcount
+
+
+# ---------- Reads ----------
+def last_ts(coin: str) -> Optional[int]:
+    """Start (ms) of the newest stored bar for `coin`."""
+    row = _db().execute("SELECT MAX(ts) FROM candles WHERE coin=?", (coin,)).fetchone()
+    return row[0] if row else None
+
+def synced_at(coin: str) -> Optional[float]:
+    row = _db().execute("SELECT synced_at FROM sync WHERE coin=?", (coin,)).fetchone()
+    return row[0] if row else None
+
+def synced_all() -> Dict[str, float]:
+    """{coin: synced_at} for every coin ever synced (one query, for schedulers)."""
+    return dict(_db().execute("SELECT coin, synced_at FROM sync").fetchall())
+
+def history(coin: str, since_ms: Optional[int] = None, limit: Optional[int] = None) -> List[Candle]:
+    """Bars for `coin`, oldest first; `limit` keeps only the newest N."""
+    sql = "SELECT ts, price, volume FROM candles WHERE coin=?"
+    args: list = [coin]
+    if since_ms is not None:
+        sql += " AND ts >= ?"
+        args.append(since_ms)
+    if limit is not None:
+        rows = _db().execute(sql + " ORDER BY ts DESC LIMIT ?", (*args, limit)).fetchall()
+        rows.reverse()
+        return rows
+    return _db().execute(sql + " ORDER BY ts", args).fetchall()
@@ -1,26 +1,20 @@
 from aiogram import Router, types
 from aiogram.filters import Command
-import json
-import os
+from utils import tier_registry
 
 router = Router()  # <-- Keep this as 'router' so main.py finds it
 
-TIERS_FILE = os.path.join("data", "tiers.json")
+TIERS_FILE = tier_registry.ASSIGNMENTS_PATH
 
 def load_tiers():
-    if os.path.exists(TIERS_FILE):
-        with open(TIERS_FILE, "r") as f:
-            return json.load(f)
-    return {}
+    return dict(tier_registry.assignments())
 
 def save_tiers(tiers):
-    with open(TIERS_FILE, "w") as f:
-        json.dump(tiers, f, indent=4)
+    tier_registry.save_assignments(tiers)
 
 @router.message(Command("tier"))
 async def cmd_tier(message: types.Message):
-    tiers = load_tiers()
-    tier = tiers.get(str(message.from_user.id), "Free")
+    tier = tier_registry.assigned_tier(message.from_user.id, "Free")
     await message.answer(f"📜 Your tier: {tier}")
 
 @router.message(Command("settier"))
@@ -39,8 +33,6 @@ async def cmd_settier(message: types.Message):
     target_id = args[1]
     new_tier = args[2]
 
-    tiers = load_tiers()
-    tiers[target_id] = new_tier
-    save_tiers(tiers)
+    tier_registry.set_assigned_tier(target_id, new_tier)
 
     await message.answer(f"✅ Tier for user `{target_id}` set to **{new_tier}**")
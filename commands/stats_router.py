@@ -0,0 +1,43 @@
+from aiogram import Router, types
+from aiogram.filters import Command
+
+import whale_rollups
+from daily_summary import WINDOW_NAMES, format_summary
+from utils.tier import is_admin
+
+stats_router = Router()
+
+HOURS_BY_NAME = {v: k for k, v in WINDOW_NAMES.items()}
+
+def _parse_window(msg: types.Message, default: str) -> int:
+    parts = (msg.text or "").split()
+    name = parts[1].lower() if len(parts) > 1 else default
+    return HOURS_BY_NAME.get(name, HOURS_BY_NAME[default])
+
+@stats_router.message(Command("whalestats"))
+async def whale_stats(msg: types.Message):
+    """/whalestats [24h|7d|30d]"""
+    if not is_admin(msg.from_user.id):
+        await msg.answer("⛔ Admins only.")
+        return
+    await msg.answer(format_summary(_parse_window(msg, "24h")), parse_mode="Markdown")
+
+@stats_router.message(Command("topwallets"))
+async def top_wallets(msg: types.Message):
+    """/topwallets [24h|7d|30d] — wallets ranked by USD volume"""
+    if not is_admin(msg.from_user.id):
+        await msg.answer("⛔ Admins only.")
+        return
+    hours = _parse_window(msg, "7d")
+    rows = whale_rollups.top_wallets(hours, n=10)
+    if not rows:
+        await msg.answer(f"No wallet activity in the last {WINDOW_NAMES[hours]}.")
+        return
+    lines = [
+        f"{i}. <code>{w[:6]}…{w[-4:]}</code> — ${usd:,.0f} ({n} events)"
+        for i, (w, n, usd) in enumerate(rows, 1)
+    ]
+    await msg.answer(
+        f"🏆 <b>Top wallets by volume ({WINDOW_NAMES[hours]})</b>\n" + "\n".join(lines),
+        parse_mode="HTML"
+    )
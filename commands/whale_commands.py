@@ -1,118 +1,80 @@
-from aiogram import Router
-from aiogram.types import Message
-from aiogram.filters import Command
-import json
-import os
-from aiogram import Router, types, F
-from aiogram.filters import Command
-from config import ADMIN_ID
-import json
-
-whale_router = Router()
-
-@whale_router.message(Command("addwhale"))
-async def add_whale(message: types.Message):
-    if message.from_user.id != ADMIN_ID:
-        await message.answer("⛔ You are not authorized to add whales.")
-        return
-
-    try:
-        parts = message.text.split(maxsplit=2)
-        if len(parts) < 3:
-            await message.answer("⚠️ Usage: /addwhale [label] [wallet_address]")
-            return
+from html import escape
 
-        label, wallet = parts[1], parts[2]
-        with open("tracked_wallets.json", "r") as f:
-            wallets = json.load(f)
-
-        wallets.append({"label": label, "address": wallet})
-
-        with open("tracked_wallets.json", "w") as f:
-            json.dump(wallets, f, indent=2)
-
-        await message.answer(f"✅ Whale added:\nLabel: {label}\nAddress: {wallet}")
-    except Exception as e:
-        await message.answer(f"⚠️ Error: {e}")
-
-@whale_router.message(Command("whalelist"))
-async def list_whales(message: types.Message):
-    try:
-        with open("tracked_wallets.json", "r") as f:
-            wallets = json.load(f)
-
-        if not wallets:
-            await message.answer("🐋 No whales tracked yet.")
-            return
+from aiogram import Router, types
+from aiogram.filters import Command
 
-        response = "📄 Tracked Whales:\n\n"
-        for i, w in enumerate(wallets, 1):
-            response += f"{i}. {w['label']} - `{w['address']}`\n"
+import wallet_registry
+from config import ADMIN_ID
+from utils import tier_registry
 
-        await message.answer(response, parse_mode="Markdown")
-    except Exception as e:
-        await message.answer(f"⚠️ Error: {e}")
 whale_router = Router()
 
-# File path for storing tracked wallets
-TRACKED_WALLETS_FILE = "tracked_wallets.json"
+LIST_LIMIT = 50  # wallets shown per /whalelist reply
 
-# Load wallet data
-def load_tracked_wallets():
-    if os.path.exists(TRACKED_WALLETS_FILE):
-        with open(TRACKED_WALLETS_FILE, "r") as f:
-            return json.load(f)
-    return []
 
-# Save wallet data
-def save_tracked_wallets(wallets):
-    with open(TRACKED_WALLETS_FILE, "w") as f:
-        json.dump(wallets, f, indent=2)
-
-# /whalelist command
-@whale_router.message(Command("whalelist"))
-async def whalelist_cmd(message: Message):
-    wallets = load_tracked_wallets()
-    if not wallets:
-        await message.answer("No wallets are currently being tracked.")
+# /addwhale LABEL ADDRESS [TIER]
+@whale_router.message(Command("addwhale"))
+async def addwhale_cmd(message: types.Message):
+    if message.from_user.id != ADMIN_ID:
+        await message.answer("🚫 You are not authorized to use this command.")
         return
 
-    response = "<b>🐋 Tracked Whale Wallets:</b>\n"
-    for w in wallets:
-        response += f"• {w['label']}: <code>{w['wallet']}</code>\n"
-    await message.answer(response, parse_mode="HTML")
-
-# /addwhale <label> <wallet>
-@whale_router.message(Command("addwhale"))
-async def addwhale_cmd(message: Message):
-    parts = message.text.strip().split(maxsplit=2)
+    parts = (message.text or "").split()
     if len(parts) < 3:
-        await message.answer("❗ Usage: <code>/addwhale LABEL WALLET_ADDRESS</code>", parse_mode="HTML")
+        await message.answer("⚠️ Usage: <code>/addwhale LABEL ADDRESS [TIER]</code>", parse_mode="HTML")
         return
 
-    label = parts[1].strip()
-    wallet = parts[2].strip()
+    label, address = parts[1], parts[2]
+    tier = parts[3].lower() if len(parts) > 3 else wallet_registry.DEFAULT_TIER
+    chain = wallet_registry.guess_chain(address)
+    if chain is None:
+        await message.answer("⚠️ Not a BTC, ETH or XRP address.")
+        return
 
-    wallets = load_tracked_wallets()
-    wallets.append({"label": label, "wallet": wallet})
-    save_tracked_wallets(wallets)
+    limit = tier_registry.tier_rules(tier).get("wallet_limit")
+    if (limit is not None and not wallet_registry.contains(chain, address)
+            and wallet_registry.count(tier) >= limit):
+        await message.answer(f"⚠️ Tier <b>{escape(tier)}</b> is full ({limit} wallets).", parse_mode="HTML")
+        return
 
-    await message.answer(f"✅ Whale wallet added:\n<b>{label}</b>: <code>{wallet}</code>", parse_mode="HTML")
-@whale_router.message(Command("addwhale"))
-async def addwhale_cmd(message: Message):
+    added = wallet_registry.add(chain, address, label=label, tier=tier)
+    verb = "Added" if added else "Updated"
+    await message.answer(
+        f"✅ {verb} {chain} whale wallet:\n"
+        f"<b>{escape(label)}</b>: <code>{escape(address)}</code> ({escape(tier)})",
+        parse_mode="HTML",
+    )
+
+# /removewhale ADDRESS
+@whale_router.message(Command("removewhale"))
+async def removewhale_cmd(message: types.Message):
     if message.from_user.id != ADMIN_ID:
         await message.answer("🚫 You are not authorized to use this command.")
         return
 
-    parts = message.text.split(" ", 2)
-    if len(parts) < 3:
-        await message.answer("⚠️ Usage: /addwhale Label Address")
+    parts = (message.text or "").split()
+    chain = wallet_registry.guess_chain(parts[1]) if len(parts) > 1 else None
+    if chain is None:
+        await message.answer("⚠️ Usage: <code>/removewhale ADDRESS</code>", parse_mode="HTML")
         return
 
-    label, address = parts[1], parts[2]
+    if wallet_registry.remove(chain, parts[1]):
+        await message.answer(f"🗑 Removed <code>{escape(parts[1])}</code>", parse_mode="HTML")
+    else:
+        await message.answer("Not tracked.")
 
-    wallets = load_tracked_wallets()
-    wallets.append({"label": label, "address": address})
-    save_tracked_wallets(wallets)
+# /whalelist
+@whale_router.message(Command("whalelist"))
+async def whalelist_cmd(message: types.Message):
+    wallets = wallet_registry.wallets()
+    if not wallets:
+        await message.answer("No wallets are currently being tracked.")
+        return
 
-    await message.answer(f"✅ Added whale wallet:\n<b>{label}</b>: <code>{address}</code>", parse_mode="HTML")
\ No newline at end of file
+    response = f"<b>🐋 Tracked Whale Wallets ({len(wallets)}):</b>\n"
+    for w in wallets[:LIST_LIMIT]:
+        response += (f"• [{w['chain']}] {escape(w['label'] or '—')}: "
+                     f"<code>{escape(w['address'])}</code> ({escape(w['tier'])})\n")
+    if len(wallets) > LIST_LIMIT:
+        response += f"… and {len(wallets) - LIST_LIMIT} more"
+    await message.answer(response, parse_mode="HTML")
@@ -1,34 +1,51 @@
 # daily_summary.py
-from whale_log import read_events
+import datetime
+
+import alert_dispatcher
+import whale_rollups
 from config import GROUP_ID, BOT  # BOT is your aiogram Bot instance
 
-def _fmt_counts(entries):
-    by_chain = {"ETH":0, "BTC":0, "XRP":0}
-    for e in entries:
-        by_chain[e.get("chain","")] = by_chain.get(e.get("chain",""), 0) + 1
+WINDOW_NAMES = {24: "24h", 168: "7d", 720: "30d"}
+
+def _fmt_counts(hours: int = 24):
+    # O(hour buckets) read of the rollups; no event rescan
+    by_chain = {"ETH": 0, "BTC": 0, "XRP": 0}
+    for chain, (n, _) in whale_rollups.by_chain(hours).items():
+        by_chain[chain] = n
     return by_chain
 
-async def daily_whale_summary():
-    entries = read_events(hours=24)
-    counts = _fmt_counts(entries)
+def format_summary(hours: int = 24) -> str:
+    name = WINDOW_NAMES.get(hours, f"{hours}h")
+    title = "Daily Whale Summary" if hours == 24 else "Whale Summary"
+    counts = _fmt_counts(hours)
+    total, usd = whale_rollups.totals(hours)
+    # rollups are hourly: the window is `hours` full hours plus the current one
+    since = datetime.datetime.fromtimestamp(whale_rollups.window_start(hours), datetime.timezone.utc)
+    since_txt = f"since {since:%b %d %H:%M} UTC"
 
-    if not entries:
-        text = (
-            "📊 **Daily Whale Summary (last 24h)**\n"
-            "No whale events logged in the last 24 hours."
+    if not total:
+        return (
+            f"📊 **{title} (last {name})**\n"
+            f"No whale events logged {since_txt}."
         )
-        await BOT.send_message(GROUP_ID, text)
-        return
 
-    # Show last 6 notable lines (most recent last)
-    tail = entries[-6:]
+    # Show last 6 notable lines (most recent last), from the rollups' recent ring
+    tail = whale_rollups.recent(6, hours=min(hours, 24))
     lines = [f"• [{e['chain']}] {e['message']}" for e in tail]
 
     text = (
-        "📊 **Daily Whale Summary (last 24h)**\n"
+        f"📊 **{title} (last {name})**\n"
+        f"_{since_txt}_\n"
         f"• ETH events: {counts.get('ETH',0)}\n"
         f"• BTC events: {counts.get('BTC',0)}\n"
-        f"• XRP events: {counts.get('XRP',0)}\n\n"
-        "Recent activity:\n" + "\n".join(lines)
+        f"• XRP events: {counts.get('XRP',0)}\n"
     )
-    await BOT.send_message(GROUP_ID, text)
\ No newline at end of file
+    if usd:
+        text += f"• Volume: ~${usd:,.0f}\n"
+    if lines:
+        text += "\nRecent activity:\n" + "\n".join(lines)
+    return text
+
+async def daily_whale_summary(chat_id=None, hours: int = 24):
+    """Post a summary to `chat_id` (default GROUP_ID); cheap enough to run per group."""
+    alert_dispatcher.enqueue(BOT, chat_id or GROUP_ID, format_summary(hours))
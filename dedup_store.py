@@ -0,0 +1,127 @@
+# dedup_store.py
+"""
+Bounded "have we seen this tx?" store shared by the monitors.
+
+Keys live in two generations of hash maps (key -> first-seen time). Every
+`ttl` seconds, or as soon as the current generation reaches half of
+`max_items`, the current one becomes the previous one and the old previous
+one is dropped whole. Lookups check both with an exact age test, so a key
+is remembered for `ttl` seconds (less only if the memory ceiling forces an
+early rotation) and memory never exceeds `max_items` keys.
+
+Persistence is an append-only text log, one "<ts> <key>" line per key.
+New keys are buffered and appended in one write on `flush()`; the log is
+rewritten (atomically) only on rotation, from the surviving generation.
+"""
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+# ===== Config =====
+DEFAULT_TTL = 24 * 3600        # seconds a key is remembered
+DEFAULT_MAX_ITEMS = 200_000    # hard ceiling across both generations
+FLUSH_EVERY = 100              # buffered keys that trigger an append
+
+
+class DedupStore:
+    def __init__(self, path: Optional[str] = None, ttl: float = DEFAULT_TTL,
+                 max_items: int = DEFAULT_MAX_ITEMS, legacy_json: Optional[str] = None):
+        self.path = path
+        self.ttl = ttl
+        self.max_items = max_items
+        self._cur: Dict[str, float] = {}
+        self._prev: Dict[str, float] = {}
+        self._rotated_at = time.time()
+        self._pending: List[str] = []
+        if path:
+            self._load(legacy_json)
+
+    # ---------- public API ----------
+    def __contains__(self, key: str) -> bool:
+        ts = self._cur.get(key)
+        if ts is None:
+            ts = self._prev.get(key)
+        return ts is not None and ts >= time.time() - self.ttl
+
+    def __len__(self) -> int:
+        return len(self._cur) + len(self._prev)
+
+    def add(self, key: str, ts: Optional[float] = None) -> bool:
+        """Remember `key`; returns False if it was already known."""
+        if key in self:
+            return False
+        self._maybe_rotate()
+        ts = time.time() if ts is None else ts
+        self._cur[key] = ts
+        if self.path:
+            self._pending.append(f"{ts:.3f} {key}\n")
+            if len(self._pending) >= FLUSH_EVERY:
+                self.flush()
+        return True
+
+    def flush(self) -> None:
+        """Append buffered keys to the log in one write."""
+        if not self.path or not self._pending:
+            return
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.writelines(self._pending)
+            self._pending.clear()
+        except OSError as e:
+            logging.warning(f"[dedup] could not append to {self.path}: {e}")
+
+    # ---------- internals ----------
+    def _maybe_rotate(self) -> None:
+        now = time.time()
+        if now - self._rotated_at < self.ttl and len(self._cur) < self.max_items // 2:
+            return
+        self._prev = self._cur
+        self._cur = {}
+        self._rotated_at = now
+        self._compact()
+
+    def _compact(self) -> None:
+        if not self.path:
+            return
+        cutoff = time.time() - self.ttl
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                for gen in (self._prev, self._cur):
+                    f.writelines(f"{ts:.3f} {k}\n" for k, ts in gen.items() if ts >= cutoff)
+            os.replace(tmp, self.path)
+            self._pending.clear()  # everything in memory is now on disk
+        except OSError as e:
+            logging.warning(f"[dedup] could not compact {self.path}: {e}")
+
+    def _load(self, legacy_json: Optional[str]) -> None:
+        cutoff = time.time() - self.ttl
+        entries: Dict[str, float] = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        ts_str, _, key = line.rstrip("\n").partition(" ")
+                        try:
+                            ts = float(ts_str)
+                        except ValueError:
+                            continue  # torn last line after a crash
+                        if key and ts >= cutoff:
+                            entries[key] = ts
+            except OSError as e:
+                logging.warning(f"[dedup] could not read {self.path}: {e}")
+        elif legacy_json and os.path.exists(legacy_json):
+            # one-time import of an old {key: ts} JSON file
+            try:
+                with open(legacy_json, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                entries = {k: float(ts) for k, ts in data.items() if float(ts) >= cutoff}
+            except Exception as e:
+                logging.warning(f"[dedup] could not import {legacy_json}: {e}")
+
+        # keep the newest keys if the file holds more than the ceiling allows
+        keep = sorted(entries.items(), key=lambda kv: kv[1])[-(self.max_items // 2):]
+        self._cur = dict(keep)
+        self._compact()
@@ -0,0 +1,66 @@
+# eth_wallet_watcher.py
+"""
+ETH plugin for watcher_engine: plain ETH transfers in and out of the
+registry's ETH watch wallets, from Ethplorer's address history.
+The cursor is "<timestamp>:<hash>" of the newest transaction seen.
+"""
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import http_client
+from watcher_engine import ChainAdapter, Transfer
+
+ETHPLORER_BASE = "https://api.ethplorer.io"
+ETHPLORER_KEY = os.getenv("ETHPLORER_KEY", "freekey")
+TX_LIMIT = 50   # newest txs per lookup; a wallet busier than this between polls loses the overflow
+
+
+def _cursor(tx: Dict[str, Any]) -> str:
+    return f"{int(tx.get('timestamp') or 0)}:{tx.get('hash', '')}"
+
+def _split(cursor: Optional[str]) -> Tuple[int, str]:
+    ts, _, h = (cursor or "0:").partition(":")
+    try:
+        return int(ts), h
+    except ValueError:
+        return 0, h
+
+
+class EthAdapter(ChainAdapter):
+    chain = "ETH"
+    unit = "ETH"
+    tx_url = "https://etherscan.io/tx/{}"
+
+    async def fetch_since(self, address: str, cursor: Optional[str]) -> Optional[Tuple[List[Dict[str, Any]], Optional[str]]]:
+        url = f"{ETHPLORER_BASE}/getAddressTransactions/{address}"
+        data = await http_client.get_json(url, params={"apiKey": ETHPLORER_KEY, "limit": str(TX_LIMIT)})
+        if not isinstance(data, list):
+            return None
+        if not data:
+            return [], cursor
+        last_ts, last_hash = _split(cursor)
+        fresh = []
+        for tx in data:  # newest first
+            ts = int(tx.get("timestamp") or 0)
+            if tx.get("hash") == last_hash or ts < last_ts:
+                break
+            fresh.append(tx)
+        return fresh, _cursor(data[0])
+
+    def normalize(self, address: str, raw: Dict[str, Any]) -> Optional[Transfer]:
+        if not raw.get("hash") or raw.get("success") is False:
+            return None
+        try:
+            amount = float(raw.get("value") or 0)
+        except (TypeError, ValueError):
+            return None
+        if amount <= 0:
+            return None  # contract calls without value
+        sender = (raw.get("from") or "").lower()
+        out = sender == address.lower()
+        return Transfer(
+            self.chain, address, raw["hash"],
+            ts=raw.get("timestamp"), amount=amount,
+            direction="out" if out else "in",
+            counterparty=raw.get("to") if out else raw.get("from"),
+        )
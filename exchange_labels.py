@@ -0,0 +1,277 @@
+# exchange_labels.py
+"""
+Compact exchange/entity label index, memory-mapped.
+
+Millions of labelled addresses as a Python set/dict would cost gigabytes
+and seconds of startup. Instead `build()` compiles label dumps into one
+file:
+
+    header  "<8sQQQ": magic, n, labels_offset, labels_len
+    keys    n x uint64 LE, sorted: blake2b-64 of the normalized address
+    ids     n x uint16 LE, label id for each key
+    labels  JSON {"labels": [label per entity], "sources": [files], "default_label": str|null}
+
+Opening it is an mmap plus a header read (near-zero load time, pages come
+in on demand and are shared between processes); lookups are a binary
+search over the keys, vectorized with numpy.searchsorted for batches.
+At 10 bytes per address, 5M addresses is ~50 MB on disk and resident only
+as far as it is touched. A 64-bit hash makes a false match across 5M
+addresses about a 1-in-10^12 event.
+
+Addresses are normalized before hashing (EVM hex lowercased), so the
+index answers for any chain without needing the chain.
+
+`get()` recompiles the index from its recorded sources when any of them is
+newer than the index, so edits to exchanges_btc.json (or a re-downloaded
+dump) are picked up on the next start.
+
+Build from CSV/JSON dumps:
+
+    python -m exchange_labels labels.csv binance_eth.json --out exchange_labels.idx
+
+CSV needs an address column (address/addr/wallet) and a label column
+(label/entity/name/exchange). JSON may be a list of addresses (labelled
+with --label, default from the file name), {label: [addresses]}, or a
+list of {"address", "label"} objects.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# ===== Config =====
+INDEX_FILE = "exchange_labels.idx"
+SEED_SOURCES = ["exchanges_btc.json"]   # compiled automatically if INDEX_FILE is missing
+SEED_LABEL = "Exchange"                 # for address-only seed lists
+
+MAGIC = b"XLABEL01"
+HEADER = struct.Struct("<8sQQQ")
+MAX_LABELS = 0xFFFF
+
+_index: Optional["LabelIndex"] = None
+
+
+# ---------- Hashing ----------
+def normalize(address: str) -> str:
+    a = address.strip()
+    return a.lower() if a[:2].lower() == "0x" else a
+
+def address_hash(address: str) -> int:
+    return int.from_bytes(hashlib.blake2b(normalize(address).encode(), digest_size=8).digest(), "little")
+
+
+# ---------- Reading ----------
+class LabelIndex:
+    def __init__(self, path: str = INDEX_FILE):
+        self.path = path
+        self._f = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self._f.close()
+            raise ValueError(f"{path}: empty label index")
+        try:
+            magic, n, labels_off, labels_len = HEADER.unpack_from(self._mm, 0)
+            if magic != MAGIC:
+                raise ValueError("not a label index")
+            self.keys = np.frombuffer(self._mm, dtype="<u8", count=n, offset=HEADER.size)
+            self.ids = np.frombuffer(self._mm, dtype="<u2", count=n, offset=HEADER.size + 8 * n)
+            meta = json.loads(self._mm[labels_off:labels_off + labels_len].decode())
+        except (struct.error, ValueError) as e:  # truncated or corrupt
+            self.close()
+            raise ValueError(f"{path}: unreadable label index ({e})") from e
+        if isinstance(meta, list):  # written before sources were recorded
+            meta = {"labels": meta, "sources": SEED_SOURCES, "default_label": SEED_LABEL}
+        self.names: List[str] = meta["labels"]
+        self.sources: List[str] = meta.get("sources") or []
+        self.default_label: Optional[str] = meta.get("default_label")
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _find(self, h: int) -> int:
+        i = int(np.searchsorted(self.keys, np.uint64(h)))
+        return i if i < len(self.keys) and int(self.keys[i]) == h else -1
+
+    def label(self, address: Optional[str]) -> Optional[str]:
+        if not address:
+            return None
+        i = self._find(address_hash(address))
+        return self.names[self.ids[i]] if i >= 0 else None
+
+    def __contains__(self, address: str) -> bool:
+        return self.label(address) is not None
+
+    def labels(self, addresses: Sequence[Optional[str]]) -> List[Optional[str]]:
+        """Batched lookup: one searchsorted over all hashes."""
+        if not addresses or not len(self.keys):
+            return [None] * len(addresses)
+        hs = np.fromiter((address_hash(a) if a else 0 for a in addresses), dtype=np.uint64, count=len(addresses))
+        pos = np.searchsorted(self.keys, hs)
+        pos_c = np.minimum(pos, len(self.keys) - 1)
+        hit = (pos < len(self.keys)) & (self.keys[pos_c] == hs)
+        return [self.names[self.ids[p]] if ok and a else None for a, p, ok in zip(addresses, pos_c, hit)]
+
+    def close(self) -> None:
+        # drop the numpy views first: mmap refuses to close while buffers are exported
+        self.keys = self.ids = np.empty(0, dtype="<u8")
+        if getattr(self, "_mm", None) is not None:
+            self._mm.close()
+            self._mm = None
+        self._f.close()
+
+
+def _stale_sources(idx: LabelIndex) -> Optional[List[str]]:
+    """The index's sources if any of them changed since it was built, else None."""
+    built = os.path.getmtime(idx.path)
+    if not any(os.path.exists(p) and os.path.getmtime(p) > built for p in idx.sources):
+        return None
+    missing = [p for p in idx.sources if not os.path.exists(p)]
+    if missing:
+        logging.warning(f"[labels] {idx.path} is older than its sources but {missing} are gone; not rebuilding")
+        return None
+    return idx.sources
+
+def get() -> Optional[LabelIndex]:
+    """
+    The shared index, opened once. Compiled from SEED_SOURCES if missing,
+    and recompiled if any of its sources is newer. None if unavailable.
+    """
+    global _index
+    if _index is None:
+        try:
+            if not os.path.exists(INDEX_FILE):
+                seeds = [p for p in SEED_SOURCES if os.path.exists(p)]
+                if not seeds:
+                    return None
+                build(seeds, INDEX_FILE, default_label=SEED_LABEL)
+            else:
+                idx = LabelIndex(INDEX_FILE)
+                sources, default_label = _stale_sources(idx), idx.default_label
+                idx.close()
+                if sources:
+                    n = build(sources, INDEX_FILE, default_label=default_label)
+                    logging.info(f"[labels] sources changed; rebuilt {INDEX_FILE} ({n} addresses)")
+            _index = LabelIndex(INDEX_FILE)
+            logging.info(f"[labels] {len(_index)} labelled addresses, {len(_index.names)} entities")
+        except Exception as e:
+            logging.warning(f"[labels] could not open {INDEX_FILE}: {e}")
+            return None
+    return _index
+
+def label(address: Optional[str]) -> Optional[str]:
+    idx = get()
+    return idx.label(address) if idx is not None else None
+
+def labels(addresses: Sequence[Optional[str]]) -> List[Optional[str]]:
+    idx = get()
+    return idx.labels(addresses) if idx is not None else [None] * len(addresses)
+
+def close() -> None:
+    global _index
+    if _index is not None:
+        _index.close()
+        _index = None
+
+
+# ---------- Building ----------
+def _pick(row: Dict[str, str], names: Tuple[str, ...]) -> str:
+    for n in names:
+        v = row.get(n)
+        if v:
+            return v.strip()
+    return ""
+
+def _read_csv(path: str) -> Iterator[Tuple[str, str]]:
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            row = {(k or "").strip().lower(): v for k, v in row.items()}
+            addr = _pick(row, ("address", "addr", "wallet"))
+            name = _pick(row, ("label", "entity", "name", "exchange"))
+            if addr and name:
+                yield addr, name
+
+def _read_json(path: str, default_label: str) -> Iterator[Tuple[str, str]]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        for name, addrs in data.items():
+            for a in addrs if isinstance(addrs, list) else ():
+                if isinstance(a, str) and a.strip():
+                    yield a, name
+        return
+    for item in data if isinstance(data, list) else ():
+        if isinstance(item, str) and item.strip():
+            yield item, default_label
+        elif isinstance(item, dict):
+            addr = _pick(item, ("address", "addr", "wallet"))
+            if addr:
+                yield addr, _pick(item, ("label", "entity", "name", "exchange")) or default_label
+
+def read_source(path: str, default_label: Optional[str] = None) -> Iterator[Tuple[str, str]]:
+    """(address, label) pairs from a CSV or JSON dump."""
+    if default_label is None:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        default_label = stem.split("_")[0].capitalize()
+    if path.lower().endswith(".csv"):
+        return _read_csv(path)
+    return _read_json(path, default_label)
+
+def build(sources: Iterable[str], out: str = INDEX_FILE, default_label: Optional[str] = None) -> int:
+    """Compile dumps into `out` (atomically). Later sources win on duplicates. Returns the address count."""
+    sources = list(sources)
+    names: Dict[str, int] = {}
+    hashes: List[int] = []
+    ids: List[int] = []
+    for path in sources:
+        for addr, name in read_source(path, default_label):
+            lid = names.get(name)
+            if lid is None:
+                if len(names) >= MAX_LABELS:
+                    raise ValueError(f"more than {MAX_LABELS} distinct labels")
+                lid = names[name] = len(names)
+            hashes.append(address_hash(addr))
+            ids.append(lid)
+
+    keys = np.array(hashes, dtype="<u8")
+    lids = np.array(ids, dtype="<u2")
+    # stable sort, then keep the last occurrence of each key
+    order = np.argsort(keys, kind="stable")
+    keys, lids = keys[order], lids[order]
+    if len(keys):
+        last = np.append(keys[1:] != keys[:-1], True)
+        keys, lids = keys[last], lids[last]
+
+    n = len(keys)
+    label_blob = json.dumps({"labels": list(names), "sources": sources, "default_label": default_label},
+                            ensure_ascii=False).encode()
+    labels_off = HEADER.size + 10 * n
+    tmp = out + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, n, labels_off, len(label_blob)))
+        f.write(keys.tobytes())
+        f.write(lids.tobytes())
+        f.write(label_blob)
+    os.replace(tmp, out)
+    return n
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("sources", nargs="+", help="CSV/JSON label dumps")
+    ap.add_argument("--out", default=INDEX_FILE)
+    ap.add_argument("--label", default=None, help="label for address-only lists (default: from file name)")
+    args = ap.parse_args()
+
+    n = build(args.sources, args.out, default_label=args.label)
+    print(f"{args.out}: {n} addresses, {os.path.getsize(args.out) / 1e6:.1f} MB")
+
+if __name__ == "__main__":
+    main()
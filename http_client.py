@@ -0,0 +1,292 @@
+# http_client.py
+"""
+Shared async HTTP client used by every monitor and command.
+
+One aiohttp session (keep-alive + DNS cache) is reused for the life of the
+process, so polling loops stop paying for a TLS handshake on every call.
+Each upstream provider gets its own timeout, concurrency cap and retry
+budget. Retries use jittered exponential backoff and honor `Retry-After`.
+
+Requests to a provider are also paced by an AIMD rate limiter: successes
+raise the allowed rate by about AI_STEP req/s per second, a 429/5xx or timeout
+halves it (at most once per MD_COOLDOWN), and a Retry-After pauses the
+provider for everyone. The rate settles just under what each API accepts.
+
+Capture: with HTTP_RECORD=<path> set (or start_recording()), every
+get_json result and every streamed message passed to record_stream() is
+appended to a JSONL file for replay.py. Credential params are dropped.
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass, replace
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+# ===== Config =====
+@dataclass(frozen=True)
+class Provider:
+    name: str
+    timeout: float = 20.0     # total seconds per attempt
+    concurrency: int = 4      # max in-flight requests to this provider
+    retries: int = 2          # extra attempts after the first one
+    rate: float = 5.0         # starting requests/second
+    max_rate: float = 20.0    # AIMD never goes above this
+    min_rate: float = 0.1     # ...or below this
+
+# Keyed by hostname
+PROVIDERS: Dict[str, Provider] = {
+    "api.coingecko.com":  Provider("coingecko",  timeout=15, concurrency=4, retries=3, rate=0.5, max_rate=1.0),
+    "mempool.space":      Provider("mempool",    timeout=15, concurrency=4, retries=2, rate=5.0, max_rate=10.0),
+    "blockchain.info":    Provider("blockchain", timeout=20, concurrency=4, retries=2, rate=1.0, max_rate=3.0),
+    "api.blockchair.com": Provider("blockchair", timeout=20, concurrency=4, retries=2, rate=0.5, max_rate=1.0),
+    "api.ethplorer.io":   Provider("ethplorer",  timeout=20, concurrency=4, retries=2, rate=1.0, max_rate=2.0),
+    "api.xrpscan.com":    Provider("xrpscan",    timeout=20, concurrency=4, retries=2, rate=1.0, max_rate=2.0),
+}
+DEFAULT_PROVIDER = Provider("default")
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BACKOFF_BASE = 0.5        # seconds
+BACKOFF_CAP = 30.0        # max jittered backoff
+RETRY_AFTER_MAX = 120.0   # never sleep longer than this on a Retry-After
+
+# AIMD pacing
+AI_STEP = 0.5             # success: rate += AI_STEP / rate (about +AI_STEP req/s per second)
+MD_FACTOR = 0.5           # throttled: rate *= MD_FACTOR
+MD_COOLDOWN = 2.0         # seconds between multiplicative decreases
+
+# Connection pool
+POOL_LIMIT = 100          # total sockets
+POOL_LIMIT_PER_HOST = 10  # sockets per host
+DNS_TTL = 300             # seconds
+KEEPALIVE = 60            # seconds an idle socket stays open
+
+USER_AGENT = "DeityTradeProBot/1.0"
+
+# Capture for replay.py
+RECORD_PATH = os.getenv("HTTP_RECORD")
+SECRET_PARAMS = {"apikey", "api_key", "key", "token", "x_cg_demo_api_key", "x_cg_pro_api_key"}
+
+_session: Optional[aiohttp.ClientSession] = None
+_record_file = None
+_session_loop: Optional[asyncio.AbstractEventLoop] = None
+_semaphores: Dict[str, asyncio.Semaphore] = {}
+_limiters: Dict[str, "AdaptiveRate"] = {}
+
+
+class AdaptiveRate:
+    """AIMD request pacing for one provider."""
+
+    def __init__(self, provider: Provider):
+        self.provider = provider
+        self.rate = provider.rate
+        self.next_slot = 0.0
+        self.blocked_until = 0.0
+        self.last_cut = 0.0
+
+    async def wait(self) -> None:
+        """Reserve the next request slot and sleep until it comes up."""
+        while True:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                await asyncio.sleep(self.blocked_until - now)
+                continue
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + 1.0 / self.rate
+            if slot > now:
+                await asyncio.sleep(slot - now)
+            if time.monotonic() >= self.blocked_until:
+                return
+            # paused by a Retry-After while we slept: queue again
+
+    def on_success(self) -> None:
+        p = self.provider
+        self.rate = min(p.max_rate, self.rate + AI_STEP / self.rate)
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        now = time.monotonic()
+        if now - self.last_cut >= MD_COOLDOWN:
+            self.rate = max(self.provider.min_rate, self.rate * MD_FACTOR)
+            self.last_cut = now
+            logging.info(f"[http:{self.provider.name}] throttled; rate -> {self.rate:.2f}/s")
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+
+
+# ===== Session =====
+def provider_for(url: str) -> Provider:
+    host = (urlsplit(url).hostname or "").lower()
+    return PROVIDERS.get(host, DEFAULT_PROVIDER)
+
+async def get_session() -> aiohttp.ClientSession:
+    """Return the process-wide session, creating it on first use."""
+    global _session, _session_loop
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        connector = aiohttp.TCPConnector(
+            limit=POOL_LIMIT,
+            limit_per_host=POOL_LIMIT_PER_HOST,
+            ttl_dns_cache=DNS_TTL,
+            keepalive_timeout=KEEPALIVE,
+        )
+        _session = aiohttp.ClientSession(connector=connector, headers={"User-Agent": USER_AGENT})
+        _session_loop = loop
+        _semaphores.clear()
+        _limiters.clear()
+    return _session
+
+def _semaphore(provider: Provider) -> asyncio.Semaphore:
+    sem = _semaphores.get(provider.name)
+    if sem is None:
+        sem = _semaphores[provider.name] = asyncio.Semaphore(provider.concurrency)
+    return sem
+
+def limiter(provider: Provider) -> AdaptiveRate:
+    lim = _limiters.get(provider.name)
+    if lim is None:
+        lim = _limiters[provider.name] = AdaptiveRate(provider)
+    return lim
+
+def set_budget(host: str, max_rate: float, concurrency: Optional[int] = None) -> Provider:
+    """
+    Re-size a provider to an API plan: AIMD ceiling of `max_rate` req/s,
+    starting at half of it, and optionally a new in-flight cap.
+    Takes effect on the next request.
+    """
+    old = PROVIDERS.get(host, DEFAULT_PROVIDER)
+    new = replace(old, max_rate=max_rate, rate=max_rate / 2,
+                  concurrency=concurrency or old.concurrency)
+    PROVIDERS[host] = new
+    _limiters.pop(new.name, None)
+    _semaphores.pop(new.name, None)
+    return new
+
+def current_rates() -> Dict[str, float]:
+    """{provider name: current requests/second}, for logs and /debug output."""
+    return {name: lim.rate for name, lim in _limiters.items()}
+
+async def close() -> None:
+    """Close the shared session (call on shutdown)."""
+    global _session, _session_loop
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+    _session_loop = None
+    _semaphores.clear()
+    _limiters.clear()
+    stop_recording()
+
+
+# ===== Capture =====
+def public_params(params: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Params without credentials, as recorded and as replay keys them."""
+    if not params:
+        return None
+    return {k: v for k, v in params.items() if k.lower() not in SECRET_PARAMS} or None
+
+def start_recording(path: str) -> None:
+    global _record_file
+    stop_recording()
+    _record_file = open(path, "a", encoding="utf-8")
+    logging.info(f"[http] recording responses to {path}")
+
+def stop_recording() -> None:
+    global _record_file
+    if _record_file is not None:
+        _record_file.close()
+        _record_file = None
+
+def _record(entry: Dict[str, Any]) -> None:
+    global RECORD_PATH
+    if _record_file is None and RECORD_PATH:
+        start_recording(RECORD_PATH)
+        RECORD_PATH = None   # once; stop_recording() really stops
+    if _record_file is not None:
+        _record_file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        _record_file.flush()
+
+def record_stream(url: str, payload: Any) -> None:
+    """Capture one streamed (WebSocket) message."""
+    if _record_file is not None or RECORD_PATH:
+        _record({"t": round(time.time(), 3), "ws": url, "data": payload})
+
+
+# ===== Retry helpers =====
+def _retry_after(resp: aiohttp.ClientResponse) -> Optional[float]:
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return min(max(float(value), 0.0), RETRY_AFTER_MAX)
+    except ValueError:
+        pass
+    try:
+        return min(max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0), RETRY_AFTER_MAX)
+    except Exception:
+        return None
+
+def _backoff(attempt: int) -> float:
+    # "full jitter": uniform over [0, base * 2^attempt], capped
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+
+# ===== Public API =====
+async def get_json(
+    url: str,
+    params: Optional[Dict[str, Any]] = None,
+    *,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: Optional[float] = None,
+) -> Optional[Any]:
+    """
+    GET `url` and return the decoded JSON body, or None on failure.
+    Retries on connection errors, timeouts and 429/5xx responses.
+    """
+    if _record_file is None and not RECORD_PATH:
+        return await _get_json(url, params, headers, timeout)
+    start = time.time()
+    data = await _get_json(url, params, headers, timeout)
+    _record({"t": round(start, 3), "dt": round(time.time() - start, 3),
+             "url": url, "params": public_params(params), "data": data})
+    return data
+
+async def _get_json(url: str, params: Optional[Dict[str, Any]], headers: Optional[Dict[str, str]],
+                    timeout: Optional[float]) -> Optional[Any]:
+    provider = provider_for(url)
+    session = await get_session()
+    pacing = limiter(provider)
+    client_timeout = aiohttp.ClientTimeout(total=timeout or provider.timeout)
+
+    for attempt in range(provider.retries + 1):
+        wait: Optional[float] = None
+        try:
+            async with _semaphore(provider):
+                await pacing.wait()
+                async with session.get(url, params=params, headers=headers, timeout=client_timeout) as resp:
+                    if resp.status == 200:
+                        pacing.on_success()
+                        return await resp.json(content_type=None)
+                    if resp.status not in RETRY_STATUSES:
+                        logging.warning(f"[http:{provider.name}] HTTP {resp.status} for {url}")
+                        return None
+                    wait = _retry_after(resp)
+                    pacing.on_throttle(wait)
+                    logging.warning(f"[http:{provider.name}] HTTP {resp.status} for {url} (attempt {attempt + 1})")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            pacing.on_throttle()
+            logging.warning(f"[http:{provider.name}] {type(e).__name__} for {url} (attempt {attempt + 1}): {e}")
+        except ValueError as e:
+            # bad JSON body; retrying won't help
+            logging.warning(f"[http:{provider.name}] invalid JSON from {url}: {e}")
+            return None
+
+        if attempt < provider.retries:
+            await asyncio.sleep(wait if wait is not None else _backoff(attempt))
+
+    return None
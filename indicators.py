@@ -0,0 +1,316 @@
+# indicators.py
+"""
+Streaming indicator state for smart_signals.
+
+Each coin keeps O(1)-per-bar state for the exact quantities
+`smart_signals.score_signal` derives from its full price/volume lists:
+
+  - EMA20 over the last 60 closes and EMA50 over the last 120 closes
+    (seeded with the oldest close in the window, like `ema(prices[-60:], 20)`)
+  - Wilder RSI(14) over the whole stream (identical recurrence to `rsi`)
+  - mean/variance of the last 24 closes (volatility proxy)
+  - average of the 7 volumes before the latest one (volume surge)
+  - close 24 bars ago (24h change)
+
+Pushing bars one by one and reading `metrics()` gives the same numbers as
+calling `score_signal` on the accumulated lists. Sliding sums are exactly
+re-anchored once per window, so float drift never builds up.
+
+A bar can be amended in place (`amend`) when a newer point for the same
+period arrives, e.g. the still-forming hourly candle.
+"""
+import math
+from collections import deque
+from typing import Any, Dict, Optional
+
+MIN_BARS = 30  # score_signal refuses shorter series
+
+
+class _SlidingEMA:
+    """EMA of the last `window` values, seeded with the oldest value in the window."""
+
+    def __init__(self, period: int, window: int):
+        self.period = period
+        self.window = window
+        self.k = 2 / (period + 1)
+        self.decay = (1 - self.k) ** (window - 1)
+        self.buf: deque = deque()
+        self.e: Optional[float] = None
+        self.slides = 0
+        self._undo: Any = None
+
+    def push(self, x: float) -> None:
+        k = self.k
+        buf = self.buf
+        evicted = None
+        self._undo = (self.e, self.slides)
+        buf.append(x)
+        if len(buf) == 1:
+            self.e = x
+        elif len(buf) <= self.window:
+            self.e = x * k + self.e * (1 - k)
+        else:
+            evicted = buf.popleft()
+            # window slid by one: drop the old seed, re-seed with the next value
+            self.e = x * k + (self.e + self.decay * (buf[0] - evicted)) * (1 - k)
+            self.slides += 1
+            if self.slides % self.window == 0:
+                self._reanchor()
+        self._undo += (evicted,)
+
+    def undo(self) -> None:
+        self.e, self.slides, evicted = self._undo
+        self.buf.pop()
+        if evicted is not None:
+            self.buf.appendleft(evicted)
+
+    def _reanchor(self) -> None:
+        k = self.k
+        it = iter(self.buf)
+        e = next(it)
+        for v in it:
+            e = v * k + e * (1 - k)
+        self.e = e
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.e if len(self.buf) >= self.period else None
+
+
+class _WilderRSI:
+    """Wilder-smoothed RSI over the whole stream."""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.n = 0
+        self.prev: Optional[float] = None
+        self.gains = 0.0
+        self.losses = 0.0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self._undo: Any = None
+
+    def push(self, x: float) -> None:
+        p = self.period
+        self._undo = (self.n, self.prev, self.gains, self.losses, self.avg_gain, self.avg_loss)
+        self.n += 1
+        if self.prev is None:
+            self.prev = x
+            return
+        delta = x - self.prev
+        self.prev = x
+        if self.n <= p + 1:
+            # seed window
+            if delta >= 0:
+                self.gains += delta
+            else:
+                self.losses -= delta
+            if self.n == p + 1:
+                self.avg_gain = self.gains / p
+                self.avg_loss = self.losses / p if self.losses != 0 else 1e-9
+        else:
+            gain = max(delta, 0.0)
+            loss = max(-delta, 0.0)
+            self.avg_gain = (self.avg_gain * (p - 1) + gain) / p
+            self.avg_loss = (self.avg_loss * (p - 1) + loss) / p
+
+    def undo(self) -> None:
+        self.n, self.prev, self.gains, self.losses, self.avg_gain, self.avg_loss = self._undo
+
+    @property
+    def value(self) -> Optional[float]:
+        if self.n < self.period + 1:
+            return None
+        rs = self.avg_gain / (self.avg_loss if self.avg_loss != 0 else 1e-9)
+        return 100 - (100 / (1 + rs))
+
+
+class _RollingStats:
+    """Mean/variance (population) of the last `window` values, Welford add/remove."""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.buf: deque = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.slides = 0
+        self._undo: Any = None
+
+    def _add(self, x: float) -> None:
+        n = len(self.buf)
+        delta = x - self.mean
+        self.mean += delta / n
+        self.m2 += delta * (x - self.mean)
+
+    def _remove(self, y: float) -> None:
+        n = len(self.buf)
+        if n == 0:
+            self.mean = self.m2 = 0.0
+            return
+        delta = y - self.mean
+        self.mean -= delta / n
+        self.m2 -= delta * (y - self.mean)
+
+    def push(self, x: float) -> None:
+        evicted = None
+        self._undo = (self.mean, self.m2, self.slides)
+        self.buf.append(x)
+        self._add(x)
+        if len(self.buf) > self.window:
+            evicted = self.buf.popleft()
+            self._remove(evicted)
+            self.slides += 1
+            if self.slides % self.window == 0:
+                self._reanchor()
+        self._undo += (evicted,)
+
+    def undo(self) -> None:
+        self.mean, self.m2, self.slides, evicted = self._undo
+        self.buf.pop()
+        if evicted is not None:
+            self.buf.appendleft(evicted)
+
+    def _reanchor(self) -> None:
+        n = len(self.buf)
+        self.mean = sum(self.buf) / n
+        self.m2 = sum((x - self.mean) ** 2 for x in self.buf)
+
+    @property
+    def var(self) -> float:
+        n = len(self.buf)
+        return self.m2 / n if n else 0.0
+
+
+class _RollingSum:
+    """Running sum of the last `window` values."""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.buf: deque = deque()
+        self.total = 0.0
+        self.slides = 0
+        self._undo: Any = None
+
+    def push(self, x: float) -> None:
+        evicted = None
+        self._undo = (self.total, self.slides)
+        self.buf.append(x)
+        self.total += x
+        if len(self.buf) > self.window:
+            evicted = self.buf.popleft()
+            self.total -= evicted
+            self.slides += 1
+            if self.slides % self.window == 0:
+                self.total = sum(self.buf)
+        self._undo += (evicted,)
+
+    def undo(self) -> None:
+        self.total, self.slides, evicted = self._undo
+        self.buf.pop()
+        if evicted is not None:
+            self.buf.appendleft(evicted)
+
+
+class CoinIndicators:
+    """All indicator state for one coin."""
+
+    def __init__(self):
+        self.n = 0
+        self.ema20 = _SlidingEMA(20, 60)
+        self.ema50 = _SlidingEMA(50, 120)
+        self.rsi = _WilderRSI(14)
+        self.stats24 = _RollingStats(24)
+        self.vols8 = _RollingSum(8)
+        self.closes25: deque = deque()  # [0] is the close 24 bars ago
+        self._closes_evicted: Optional[float] = None
+        self.last: Optional[float] = None
+        self.last_vol: Optional[float] = None
+        self._parts = (self.ema20, self.ema50, self.rsi, self.stats24)
+
+    def push(self, price: float, vol: float) -> None:
+        """Append one closed (or forming) bar."""
+        for part in self._parts:
+            part.push(price)
+        self.vols8.push(vol)
+        self.closes25.append(price)
+        self._closes_evicted = self.closes25.popleft() if len(self.closes25) > 25 else None
+        self.last = price
+        self.last_vol = vol
+        self.n += 1
+
+    def amend(self, price: float, vol: float) -> None:
+        """Replace the most recent bar (same period, newer value)."""
+        if self.n == 0:
+            self.push(price, vol)
+            return
+        for part in self._parts:
+            part.undo()
+        self.vols8.undo()
+        self.closes25.pop()
+        if self._closes_evicted is not None:
+            self.closes25.appendleft(self._closes_evicted)
+        self.n -= 1
+        self.push(price, vol)
+
+    def metrics(self) -> Optional[Dict[str, Any]]:
+        """Inputs for the risk score, or None if fewer than MIN_BARS bars."""
+        if self.n < MIN_BARS:
+            return None
+        last = self.last
+        prev_24 = self.closes25[0]
+        chg_24h = (last - prev_24) / prev_24 * 100.0 if prev_24 != 0 else 0.0
+
+        vols = self.vols8
+        if len(vols.buf) >= 8:
+            vol_avg7 = (vols.total - self.last_vol) / 7
+        else:
+            vol_avg7 = vols.total / max(1, len(vols.buf))
+        vol_surge = (self.last_vol / vol_avg7) if vol_avg7 > 0 else 1.0
+
+        mean = self.stats24.mean
+        vol_proxy = math.sqrt(max(self.stats24.var, 0.0)) / mean if mean > 0 else 0.02
+
+        return {
+            "last": last,
+            "chg_24h": chg_24h,
+            "ema20": self.ema20.value,
+            "ema50": self.ema50.value,
+            "rsi": self.rsi.value,
+            "vol_surge": vol_surge,
+            "vol_proxy": vol_proxy,
+        }
+
+
+class IndicatorEngine:
+    """
+    Per-coin indicator state keyed by coin id.
+    Points are bucketed into `bar_seconds` bars: a point in a new bucket
+    appends a bar, a point in the current bucket amends it, older points
+    are ignored.
+    """
+
+    def __init__(self, bar_seconds: int = 3600):
+        self.bar_ms = bar_seconds * 1000
+        self.coins: Dict[str, CoinIndicators] = {}
+        self.last_bucket: Dict[str, int] = {}
+
+    def update(self, coin_id: str, ts_ms: float, price: float, vol: float) -> None:
+        bucket = int(ts_ms // self.bar_ms)
+        last = self.last_bucket.get(coin_id)
+        state = self.coins.get(coin_id)
+        if state is None:
+            state = self.coins[coin_id] = CoinIndicators()
+        if last is None or bucket > last:
+            state.push(price, vol)
+            self.last_bucket[coin_id] = bucket
+        elif bucket == last:
+            state.amend(price, vol)
+
+    def last_ts(self, coin_id: str) -> Optional[int]:
+        """Start (ms) of the newest bar held for `coin_id`."""
+        bucket = self.last_bucket.get(coin_id)
+        return None if bucket is None else bucket * self.bar_ms
+
+    def metrics(self, coin_id: str) -> Optional[Dict[str, Any]]:
+        state = self.coins.get(coin_id)
+        return state.metrics() if state else None
@@ -4,6 +4,13 @@ from aiogram import Bot, Dispatcher
 from aiogram.enums import ParseMode
 from aiogram.client.default import DefaultBotProperties
 
+import alert_dispatcher
+import exchange_labels
+import http_client
+import prefs
+import state_store
+import wallet_registry
+import whale_log
 from config import BOT_TOKEN
 from router.system_router import system_router  # ← single aggregator
 
@@ -15,6 +22,15 @@ dp = Dispatcher()
 # Include exactly ONE router (the aggregator)
 dp.include_router(system_router)
 
+# Flush queued alerts, close the shared HTTP pool and flush state/log files on exit
+dp.shutdown.register(alert_dispatcher.close)
+dp.shutdown.register(http_client.close)
+dp.shutdown.register(state_store.close_all)
+dp.shutdown.register(whale_log.close)
+dp.shutdown.register(prefs.close)
+dp.shutdown.register(wallet_registry.close)
+dp.shutdown.register(exchange_labels.close)
+
 # Optional background tasks. Uncomment only if these functions exist.
 async def on_startup():
     print("Bot started. Listening for updates...")
@@ -29,5 +45,10 @@ async def on_startup():
     # asyncio.create_task(monitor_btc_whales(bot))
     # asyncio.create_task(monitor_xrp_whales(bot))
 
+    # Tracked BTC/ETH/XRP wallets, all chains on one watcher engine:
+    # from config import GROUP_ID
+    # from watcher_engine import start_wallet_watchers
+    # asyncio.create_task(start_wallet_watchers(bot, GROUP_ID))
+
 if __name__ == "__main__":
     asyncio.run(dp.start_polling(bot, on_startup=on_startup))
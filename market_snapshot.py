@@ -0,0 +1,67 @@
+# market_snapshot.py
+"""
+Cached top-50 market snapshot (CoinGecko /coins/markets).
+
+- Fresh for SNAPSHOT_TTL seconds: served straight from memory.
+- Stale but younger than SNAPSHOT_MAX_STALE: served immediately while one
+  background refresh runs (stale-while-revalidate).
+- Missing/too old: callers wait, but N concurrent callers share ONE
+  upstream request (single-flight).
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from price_fetcher import get_top_50_crypto_prices
+
+# ===== Config =====
+SNAPSHOT_TTL = 60            # seconds a snapshot counts as fresh
+SNAPSHOT_MAX_STALE = 15 * 60  # oldest snapshot we'll still serve while refreshing
+
+@dataclass(frozen=True)
+class Snapshot:
+    coins: List[Dict[str, Any]] = field(default_factory=list)
+    fetched_at: float = 0.0
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+_current: Snapshot = Snapshot()
+_inflight: Optional[asyncio.Task] = None
+
+
+async def _refresh() -> Snapshot:
+    global _current
+    try:
+        coins = await get_top_50_crypto_prices()
+    except Exception as e:
+        logging.warning(f"[market] snapshot refresh failed: {e}")
+        coins = []
+    if coins:
+        _current = Snapshot(coins=coins, fetched_at=time.time())
+    # On failure keep serving the last good snapshot
+    return _current
+
+def _start_refresh() -> asyncio.Task:
+    """Start a refresh unless one is already running; return the shared task."""
+    global _inflight
+    if _inflight is None or _inflight.done():
+        _inflight = asyncio.create_task(_refresh())
+    return _inflight
+
+async def get_snapshot() -> Snapshot:
+    snap = _current
+    if snap.coins:
+        age = snap.age()
+        if age < SNAPSHOT_TTL:
+            return snap
+        if age < SNAPSHOT_MAX_STALE:
+            _start_refresh()
+            return snap
+    # shield: one cancelled handler must not cancel everyone's fetch
+    return await asyncio.shield(_start_refresh())
+
+async def get_top_coins() -> List[Dict[str, Any]]:
+    return (await get_snapshot()).coins
@@ -1,95 +1,85 @@
 # new_token_monitor.py
 import os
-import json
-import time
-import asyncio
 import logging
 from typing import Dict, List, Any, Optional
 
-import aiohttp
+import alert_dispatcher
+import http_client
+import poll_scheduler
+import wallet_registry
+from state_store import StateStore
 
 """
 Monitors ETH whale wallets and alerts when they acquire a token
 they did not hold before (i.e., a "new token" for that wallet).
 
 Data source: Ethplorer (public 'freekey') for quick token inventory checks.
-Rate limits are modest; we space requests politely.
+Scans run ETHPLORER_CONCURRENCY at a time under a shared ETHPLORER_RPS
+budget (http_client's AIMD limiter never goes above it); set both to
+match your key's plan.
 """
 
 ETHPLORER_BASE = "https://api.ethplorer.io"
 ETHPLORER_KEY = os.getenv("ETHPLORER_KEY", "freekey")  # can be replaced with your key
-
-# Where we persist last-known token symbols per wallet
-STATE_FILE = "whale_new_tokens_state.json"
-# Optional: where your ETH whales are listed if not passed in
-DEFAULT_WHALES_FILE = "eth_whales.json"
+ETHPLORER_HOST = "api.ethplorer.io"
+ETHPLORER_RPS = float(os.getenv("ETHPLORER_RPS", "2"))            # freekey: 2 req/s
+ETHPLORER_CONCURRENCY = int(os.getenv("ETHPLORER_CONCURRENCY", "4"))
+
+# Where we persist last-known token symbols per wallet (journaled store)
+STATE_NAME = "whale_new_tokens_state"
+STATE_LEGACY_FILE = "whale_new_tokens_state.json"   # imported once, then unused
+# ETH whales come from wallet_registry's NEW_TOKEN list if not passed in
+POLL_FLOOR = 120                    # most active whales
+POLL_CEILING = 6 * 3600             # dormant wallets
+POLL_STATE_NAME = "new_token_poll"  # learned per-wallet intervals
 
 # These are injected by main.py
 bot = None
 GROUP_ID = None
 
 
-# ---------- File helpers ----------
-def _ensure_file(path: str, default: Any):
-    if not os.path.exists(path):
-        with open(path, "w") as f:
-            json.dump(default, f, indent=2)
-
-
-def _load_json(path: str, default: Any):
-    _ensure_file(path, default)
-    with open(path, "r") as f:
-        try:
-            return json.load(f)
-        except Exception:
-            return default
-
-
-def _save_json(path: str, data: Any):
-    tmp = f"{path}.tmp"
-    with open(tmp, "w") as f:
-        json.dump(data, f, indent=2)
-    os.replace(tmp, path)
-
-
 # ---------- API ----------
-async def fetch_eth_tokens(session: aiohttp.ClientSession, address: str) -> List[str]:
-    """
-    Returns a list of token symbols (including 'ETH' if non-zero balance) currently held by the wallet.
-    Uses Ethplorer: /getAddressInfo/{address}
-    """
+def _held_symbols(data: Dict[str, Any]) -> List[str]:
+    """Only what we need from getAddressInfo: symbols with a positive balance."""
+    symbols = set()
+
+    # ETH balance
+    eth_balance = (data.get("ETH") or {}).get("balance", 0)
+    if eth_balance and eth_balance > 0:
+        symbols.add("ETH")
+
+    # ERC-20 tokens; treat any positive (raw) balance as "holding"
+    for t in data.get("tokens") or ():
+        raw_bal = t.get("rawBalance") or t.get("balance")
+        if not raw_bal or float(raw_bal) <= 0:
+            continue
+        sym = ((t.get("tokenInfo") or {}).get("symbol") or "").strip()
+        if sym:
+            symbols.add(sym)
+
+    # sorted for stability
+    return sorted(symbols)
+
+async def fetch_token_inventory(address: str) -> Optional[List[str]]:
+    """Held symbols for the wallet, or None if the fetch failed."""
     url = f"{ETHPLORER_BASE}/getAddressInfo/{address}"
-    params = {"apiKey": ETHPLORER_KEY}
+    params = {"apiKey": ETHPLORER_KEY, "showETHTotals": "false"}
     try:
-        async with session.get(url, params=params, timeout=20) as resp:
-            if resp.status != 200:
-                logging.warning(f"Ethplorer non-200 for {address}: {resp.status}")
-                return []
-            data = await resp.json()
-
-            symbols: List[str] = []
-
-            # ETH balance
-            eth_balance = data.get("ETH", {}).get("balance", 0)
-            if eth_balance and eth_balance > 0:
-                symbols.append("ETH")
-
-            # ERC-20 tokens
-            for t in data.get("tokens", []) or []:
-                info = t.get("tokenInfo") or {}
-                sym = (info.get("symbol") or "").strip()
-                if sym:
-                    # treat any positive (raw) balance as "holding"
-                    raw_bal = t.get("balance", 0)
-                    if raw_bal and float(raw_bal) > 0:
-                        symbols.append(sym)
-
-            # Deduplicate and sort for stability
-            return sorted(set(symbols))
-
+        data = await http_client.get_json(url, params=params)
+        if not data:
+            logging.warning(f"Ethplorer fetch failed for {address}")
+            return None
+        return _held_symbols(data)
     except Exception as e:
         logging.exception(f"fetch_eth_tokens error for {address}: {e}")
-        return []
+        return None
+
+async def fetch_eth_tokens(address: str) -> List[str]:
+    """
+    Returns a list of token symbols (including 'ETH' if non-zero balance) currently held by the wallet.
+    Uses Ethplorer: /getAddressInfo/{address}
+    """
+    return await fetch_token_inventory(address) or []
 
 
 def _etherscan_link(address: str) -> str:
@@ -115,33 +105,14 @@ async def _send_alert_new_token(wallet: str, new_symbols: List[str]):
     )
 
     try:
-        await bot.send_message(GROUP_ID, text, parse_mode="Markdown")
-        logging.info(f"New-token alert sent for {wallet}: {new_symbols}")
+        alert_dispatcher.enqueue(bot, GROUP_ID, text, chain="ETH", parse_mode="Markdown")
+        logging.info(f"New-token alert queued for {wallet}: {new_symbols}")
     except Exception as e:
-        logging.exception(f"send_message failed: {e}")
+        logging.exception(f"enqueue failed: {e}")
 
 
-def _load_whales(whales_file: str) -> List[str]:
-    """
-    Attempts to load a list of ETH whale addresses from a JSON file.
-    Expected format: ["0xabc...", "0xdef...", ...]
-    """
-    if not os.path.exists(whales_file):
-        logging.warning(
-            f"No whales file found at {whales_file}. "
-            f"Create it or pass whales explicitly."
-        )
-        return []
-    try:
-        with open(whales_file, "r") as f:
-            data = json.load(f)
-            if isinstance(data, list):
-                return data
-            logging.warning("Whales file not a list; ignoring.")
-            return []
-    except Exception as e:
-        logging.exception(f"Failed to read whales file: {e}")
-        return []
+def _load_whales() -> List[str]:
+    return wallet_registry.addresses("ETH", wallet_registry.NEW_TOKEN)
 
 
 # ---------- Main loop ----------
@@ -153,55 +124,50 @@ async def monitor_new_tokens_eth(whales: Optional[List[str]] = None, poll_second
     poll_seconds default: 5 minutes.
     """
     # state: { wallet_address_lower: ["ETH", "USDC", ...] }
-    state: Dict[str, List[str]] = _load_json(STATE_FILE, {})
+    state = StateStore(STATE_NAME, legacy_json=STATE_LEGACY_FILE)
+
+    # explicit list, or the registry (re-read when it changes)
+    load_whales = (lambda: whales) if whales is not None else _load_whales
+    if not load_whales():
+        logging.warning("No ETH whales configured for new-token monitor yet; add some to the wallet registry.")
+
+    logging.info(f"Starting New-Token monitor for {len(load_whales())} whales...")
+    http_client.set_budget(ETHPLORER_HOST, ETHPLORER_RPS, ETHPLORER_CONCURRENCY)
+
+    async def check_whale(w: str):
+        w_norm = w.lower().strip()
+        if not w_norm.startswith("0x") or len(w_norm) != 42:
+            # skip non-ETH or malformed addresses
+            return False
+
+        symbols_current = await fetch_token_inventory(w_norm)
+        if not symbols_current:
+            # Skip if fetch failed; try next time
+            return None
+
+        symbols_prev = state.get(w_norm, [])
+        # new tokens = in current but not in prev
+        new_syms = [s for s in symbols_current if s not in symbols_prev]
+
+        if new_syms:
+            await _send_alert_new_token(w_norm, new_syms)
+            state.set(w_norm, symbols_current)
+        return bool(new_syms)
+
+    # each whale on its own interval learned from its activity, starting at
+    # poll_seconds; Ethplorer pacing is http_client's job (budget set above)
+    poller = poll_scheduler.AdaptivePoller(
+        "new-tokens", check_whale,
+        floor=POLL_FLOOR, ceiling=POLL_CEILING, initial=poll_seconds,
+        concurrency=ETHPLORER_CONCURRENCY, state_name=POLL_STATE_NAME,
+    )
+    def on_registry_change(op: str, wallet: Dict[str, Any]) -> None:
+        if wallet["list_name"] == wallet_registry.NEW_TOKEN:
+            poller.refresh_now()
 
     if whales is None:
-        whales = _load_whales(DEFAULT_WHALES_FILE)
-
-    if not whales:
-        logging.warning("No ETH whales configured for new-token monitor. Waiting...")
-        await asyncio.sleep(30)
-        return
-
-    logging.info(f"Starting New-Token monitor for {len(whales)} whales...")
-
-    async with aiohttp.ClientSession() as session:
-        while True:
-            cycle_start = time.time()
-            changed_count = 0
-
-            for w in whales:
-                w_norm = w.lower().strip()
-                if not w_norm.startswith("0x") or len(w_norm) != 42:
-                    # skip non-ETH or malformed addresses
-                    continue
-
-                symbols_current = await fetch_eth_tokens(session, w_norm)
-                if not symbols_current:
-                    # Skip if fetch failed; try next time
-                    await asyncio.sleep(0.5)
-                    continue
-
-                symbols_prev = state.get(w_norm, [])
-                # new tokens = in current but not in prev
-                new_syms = [s for s in symbols_current if s not in symbols_prev]
-
-                if new_syms:
-                    await _send_alert_new_token(w_norm, new_syms)
-                    state[w_norm] = symbols_current
-                    changed_count += 1
-
-                # be polite to Ethplorer
-                await asyncio.sleep(0.6)
-
-            # persist state if anything changed
-            if changed_count:
-                _save_json(STATE_FILE, state)
-
-            # sleep until next cycle (5 min by default)
-            elapsed = time.time() - cycle_start
-            sleep_for = max(poll_seconds - elapsed, 5)
-            await asyncio.sleep(sleep_for)
+        wallet_registry.on_change(on_registry_change)
+    await poller.run(load_whales, after_cycle=state.flush)
 
 
 # ---------- Public entry for main.py ----------
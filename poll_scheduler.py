@@ -0,0 +1,185 @@
+# poll_scheduler.py
+"""
+Shared polling loop for the wallet monitors.
+
+AdaptivePoller runs `worker(item)` for every item on a per-item interval
+learned from each wallet's own activity: hot wallets are polled near a
+floor, dormant ones back off exponentially to a ceiling. At most
+`concurrency` workers are in flight, and new items' first polls are
+spread over SPREAD of their interval instead of firing all at once, so
+upstream APIs see a steady trickle. Pacing against each API's actual
+limits is http_client's job (AIMD per provider). The scheduler only
+bounds the concurrency and shapes the load.
+"""
+import asyncio
+import heapq
+import inspect
+import itertools
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+# ===== Config =====
+DEFAULT_CONCURRENCY = 8
+SPREAD = 0.8           # fraction of the first interval used to stagger new items
+BACKOFF = 1.5          # quiet poll: interval *= BACKOFF
+SAMPLES_PER_GAP = 4    # active wallets are polled ~4x per typical gap between txs
+GAP_EWMA = 0.3         # weight of the newest gap in the learned average
+REFRESH_SECONDS = 60   # re-read the item list this often
+
+ItemSource = Callable[[], Union[Iterable[Any], Awaitable[Iterable[Any]]]]
+
+
+class _Slot:
+    __slots__ = ("item", "interval", "gap", "last_active", "seq")
+
+    def __init__(self, item: Any, interval: float, gap: Optional[float] = None,
+                 last_active: Optional[float] = None):
+        self.item = item
+        self.interval = interval
+        self.gap = gap
+        self.last_active = last_active
+        self.seq = -1   # heap entry currently scheduling this slot
+
+
+class AdaptivePoller:
+    """
+    Per-item polling on a heap keyed by next-due time.
+
+    The worker returns True if it saw new activity, False if nothing changed,
+    None if the fetch failed. Activity pulls the interval down towards a
+    quarter of the item's learned gap between activity (never below `floor`).
+    Every quiet poll multiplies it by BACKOFF up to `ceiling`, so dormant
+    wallets fade to the ceiling and active ones stay near the floor.
+    Learned intervals persist in a StateStore when `state_name` is given.
+    """
+
+    def __init__(self, name: str, worker: Callable[[Any], Awaitable[Optional[bool]]], *,
+                 floor: float, ceiling: float, initial: float,
+                 key: Callable[[Any], str] = str, concurrency: int = DEFAULT_CONCURRENCY,
+                 state_name: Optional[str] = None):
+        self.name = name
+        self.worker = worker
+        self.floor = floor
+        self.ceiling = ceiling
+        self.initial = min(max(initial, floor), ceiling)
+        self.key = key
+        self.concurrency = concurrency
+        self.slots: Dict[str, _Slot] = {}
+        self.heap: List[Tuple[float, int, str]] = []   # (due, seq, key)
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._next_refresh = 0.0
+        self.state = None
+        if state_name:
+            from state_store import StateStore  # only pollers that persist need it
+            self.state = StateStore(state_name)
+
+    # ---------- items ----------
+    def sync_items(self, items: Iterable[Any]) -> None:
+        """Add new items (spread over their first interval) and drop removed ones."""
+        now = time.time()
+        fresh: Dict[str, Any] = {self.key(it): it for it in items}
+        for k in [k for k in self.slots if k not in fresh]:
+            del self.slots[k]   # its heap entry goes stale and is skipped
+        new_keys = [k for k in fresh if k not in self.slots]
+        for i, k in enumerate(new_keys):
+            saved = self.state.get(k) if self.state is not None else None
+            if saved:
+                interval, gap, last_active = saved
+                slot = _Slot(fresh[k], min(max(interval, self.floor), self.ceiling), gap, last_active)
+            else:
+                slot = _Slot(fresh[k], self.initial)
+            self.slots[k] = slot
+            self._push(k, now + i * slot.interval * SPREAD / max(len(new_keys), 1))
+        for k, it in fresh.items():
+            self.slots[k].item = it   # pick up label/tier edits
+
+    def _push(self, key: str, due: float) -> None:
+        slot = self.slots[key]
+        slot.seq = next(self._seq)
+        heapq.heappush(self.heap, (due, slot.seq, key))
+        if self._wakeup is not None and self.heap[0][2] == key:
+            self._wakeup.set()   # new earliest deadline
+
+    def refresh_now(self) -> None:
+        """Re-read the item list on the next loop turn (e.g. a wallet was added)."""
+        self._next_refresh = 0.0
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def interval_for(self, key: str) -> Optional[float]:
+        slot = self.slots.get(key)
+        return slot.interval if slot else None
+
+    # ---------- learning ----------
+    def _update(self, key: str, active: Optional[bool], now: float) -> float:
+        s = self.slots[key]
+        if active:
+            if s.last_active is not None:
+                gap = now - s.last_active
+                s.gap = gap if s.gap is None else (1 - GAP_EWMA) * s.gap + GAP_EWMA * gap
+            s.last_active = now
+            target = s.gap / SAMPLES_PER_GAP if s.gap else self.floor
+            s.interval = min(max(target, self.floor), self.ceiling)
+        elif active is False:
+            s.interval = min(s.interval * BACKOFF, self.ceiling)
+        # None (fetch failed): retry on the same interval
+        if self.state is not None and active is not None:
+            self.state.set(key, [round(s.interval, 1), s.gap, s.last_active])
+        return s.interval
+
+    # ---------- loop ----------
+    async def _poll(self, key: str, sem: asyncio.Semaphore) -> None:
+        async with sem:
+            slot = self.slots.get(key)
+            if slot is None:
+                return
+            try:
+                active = await self.worker(slot.item)
+            except Exception as e:
+                logging.exception(f"[{self.name}] worker failed for {key}: {e}")
+                active = None
+        if key in self.slots:
+            now = time.time()
+            self._push(key, now + self._update(key, active, now))
+
+    async def run(self, load_items: ItemSource, after_cycle: Optional[Callable[[], Any]] = None) -> None:
+        sem = asyncio.Semaphore(self.concurrency)
+        tasks: set = set()
+        self._wakeup = asyncio.Event()
+        while True:
+            now = time.time()
+            if now >= self._next_refresh:
+                try:
+                    items = load_items()
+                    if inspect.isawaitable(items):
+                        items = await items
+                    self.sync_items(items or [])
+                    if after_cycle is not None:
+                        res = after_cycle()
+                        if inspect.isawaitable(res):
+                            await res
+                    if self.state is not None:
+                        self.state.flush()
+                except Exception as e:
+                    logging.exception(f"[{self.name}] refresh failed: {e}")
+                self._next_refresh = now + REFRESH_SECONDS
+                now = time.time()   # the refresh awaited; don't schedule against a stale clock
+
+            # start everything that is due (the semaphore bounds concurrency)
+            while self.heap and self.heap[0][0] <= now:
+                _, seq, key = heapq.heappop(self.heap)
+                slot = self.slots.get(key)
+                if slot is None or slot.seq != seq:
+                    continue   # removed or rescheduled since
+                task = asyncio.create_task(self._poll(key, sem))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            next_due = self.heap[0][0] if self.heap else self._next_refresh
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), max(0.0, min(next_due, self._next_refresh) - time.time()))
+            except asyncio.TimeoutError:
+                pass
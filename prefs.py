@@ -1,34 +1,100 @@
 # prefs.py
+"""
+Per-chat signal preferences (risk, n_safe, n_risky).
+
+One long-lived SQLite connection in WAL mode. The whole table is read into
+memory on first use, so `get` is a dict lookup and never touches the disk
+from an async handler. `set` updates memory immediately and marks the chat
+dirty. Dirty rows are written together, one upsert per row in a single
+executemany + commit, FLUSH_DELAY seconds later (or on `flush()`/`close()`).
+"""
+import asyncio
+import logging
 import sqlite3
+from typing import Dict, Optional, Set, Tuple
 
 DB = "prefs.db"
+DEFAULT: Tuple[str, int, int] = ("med", 3, 2)   # (risk, n_safe, n_risky)
+FIELDS = ("risk", "n_safe", "n_risky")
+FLUSH_DELAY = 1.0  # seconds of write-behind batching
+
+_con: Optional[sqlite3.Connection] = None
+_cache: Dict[int, Tuple[str, int, int]] = {}
+_dirty: Set[int] = set()
+_flush_handle: Optional[asyncio.TimerHandle] = None
+
+
+def _db() -> sqlite3.Connection:
+    global _con
+    if _con is None:
+        _con = sqlite3.connect(DB)
+        _con.execute("PRAGMA journal_mode=WAL")
+        _con.execute("PRAGMA synchronous=NORMAL")
+        _con.execute("""
+          CREATE TABLE IF NOT EXISTS prefs(
+            chat_id INTEGER PRIMARY KEY,
+            risk TEXT DEFAULT 'med',
+            n_safe INTEGER DEFAULT 3,
+            n_risky INTEGER DEFAULT 2
+          )
+        """)
+        _con.commit()
+        for chat_id, risk, n_safe, n_risky in _con.execute(
+            "SELECT chat_id, risk, n_safe, n_risky FROM prefs"
+        ):
+            _cache[chat_id] = (risk, n_safe, n_risky)
+    return _con
 
 def init():
-    con = sqlite3.connect(DB)
-    c = con.cursor()
-    c.execute("""
-      CREATE TABLE IF NOT EXISTS prefs(
-        chat_id INTEGER PRIMARY KEY,
-        risk TEXT DEFAULT 'med',
-        n_safe INTEGER DEFAULT 3,
-        n_risky INTEGER DEFAULT 2
-      )
-    """)
-    con.commit(); con.close()
+    _db()
 
 def get(chat_id):
-    con = sqlite3.connect(DB); c = con.cursor()
-    row = c.execute(
-        "SELECT risk, n_safe, n_risky FROM prefs WHERE chat_id=?",
-        (chat_id,)
-    ).fetchone()
-    con.close()
-    return row or ('med', 3, 2)
+    _db()
+    return _cache.get(chat_id, DEFAULT)
 
 def set(chat_id, **kw):
-    con = sqlite3.connect(DB); c = con.cursor()
-    c.execute("INSERT OR IGNORE INTO prefs(chat_id) VALUES(?)", (chat_id,))
-    if 'risk'   in kw: c.execute("UPDATE prefs SET risk=?   WHERE chat_id=?", (kw['risk'], chat_id))
-    if 'n_safe' in kw: c.execute("UPDATE prefs SET n_safe=? WHERE chat_id=?", (kw['n_safe'], chat_id))
-    if 'n_risky'in kw: c.execute("UPDATE prefs SET n_risky=?WHERE chat_id=?", (kw['n_risky'], chat_id))
-    con.commit(); con.close()
\ No newline at end of file
+    cur = dict(zip(FIELDS, get(chat_id)))
+    cur.update((k, v) for k, v in kw.items() if k in FIELDS)
+    _cache[chat_id] = (cur["risk"], cur["n_safe"], cur["n_risky"])
+    _dirty.add(chat_id)
+    _schedule_flush()
+
+def _schedule_flush() -> None:
+    global _flush_handle
+    if _flush_handle is not None:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        flush()  # no event loop (scripts, tests): write through
+        return
+    _flush_handle = loop.call_later(FLUSH_DELAY, flush)
+
+def flush() -> None:
+    """Write all dirty chats in one batch."""
+    global _flush_handle
+    if _flush_handle is not None:
+        _flush_handle.cancel()
+        _flush_handle = None
+    if not _dirty:
+        return
+    rows = [(cid, *_cache[cid]) for cid in _dirty]
+    try:
+        con = _db()
+        con.executemany("""
+          INSERT INTO prefs(chat_id, risk, n_safe, n_risky) VALUES(?,?,?,?)
+          ON CONFLICT(chat_id) DO UPDATE SET
+            risk=excluded.risk, n_safe=excluded.n_safe, n_risky=excluded.n_risky
+        """, rows)
+        con.commit()
+        _dirty.clear()
+    except sqlite3.Error as e:
+        logging.warning(f"[prefs] flush of {len(rows)} rows failed: {e}")
+
+def close() -> None:
+    global _con
+    flush()
+    if _con is not None:
+        _con.close()
+        _con = None
+        _cache.clear()
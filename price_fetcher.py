@@ -1,21 +1,21 @@
 # price_fetcher/price_fetcher.py
 
-import requests
+import http_client
 
-def get_top_50_crypto_prices():
+async def get_top_50_crypto_prices():
     url = "https://api.coingecko.com/api/v3/coins/markets"
     params = {
         "vs_currency": "usd",
         "order": "market_cap_desc",
         "per_page": 50,
         "page": 1,
-        "sparkline": False
+        "sparkline": "false"
     }
 
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
+        data = await http_client.get_json(url, params=params)
+        if not data:
+            return []
 
         result = []
         for coin in data:
@@ -32,4 +32,27 @@ def get_top_50_crypto_prices():
 
     except Exception as e:
         print("Error fetching crypto prices:", e)
-        return []
\ No newline at end of file
+        return []
+
+async def get_top_coin_ids(n=500):
+    """CoinGecko ids of the top `n` coins by market cap (250 per page)."""
+    url = "https://api.coingecko.com/api/v3/coins/markets"
+    per_page = min(250, n)  # must stay constant across pages
+    ids = []
+    page = 1
+    while len(ids) < n:
+        params = {
+            "vs_currency": "usd",
+            "order": "market_cap_desc",
+            "per_page": per_page,
+            "page": page,
+            "sparkline": "false"
+        }
+        data = await http_client.get_json(url, params=params)
+        if not data:
+            break
+        ids.extend(coin["id"] for coin in data)
+        if len(data) < per_page:
+            break
+        page += 1
+    return ids[:n]
@@ -0,0 +1,136 @@
+# price_oracle.py
+"""
+In-process USD price oracle shared by every whale monitor.
+
+One background task refreshes all tracked assets in a single CoinGecko
+call. Reads are plain dict lookups and every quote carries the time it was
+fetched, so consumers can refuse to value transfers with a stale price
+instead of silently using a number from hours ago.
+"""
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import http_client
+
+# ===== Config =====
+API_URL = "https://api.coingecko.com/api/v3/simple/price"
+REFRESH_SECONDS = 60
+MAX_PRICE_AGE = 600  # seconds; older quotes are treated as unknown
+
+# asset symbol -> CoinGecko id
+ASSETS: Dict[str, str] = {
+    "BTC": "bitcoin",
+    "ETH": "ethereum",
+    "XRP": "ripple",
+}
+
+class Quote(NamedTuple):
+    price: float
+    updated_at: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.updated_at
+
+Subscriber = Callable[[str, Quote], None]
+
+_quotes: Dict[str, Quote] = {}
+_subscribers: List[Subscriber] = []
+_task: Optional[asyncio.Task] = None
+_inflight: Optional[asyncio.Task] = None
+
+
+# ===== Registry =====
+def track(asset: str, coingecko_id: str) -> None:
+    """Add (or remap) an asset; it is picked up on the next refresh."""
+    ASSETS[asset.upper()] = coingecko_id
+
+def subscribe(fn: Subscriber) -> None:
+    """fn(asset, quote) is called after every refresh for each updated asset."""
+    if fn not in _subscribers:
+        _subscribers.append(fn)
+
+def unsubscribe(fn: Subscriber) -> None:
+    if fn in _subscribers:
+        _subscribers.remove(fn)
+
+
+# ===== Reads =====
+def get_price(asset: str) -> Optional[Quote]:
+    """Latest quote for `asset` (any age), or None if never fetched."""
+    return _quotes.get(asset.upper())
+
+def get_usd(asset: str, max_age: float = MAX_PRICE_AGE) -> Optional[float]:
+    """Latest USD price if it is no older than `max_age` seconds, else None."""
+    q = _quotes.get(asset.upper())
+    if q is None or q.age > max_age:
+        return None
+    return q.price
+
+def to_usd(asset: str, amount: float, max_age: float = MAX_PRICE_AGE) -> Optional[float]:
+    price = get_usd(asset, max_age)
+    return None if price is None else amount * price
+
+
+# ===== Refresh =====
+def set_price(asset: str, price: float, updated_at: Optional[float] = None) -> None:
+    """Publish a price (used by refresh and by anything that already has one)."""
+    asset = asset.upper()
+    q = Quote(float(price), updated_at or time.time())
+    _quotes[asset] = q
+    for fn in list(_subscribers):
+        try:
+            fn(asset, q)
+        except Exception as e:
+            logging.exception(f"[oracle] subscriber failed for {asset}: {e}")
+
+async def _refresh() -> None:
+    by_id: Dict[str, List[str]] = {}
+    for asset, cg_id in ASSETS.items():
+        by_id.setdefault(cg_id, []).append(asset)
+    if not by_id:
+        return
+    data = await http_client.get_json(API_URL, params={"ids": ",".join(by_id), "vs_currencies": "usd"})
+    if not data:
+        logging.warning("[oracle] price refresh failed; keeping last quotes")
+        return
+    now = time.time()
+    for cg_id, assets in by_id.items():
+        usd = (data.get(cg_id) or {}).get("usd")
+        if usd is None:
+            continue
+        for asset in assets:
+            set_price(asset, usd, now)
+
+async def refresh() -> None:
+    """Refresh all tracked assets; concurrent callers share one request."""
+    global _inflight
+    if _inflight is None or _inflight.done():
+        _inflight = asyncio.create_task(_refresh())
+    await asyncio.shield(_inflight)
+
+async def _run(interval: float) -> None:
+    while True:
+        try:
+            await refresh()
+        except Exception as e:
+            logging.exception(f"[oracle] refresh loop error: {e}")
+        await asyncio.sleep(interval)
+
+def ensure_started(interval: float = REFRESH_SECONDS) -> asyncio.Task:
+    """Start the background refresh loop once per process."""
+    global _task
+    if _task is None or _task.done():
+        _task = asyncio.create_task(_run(interval))
+    return _task
+
+async def wait_for(asset: str) -> Optional[float]:
+    """Make sure the oracle runs and return a fresh price for `asset` if possible."""
+    ensure_started()
+    price = get_usd(asset)
+    if price is None:
+        await refresh()
+        price = get_usd(asset)
+    return price
@@ -0,0 +1,448 @@
+# replay.py
+"""
+Record-and-replay harness for the monitors, on a virtual clock.
+
+Capture (live APIs, real clock; alerts go to a stub bot, not Telegram):
+
+    python -m replay record --out capture.jsonl --hours 24
+
+  or run the bot itself with HTTP_RECORD=capture.jsonl. http_client then
+  appends every get_json result (CoinGecko, blockchain.info, Blockchair,
+  mempool.space, Ethplorer, ...) and every mempool WebSocket message.
+
+Replay (offline):
+
+    python -m replay run capture.jsonl [--json report.json] [--tiers tiers.json]
+
+  feeds the capture back through top_holder_tracker, btc_whale_tracker
+  and new_token_monitor. Each request gets the latest response recorded
+  at or before the virtual "now", after the recorded latency. Stream
+  messages arrive at their recorded times. Every alert goes through
+  alert_dispatcher to a stub bot and is also routed through TierRouter
+  (on a second stub bot) with the chain and USD value the monitor
+  enqueued it with, so min_usd_buy gating applies as it would live.
+
+The clock: time.time/time.monotonic are swapped for a VirtualClock, and
+the event loop's selector advances that clock instead of blocking
+whenever nothing is ready. Sleeps, poll intervals, TTLs, cooldowns and
+Telegram pacing therefore all run at full logical fidelity, and a day of
+traffic takes only as long as the CPU work in it.
+
+The report gives alerts produced (by kind), detection latency and
+throughput. Detection latency runs from when the evidence was first
+visible in provider data to when the alert was enqueued. The evidence
+time is the earliest recorded response that contains the alert's tx
+hash, else the capture time of the response the alert was built from.
+Everything runs in a scratch directory, so no live state is touched.
+"""
+import argparse
+import asyncio
+import bisect
+import contextvars
+import importlib.util
+import json
+import logging
+import os
+import re
+import selectors
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+GROUP_ID = -1_000_000_000_001   # fake alert chat
+IDLE_WAIT = 0.01                  # real seconds to wait when nothing at all is scheduled
+MIN_STEP = 1e-6                   # smallest clock step; float spacing at epoch scale is ~2e-7
+
+_TXID_RE = re.compile(r"\b[0-9a-fA-F]{64}\b")
+_ADDR_URLS = {
+    "top_holders": re.compile(r"blockchain\.info/rawaddr/([^/?]+)"),
+    "new_tokens": re.compile(r"api\.ethplorer\.io/getAddressInfo/([^/?]+)"),
+}
+
+# capture time of the response the current task last received
+_evidence: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("replay_evidence", default=None)
+
+
+# ---------- Virtual clock ----------
+class VirtualClock:
+    """Stands in for time.time and time.monotonic while installed."""
+
+    def __init__(self, start: float):
+        self.now = start
+        self._saved: Optional[Tuple[Callable[[], float], Callable[[], float]]] = None
+
+    def time(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+    def install(self) -> None:
+        self._saved = (time.time, time.monotonic)
+        time.time = self.time
+        time.monotonic = self.time
+
+    def uninstall(self) -> None:
+        if self._saved is not None:
+            time.time, time.monotonic = self._saved
+            self._saved = None
+
+
+class _AdvancingSelector(selectors.DefaultSelector):
+    """Never blocks on a timeout: moves the virtual clock to the next timer instead."""
+
+    def __init__(self, clock: VirtualClock):
+        super().__init__()
+        self.clock = clock
+
+    def select(self, timeout: Optional[float] = None):
+        events = super().select(0)
+        if events:
+            return events
+        if timeout is None:
+            return super().select(IDLE_WAIT)  # only threads/IO can wake us
+        # also step on timeout == 0: a timer due "now" can round to just after it
+        self.clock.advance(max(timeout, MIN_STEP))
+        return []
+
+def virtual_loop(clock: VirtualClock) -> asyncio.AbstractEventLoop:
+    return asyncio.SelectorEventLoop(_AdvancingSelector(clock))
+
+
+# ---------- Recording ----------
+def _key(url: str, params: Optional[Dict[str, Any]]) -> str:
+    return url + "?" + json.dumps(params or {}, sort_keys=True)
+
+class Recording:
+    def __init__(self, path: str):
+        import http_client
+        self.http: Dict[str, List[Tuple[float, float, Any]]] = defaultdict(list)   # key -> [(t, dt, data)]
+        self.by_url: Dict[str, List[Tuple[float, float, Any]]] = defaultdict(list)
+        self.stream: List[Tuple[float, str, Any]] = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    e = json.loads(line)
+                except ValueError:
+                    continue  # torn tail of a live capture
+                if "ws" in e:
+                    self.stream.append((e["t"], e["ws"], e["data"]))
+                elif "url" in e:
+                    rec = (e["t"], e.get("dt") or 0.0, e.get("data"))
+                    self.http[_key(e["url"], http_client.public_params(e.get("params")))].append(rec)
+                    self.by_url[e["url"]].append(rec)
+        for recs in list(self.http.values()) + list(self.by_url.values()):
+            recs.sort(key=lambda r: r[0])
+        self.stream.sort(key=lambda r: r[0])
+        self._times = {k: [r[0] for r in v] for k, v in self.http.items()}
+        self._url_times = {k: [r[0] for r in v] for k, v in self.by_url.items()}
+        self._first_seen: Optional[Dict[str, float]] = None
+        times = [r[0] for recs in self.http.values() for r in recs[:1]] + [s[0] for s in self.stream[:1]]
+        ends = [recs[-1][0] for recs in self.http.values()] + [s[0] for s in self.stream[-1:]]
+        self.start = min(times) if times else time.time()
+        self.end = max(ends) if ends else self.start
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self.http.values()) + len(self.stream)
+
+    def at(self, url: str, params: Optional[Dict[str, Any]], now: float) -> Optional[Tuple[float, float, Any]]:
+        """Latest response recorded at or before `now` (exact params, else same URL)."""
+        key = _key(url, params)
+        recs, times = self.http.get(key), self._times.get(key)
+        if recs is None:
+            recs, times = self.by_url.get(url), self._url_times.get(url)
+        if not recs:
+            return None
+        i = bisect.bisect_right(times, now) - 1
+        return recs[i] if i >= 0 else None
+
+    def addresses(self, kind: str) -> List[str]:
+        rx = _ADDR_URLS[kind]
+        seen: Dict[str, None] = {}
+        for url in self.by_url:
+            m = rx.search(url)
+            if m:
+                seen.setdefault(m.group(1))
+        return list(seen)
+
+    def first_seen(self, token: str) -> Optional[float]:
+        """Earliest capture time of any response/stream message containing `token`."""
+        if self._first_seen is None:
+            fs: Dict[str, float] = {}
+            rows = [(t, d) for recs in self.http.values() for t, _, d in recs] + [(t, d) for t, _, d in self.stream]
+            for t, data in rows:
+                for tok in _TXID_RE.findall(json.dumps(data)):
+                    tok = tok.lower()
+                    if t < fs.get(tok, float("inf")):
+                        fs[tok] = t
+            self._first_seen = fs
+        return self._first_seen.get(token.lower())
+
+
+# ---------- Stubs ----------
+class StubBot:
+    """Collects what would have been sent to Telegram."""
+
+    def __init__(self):
+        self.messages: List[Tuple[float, int]] = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.messages.append((time.time(), chat_id))
+
+def _load_tier_router():
+    # router.py is shadowed by the router/ package on sys.path
+    spec = importlib.util.spec_from_file_location("tier_router_replay", os.path.join(ROOT, "router.py"))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+def _kind(text: str) -> str:
+    first = text.strip().splitlines()[0] if text.strip() else ""
+    return re.sub(r"<[^>]+>|[*_`]", "", first).strip()[:60] or "alert"
+
+
+# ---------- Replay ----------
+class Replay:
+    def __init__(self, rec: Recording, clock: VirtualClock):
+        self.rec = rec
+        self.clock = clock
+        self.bot = StubBot()          # alert_dispatcher's sends
+        self.router_bot = StubBot()   # TierRouter's fan-out
+        self.served = 0
+        self.misses = 0
+        self.alerts: List[Dict[str, Any]] = []
+        self.routed_chats = 0
+        self.unrouted = 0             # alerts enqueued without a chain
+        self._router = None
+        self._tasks: set = set()
+
+    # http_client.get_json stand-in
+    async def get_json(self, url: str, params: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Optional[Any]:
+        import http_client
+        hit = self.rec.at(url, http_client.public_params(params), self.clock.now)
+        if hit is None:
+            self.misses += 1
+            return None
+        t, dt, data = hit
+        if dt:
+            await asyncio.sleep(dt)
+        self.served += 1
+        _evidence.set(t)
+        return json.loads(json.dumps(data))  # callers may mutate what they get
+
+    async def stream(self, url: str = "") -> None:
+        import btc_whale_tracker
+        for t, _, payload in self.rec.stream:
+            if t > self.clock.now:
+                await asyncio.sleep(t - self.clock.now)
+            _evidence.set(t)
+            btc_whale_tracker.on_stream_payload(payload)
+        await asyncio.Event().wait()  # stream "stays connected" after the capture ends
+
+    def on_alert(self, text: str, chain: Optional[str], usd: Optional[float]) -> None:
+        now = self.clock.now
+        evidence = _evidence.get()
+        for txid in _TXID_RE.findall(text):
+            seen = self.rec.first_seen(txid)
+            if seen is not None:
+                evidence = seen if evidence is None else min(evidence, seen)
+        self.alerts.append({
+            "t": now, "kind": _kind(text), "chain": chain, "usd": usd,
+            "latency": max(0.0, now - evidence) if evidence is not None else None,
+        })
+        if self._router is None:
+            return
+        if not chain:
+            self.unrouted += 1
+            return
+        task = asyncio.ensure_future(self._route(text, chain, usd))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _route(self, text: str, chain: str, usd: Optional[float]) -> None:
+        # unknown value -> 0, as TierRouter does without a price: only tiers with no USD floor
+        outcomes = await self._router.send(chain=chain, est_usd=usd or 0.0, text=text)
+        self.routed_chats += sum(1 for o in outcomes if o.ok)
+
+    async def run(self, monitors: List[str], route: bool) -> None:
+        import alert_dispatcher
+        import btc_whale_tracker
+        import http_client
+        import new_token_monitor
+        import top_holder_tracker
+        import wallet_registry
+
+        http_client.get_json = self.get_json
+        btc_whale_tracker.stream_mempool = self.stream
+        btc_whale_tracker.STREAM_ENABLED = bool(self.rec.stream)
+        enqueue = alert_dispatcher.enqueue
+
+        def tap(bot, chat_id, text, *args, chain=None, usd=None, **kwargs):
+            self.on_alert(text, chain, usd)
+            return enqueue(bot, chat_id, text, *args, chain=chain, usd=usd, **kwargs)
+        alert_dispatcher.enqueue = tap
+        if route:
+            self._router = _load_tier_router().TierRouter(self.router_bot)
+
+        jobs = []
+        if "top_holders" in monitors and self.rec.addresses("top_holders"):
+            for addr in self.rec.addresses("top_holders"):
+                wallet_registry.add("BTC", addr, list_name=wallet_registry.TOP_HOLDERS)
+            jobs.append(top_holder_tracker.start_top_holders_monitor(self.bot, GROUP_ID))
+        if "btc_whales" in monitors and (self.rec.stream or any("mempool/recent" in u for u in self.rec.by_url)):
+            btc_whale_tracker.bot, btc_whale_tracker.GROUP_ID = self.bot, GROUP_ID
+            jobs.append(btc_whale_tracker.monitor_general_btc_whales())
+        if "new_tokens" in monitors and self.rec.addresses("new_tokens"):
+            jobs.append(new_token_monitor.start_new_token_monitor(
+                self.bot, GROUP_ID, whales=self.rec.addresses("new_tokens")))
+
+        tasks = [asyncio.ensure_future(j) for j in jobs]
+        await asyncio.sleep(max(0.0, self.rec.end - self.clock.now) + 1)
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await alert_dispatcher.close()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"p50": None, "p90": None, "p99": None, "max": None}
+    values = sorted(values)
+    pick = lambda q: values[min(len(values) - 1, int(q * len(values)))]
+    return {"p50": pick(0.5), "p90": pick(0.9), "p99": pick(0.99), "max": values[-1]}
+
+def run_replay(path: str, monitors: List[str], tiers: Optional[str] = None, route: bool = True) -> Dict[str, Any]:
+    path = os.path.abspath(path)
+    tiers = os.path.abspath(tiers) if tiers else os.path.join(ROOT, "tiers.json")
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="replay-") as scratch:
+        os.chdir(scratch)
+        if os.path.exists(tiers):
+            shutil.copy(tiers, "tiers.json")
+        rec = Recording(path)
+        clock = VirtualClock(rec.start)
+        clock.install()
+        loop = virtual_loop(clock)
+        asyncio.set_event_loop(loop)
+        replay = Replay(rec, clock)
+        wall0 = time.perf_counter()
+        try:
+            loop.run_until_complete(replay.run(monitors, route))
+        finally:
+            wall = time.perf_counter() - wall0
+            clock.uninstall()
+            for mod in ("whale_log", "state_store", "wallet_registry", "exchange_labels"):
+                if mod in sys.modules:
+                    getattr(sys.modules[mod], "close_all" if mod == "state_store" else "close")()
+            loop.close()
+            asyncio.set_event_loop(None)
+            os.chdir(cwd)
+
+    span = max(rec.end - rec.start, 1e-9)
+    latencies = [a["latency"] for a in replay.alerts if a["latency"] is not None]
+    return {
+        "capture": path,
+        "records": len(rec),
+        "monitors": monitors,
+        "virtual_seconds": round(span, 1),
+        "wall_seconds": round(wall, 3),
+        "speedup": round(span / wall, 1) if wall else None,
+        "http_served": replay.served,
+        "http_misses": replay.misses,
+        "alerts": len(replay.alerts),
+        "alerts_by_kind": dict(Counter(a["kind"] for a in replay.alerts).most_common()),
+        "dispatcher_messages": len(replay.bot.messages),
+        "router_messages": len(replay.router_bot.messages),
+        "routed_chats": replay.routed_chats,
+        "unrouted_alerts": replay.unrouted,
+        "detection_latency_s": {k: (round(v, 2) if v is not None else None)
+                                for k, v in _percentiles(latencies).items()},
+        "mean_latency_s": round(statistics.fmean(latencies), 2) if latencies else None,
+        "throughput": {
+            "alerts_per_virtual_hour": round(len(replay.alerts) / span * 3600, 2),
+            "alerts_per_wall_second": round(len(replay.alerts) / wall, 2) if wall else None,
+            "responses_per_wall_second": round(replay.served / wall, 1) if wall else None,
+        },
+    }
+
+
+# ---------- Capture ----------
+async def _record(out: str, hours: float, monitors: List[str]) -> None:
+    import btc_whale_tracker
+    import http_client
+    import new_token_monitor
+    import top_holder_tracker
+
+    http_client.start_recording(out)
+    bot = StubBot()
+    jobs = []
+    if "top_holders" in monitors:
+        jobs.append(top_holder_tracker.start_top_holders_monitor(bot, GROUP_ID))
+    if "btc_whales" in monitors:
+        btc_whale_tracker.bot, btc_whale_tracker.GROUP_ID = bot, GROUP_ID
+        jobs.append(btc_whale_tracker.monitor_general_btc_whales())
+    if "new_tokens" in monitors:
+        jobs.append(new_token_monitor.start_new_token_monitor(bot, GROUP_ID))
+    tasks = [asyncio.ensure_future(j) for j in jobs]
+    try:
+        await asyncio.sleep(hours * 3600)
+    finally:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await http_client.close()
+
+
+MONITORS = ["top_holders", "btc_whales", "new_tokens"]
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("record", help="capture live provider responses")
+    r.add_argument("--out", required=True)
+    r.add_argument("--hours", type=float, default=24.0)
+    r.add_argument("--monitors", default=",".join(MONITORS))
+    p = sub.add_parser("run", help="replay a capture on the virtual clock")
+    p.add_argument("capture")
+    p.add_argument("--monitors", default=",".join(MONITORS))
+    p.add_argument("--tiers", default=None, help="routing config for TierRouter (default: tiers.json next to replay.py)")
+    p.add_argument("--no-route", action="store_true", help="skip TierRouter")
+    p.add_argument("--json", metavar="PATH", help="write the report as JSON ('-' for stdout)")
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    monitors = [m for m in args.monitors.split(",") if m in MONITORS]
+    if args.cmd == "record":
+        asyncio.run(_record(args.out, args.hours, monitors))
+        return
+
+    report = run_replay(args.capture, monitors, tiers=args.tiers, route=not args.no_route)
+    if args.json:
+        text = json.dumps(report, indent=2)
+        if args.json == "-":
+            print(text)
+            return
+        with open(args.json, "w") as f:
+            f.write(text + "\n")
+    lat = report["detection_latency_s"]
+    print(f"replayed {report['records']} records: {report['virtual_seconds']:.0f}s of traffic "
+          f"in {report['wall_seconds']:.2f}s ({report['speedup']}x)")
+    print(f"alerts: {report['alerts']}  dispatcher messages: {report['dispatcher_messages']}  "
+          f"router messages: {report['router_messages']}  routed chats: {report['routed_chats']}"
+          + (f"  unrouted: {report['unrouted_alerts']}" if report["unrouted_alerts"] else ""))
+    for kind, n in report["alerts_by_kind"].items():
+        print(f"  {n:6d}  {kind}")
+    print(f"detection latency (s): p50={lat['p50']} p90={lat['p90']} p99={lat['p99']} max={lat['max']}")
+    print(f"throughput: {report['throughput']}")
+
+if __name__ == "__main__":
+    main()
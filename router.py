@@ -2,25 +2,89 @@
 # Tier-aware router for sending alerts to the right chats with gating
 
 from __future__ import annotations
-import json
+import asyncio
 import time
-from pathlib import Path
-from typing import Dict, Any, Optional
+from bisect import bisect_right
+from typing import Dict, Any, List, Optional, Tuple
 from aiogram import Router, types
 from aiogram.filters import Command
 from smart_signals import format_top_cryptos
+import price_oracle
+import telegram_sender
+from telegram_sender import SendOutcome
+from utils import tier_registry
 
 router = Router()
 
 @router.message(Command("topcoins"))
 async def top_coins_handler(message: types.Message):
     try:
-        text = format_top_cryptos()
+        text = await format_top_cryptos()
         await message.answer(text, parse_mode="Markdown")
     except Exception as e:
         await message.answer(f"⚠️ Error fetching top coins: {e}")
 
-TIERS_FILE = Path("tiers.json")
+class _Lane:
+    """Chats eligible for one chain, sorted by min_usd_buy for bisecting."""
+
+    def __init__(self, entries: List[Tuple[float, int, int]]):
+        entries = sorted(entries)                  # (min_usd, delay_seconds, chat_id)
+        self.mins = [e[0] for e in entries]
+        self.targets = [(e[1], e[2]) for e in entries]  # (delay_seconds, chat_id)
+
+    def upto(self, est_usd: Optional[float]) -> List[Tuple[int, int]]:
+        if est_usd is None:
+            return self.targets
+        return self.targets[:bisect_right(self.mins, est_usd)]
+
+class RoutingIndex:
+    """
+    tiers.json compiled for routing: per chain, the chats allowed to receive
+    it sorted by min_usd_buy. Recipients for an alert are one dict lookup
+    plus one bisect, however many groups are configured.
+    """
+
+    def __init__(self, cfg: Dict[str, Any]):
+        tiers = cfg.get("tiers") or cfg.get("TIERS") or {}  # support both casings
+        per_chain: Dict[str, List[Tuple[float, int, int]]] = {}
+        any_chain: List[Tuple[float, int, int]] = []       # tiers without a chain list
+        every: List[Tuple[float, int, int]] = []
+        for gid_str, tier_name in (cfg.get("groups") or {}).items():
+            try:
+                chat_id = int(gid_str)
+            except ValueError:
+                continue
+            rules = tiers.get(tier_name or "")
+            if not rules:
+                continue
+            entry = (float(rules.get("min_usd_buy", 0)), int(rules.get("delay_seconds", 0)), chat_id)
+            every.append(entry)
+            chains = {c.lower() for c in rules.get("chains") or []}
+            if not chains:
+                any_chain.append(entry)
+            for c in chains:
+                per_chain.setdefault(c, []).append(entry)
+
+        self.lanes = {c: _Lane(v + any_chain) for c, v in per_chain.items()}
+        self.any_chain = _Lane(any_chain)
+        self.every = _Lane(every)
+
+    def recipients(self, chain: str, est_usd: Optional[float]) -> List[Tuple[int, int]]:
+        """[(delay_seconds, chat_id), ...] passing chain and min-USD gating."""
+        if not chain:
+            return self.every.upto(est_usd)
+        return self.lanes.get(chain, self.any_chain).upto(est_usd)
+
+# Compiled index shared by all TierRouters: (registry version, index).
+# Rebuilt and swapped in one assignment when tiers.json changes.
+_compiled: Tuple[int, Optional[RoutingIndex]] = (-1, None)
+
+def routing_index() -> RoutingIndex:
+    global _compiled
+    version = tier_registry.routing_version()
+    if _compiled[0] != version or _compiled[1] is None:
+        _compiled = (version, RoutingIndex(tier_registry.routing()))
+    return _compiled[1]
 
 class TierRouter:
     """
@@ -33,40 +97,18 @@ class TierRouter:
 
     def __init__(self, bot):
         self.bot = bot
-        self.cfg: Dict[str, Any] = {}
         self.last_sent: Dict[int, float] = {}  # chat_id -> last send timestamp (seconds)
-        self.reload()
 
     # ---------- config ----------
+    @property
+    def cfg(self) -> Dict[str, Any]:
+        # Shared registry: in memory, re-read only when tiers.json changes
+        return tier_registry.routing()
+
     def reload(self) -> None:
-        if TIERS_FILE.exists():
-            self.cfg = json.loads(TIERS_FILE.read_text())
-        else:
-            # Minimal safe default if file missing
-            self.cfg = {
-                "DEFAULT_GROUP_ID": None,
-                "tiers": {
-                    "free":      {"wallet_limit": 10,  "chains": ["eth"],               "min_usd_buy": 50000, "delay_seconds": 1800},
-                    "standard":  {"wallet_limit": 25,  "chains": ["eth"],               "min_usd_buy": 25000, "delay_seconds": 900},
-                    "alpha":     {"wallet_limit": 75,  "chains": ["eth","btc","xrp"],   "min_usd_buy": 10000, "delay_seconds": 60},
-                    "godmode":   {"wallet_limit": 200, "chains": ["eth","btc","xrp"],   "min_usd_buy": 0,     "delay_seconds": 0},
-                },
-                "users": {},
-                "groups": {}
-            }
+        tier_registry.reload_routing()
 
     # ---------- helpers ----------
-    def _tier_for_chat(self, chat_id: int) -> Optional[str]:
-        groups: Dict[str, str] = self.cfg.get("groups", {})
-        # JSON keys are strings; normalize
-        return groups.get(str(chat_id))
-
-    def _rules_for_tier(self, tier: str) -> Optional[Dict[str, Any]]:
-        tiers = self.cfg.get("tiers") or self.cfg.get("TIERS")  # support both casings
-        if not tiers:
-            return None
-        return tiers.get(tier)
-
     def _cooldown_ok(self, chat_id: int, delay_seconds: int) -> bool:
         if delay_seconds <= 0:
             return True
@@ -78,61 +120,60 @@ class TierRouter:
         self.last_sent[chat_id] = time.time()
 
     # ---------- public API ----------
-    async def send(self, *, chain: str, est_usd: float, text: str) -> None:
+    async def send(self, *, chain: str, est_usd: Optional[float] = None, text: str,
+                   amount: Optional[float] = None) -> List[SendOutcome]:
         """
-        Route one alert to all eligible group chats.
+        Route one alert to all eligible group chats, concurrently and within
+        Telegram's rate limits (see telegram_sender). Chats with the shortest
+        delay_seconds (godmode) are queued first.
         Fallback to DEFAULT_GROUP_ID if no group rule matches.
+        Pass `amount` (in the chain's native asset) instead of `est_usd` to
+        value the alert at the live oracle price.
+        Returns one SendOutcome per attempted chat.
         """
         chain = (chain or "").lower()
-        sent_any = False
+        if est_usd is None and amount is not None:
+            # No fresh price -> value at 0 so only tiers without a USD floor match
+            est_usd = price_oracle.to_usd(chain, amount) or 0.0
 
-        groups_map: Dict[str, str] = self.cfg.get("groups", {})
-        # Iterate over configured groups and apply gating per group
-        for gid_str, tier_name in groups_map.items():
-            try:
-                chat_id = int(gid_str)
-            except ValueError:
-                continue
-
-            rules = self._rules_for_tier(tier_name or "")
-            if not rules:
-                continue
+        # Chain + min-USD gating via the compiled index; cooldown per chat
+        targets = [
+            (delay, chat_id)
+            for delay, chat_id in routing_index().recipients(chain, est_usd)
+            if self._cooldown_ok(chat_id, delay)
+        ]
 
-            # Chain gating
-            if chain and rules.get("chains") and chain not in [c.lower() for c in rules["chains"]]:
-                continue
-
-            # Min USD gating
-            min_usd = float(rules.get("min_usd_buy", 0))
-            if est_usd is not None and est_usd < min_usd:
-                continue
-
-            # Cooldown gating
-            delay = int(rules.get("delay_seconds", 0))
-            if not self._cooldown_ok(chat_id, delay):
-                continue
-
-            # Send
-            try:
-                await self.bot.send_message(chat_id, text)
-                self._mark_sent(chat_id)
-                sent_any = True
-            except Exception as e:
-                # Don’t crash routing; just keep going
-                print(f"[router] send error to {chat_id}: {e}")
+        outcomes = await self._fan_out([chat_id for _, chat_id in sorted(targets)], text)
 
         # Fallback if nothing matched/sent
-        if not sent_any:
+        if not any(o.ok for o in outcomes):
             default_gid = self.cfg.get("DEFAULT_GROUP_ID")
             if default_gid:
-                try:
-                    await self.bot.send_message(int(default_gid), text)
-                except Exception as e:
-                    print(f"[router] fallback send error to {default_gid}: {e}")
+                outcomes.append(await telegram_sender.send_message(self.bot, int(default_gid), text))
+
+        return outcomes
+
+    async def _fan_out(self, chat_ids: List[int], text: str) -> List[SendOutcome]:
+        # Reserve the cooldown slot up front so an alert arriving mid-fan-out
+        # can't slip through; give it back if the send fails.
+        previous = {cid: self.last_sent.get(cid) for cid in chat_ids}
+        for cid in chat_ids:
+            self._mark_sent(cid)
+
+        outcomes = await asyncio.gather(
+            *[telegram_sender.send_message(self.bot, cid, text) for cid in chat_ids]
+        )
+        for o in outcomes:
+            if not o.ok:
+                if previous[o.chat_id] is None:
+                    self.last_sent.pop(o.chat_id, None)
+                else:
+                    self.last_sent[o.chat_id] = previous[o.chat_id]
+        return list(outcomes)
 
     # Backward compatible name if you wired route_alert earlier
-    async def route_alert(self, *, chain: str, usd_value: float, text: str) -> None:
-        await self.send(chain=chain, est_usd=usd_value, text=text)
+    async def route_alert(self, *, chain: str, usd_value: float, text: str) -> List[SendOutcome]:
+        return await self.send(chain=chain, est_usd=usd_value, text=text)
         from aiogram import Router
 
 command_router = Router()
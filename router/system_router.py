@@ -6,6 +6,7 @@ from commands.alert_router import alert_router
 from commands.signal_router import signal_router
 from commands.hedge_router import hedge_router
 from commands.util_router import util_router
+from commands.stats_router import stats_router
 from router.tier_router import tier_router
 from commands.debug_admin import debug_router
 from commands.catchall_router import catchall_router  # keep last
@@ -23,6 +24,7 @@ system_router.include_router(alert_router)
 system_router.include_router(signal_router)
 system_router.include_router(hedge_router)
 system_router.include_router(util_router)
+system_router.include_router(stats_router)
 system_router.include_router(tier_router)
 system_router.include_router(debug_router)
 
@@ -1,8 +1,15 @@
-import aiohttp
 import asyncio
+import logging
 import math
+import os
+import time
 from datetime import datetime, timezone
-from price_fetcher import get_top_50_crypto_prices
+
+import candle_store
+import http_client
+import market_snapshot
+from indicators import IndicatorEngine
+from price_fetcher import get_top_coin_ids
 # Coins to evaluate (CoinGecko IDs)
 COINS = [
     "bitcoin", "ethereum", "ripple", "solana", "cardano", "dogecoin",
@@ -11,12 +18,33 @@ COINS = [
 ]
 
 API_BASE = "https://api.coingecko.com/api/v3"
-def format_top_cryptos():
-    coins = get_top_50_crypto_prices()
+# Set e.g. SIGNAL_UNIVERSE_SIZE=500 to pick from the top-N by market cap
+# instead of COINS. Its candles are kept fresh by a background round-robin
+# sync (see _universe_sync_loop); scoring only reads candle_store.
+UNIVERSE_SIZE = int(os.getenv("SIGNAL_UNIVERSE_SIZE", "0"))
+UNIVERSE_BARS = 120      # bars per coin fed to the batch scorer (EMA50 window)
+UNIVERSE_TTL = 6 * 3600  # re-read the top-N ids this often
+UNIVERSE_RETRY = 300     # after a failed top-N fetch
+UNIVERSE_SYNC_GAP = 2.0  # seconds between background candle fetches (half of CoinGecko's 1 rps cap)
+SYNC_MIN_SECONDS = 300   # serve a coin from disk if synced more recently than this
+FULL_FETCH_DAYS = 2      # initial history, and fallback after a long gap
+# /market_chart/range returns 5-minute points for spans under a day and
+# hourly ones above; delta syncs always ask for a bit more than a day so
+# their bars sample the same points as a full fetch.
+RANGE_MIN_MS = (86400 + 3600) * 1000
+# Rendered /topcoins text, keyed by the snapshot it was built from
+_top_text_cache = {"fetched_at": None, "text": ""}
+
+async def format_top_cryptos():
+    snap = await market_snapshot.get_snapshot()
+    coins = snap.coins
 
     if not coins:
         return "⚠️ Unable to fetch data at this time."
 
+    if _top_text_cache["fetched_at"] == snap.fetched_at:
+        return _top_text_cache["text"]
+
     message = "📊 *Top 10 by Market Cap (Live)*\n\n"
     for i, coin in enumerate(coins[:10], start=1):  # Limit to top 10
         name = coin["name"]
@@ -28,6 +56,8 @@ def format_top_cryptos():
 
         message += f"{i}. *{name}* ({symbol})\nPrice: {price}\n24h Change: {change_text}\n\n"
 
+    _top_text_cache["fetched_at"] = snap.fetched_at
+    _top_text_cache["text"] = message
     return message
 
 # ---------- Indicator helpers (no numpy/pandas needed) ----------
@@ -73,47 +103,130 @@ def percent_change(a, b):
 
 # ---------- Fetch & score ----------
 
-async def fetch_market_chart(session, coin_id, days=2, interval="hourly"):
+async def fetch_candles(coin_id, days=2, interval="hourly"):
+    """Returns [(timestamp_ms, price, volume), ...] or None."""
     url = f"{API_BASE}/coins/{coin_id}/market_chart?vs_currency=usd&days={days}&interval={interval}"
-    async with session.get(url, timeout=20) as resp:
-        if resp.status != 200:
-            return None
-        data = await resp.json()
-        # Each item is [timestamp(ms), value]
-        prices = [p[1] for p in (data.get("prices") or [])]
-        vols = [v[1] for v in (data.get("total_volumes") or [])]
-        return prices, vols
-
-def score_signal(coin_id, prices, vols):
-    """
-    Returns a dict with:
-      risk (1-10), reason list, metrics
-    Lower = safer.
-    """
-    reasons = []
-    if len(prices) < 30 or len(vols) < 30:
+    data = await http_client.get_json(url)
+    if not data:
         return None
+    # Each item is [timestamp(ms), value]
+    return [
+        (p[0], p[1], v[1])
+        for p, v in zip(data.get("prices") or [], data.get("total_volumes") or [])
+    ]
 
-    last = prices[-1]
-    prev_24 = prices[-25] if len(prices) > 25 else prices[0]
-    chg_24h = percent_change(last, prev_24)
+async def fetch_candles_range(coin_id, from_ms, to_ms):
+    """Like fetch_candles, but only for [from_ms, to_ms]."""
+    url = f"{API_BASE}/coins/{coin_id}/market_chart/range"
+    params = {"vs_currency": "usd", "from": int(from_ms // 1000), "to": int(to_ms // 1000)}
+    data = await http_client.get_json(url, params=params)
+    if not data:
+        return None
+    return [
+        (p[0], p[1], v[1])
+        for p, v in zip(data.get("prices") or [], data.get("total_volumes") or [])
+    ]
 
-    ema20 = ema(prices[-60:], 20) if len(prices) >= 60 else ema(prices, 20)
-    ema50 = ema(prices[-120:], 50) if len(prices) >= 120 else ema(prices, 50)
-    _rsi = rsi(prices, 14)
+async def sync_candles(coin_id):
+    """
+    Bring the local candle store up to date for one coin.
+    Fresh coins cost nothing; otherwise only the range since the newest
+    stored bar is fetched (that bar is re-fetched too, it may still be forming),
+    widened to RANGE_MIN_MS so CoinGecko keeps hourly granularity.
+    """
+    synced = candle_store.synced_at(coin_id)
+    if synced is not None and time.time() - synced < SYNC_MIN_SECONDS:
+        return
+    now_ms = time.time() * 1000
+    last = candle_store.last_ts(coin_id)
+    if last is None or now_ms - last > FULL_FETCH_DAYS * 86400 * 1000:
+        candles = await fetch_candles(coin_id, days=FULL_FETCH_DAYS)
+    else:
+        candles = await fetch_candles_range(coin_id, min(last, now_ms - RANGE_MIN_MS), now_ms)
+    if candles:
+        candle_store.append(coin_id, candles)
+
+_last_prune = 0.0
+
+def _maybe_prune():
+    global _last_prune
+    if time.time() - _last_prune > 3600:
+        candle_store.prune()
+        _last_prune = time.time()
+
+async def _sync_all(coin_ids):
+    await asyncio.gather(*[sync_candles(c) for c in coin_ids], return_exceptions=True)
+    _maybe_prune()
+
+# ---------- Universe (top-N) ----------
+_universe = {"size": 0, "ids": [], "next_fetch": 0.0}
+_universe_task = None
+
+async def universe_ids(size):
+    """Top `size` coin ids by market cap, cached for UNIVERSE_TTL (COINS until the first fetch works)."""
+    if _universe["size"] != size or time.time() >= _universe["next_fetch"]:
+        ids = await get_top_coin_ids(size)
+        if ids:
+            _universe.update(size=size, ids=ids, next_fetch=time.time() + UNIVERSE_TTL)
+        else:
+            _universe["next_fetch"] = time.time() + UNIVERSE_RETRY
+    return _universe["ids"] or COINS
 
-    vol_now = vols[-1]
-    vol_avg7 = sum(vols[-8:-1]) / 7 if len(vols) >= 8 else sum(vols) / max(1, len(vols))
-    vol_surge = (vol_now / vol_avg7) if vol_avg7 > 0 else 1.0
+async def _universe_sync_loop(size):
+    """
+    Keep the universe's candles fresh one coin at a time, stalest first,
+    UNIVERSE_SYNC_GAP apart, so the sync never takes more than its share
+    of the CoinGecko budget. A full pass over 500 coins takes ~17 minutes.
+    """
+    while True:
+        try:
+            ids = await universe_ids(size)
+            synced = candle_store.synced_all()
+            now = time.time()
+            due = sorted((c for c in ids if now - synced.get(c, 0) >= SYNC_MIN_SECONDS),
+                         key=lambda c: synced.get(c, 0))
+            for coin_id in due:
+                try:
+                    await sync_candles(coin_id)
+                except Exception as e:
+                    logging.warning(f"[signals] candle sync failed for {coin_id}: {e}")
+                await asyncio.sleep(UNIVERSE_SYNC_GAP)
+            _maybe_prune()
+            if not due:
+                next_due = min(synced.get(c, 0) for c in ids) + SYNC_MIN_SECONDS
+                await asyncio.sleep(max(UNIVERSE_SYNC_GAP, next_due - time.time()))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.exception(f"[signals] universe sync loop error: {e}")
+            await asyncio.sleep(UNIVERSE_RETRY)
+
+def ensure_universe_sync(size):
+    """Start the background universe candle sync once per process."""
+    global _universe_task
+    if _universe_task is None or _universe_task.done():
+        _universe_task = asyncio.create_task(_universe_sync_loop(size))
+    return _universe_task
+
+async def fetch_market_chart(coin_id, days=2, interval="hourly"):
+    candles = await fetch_candles(coin_id, days=days, interval=interval)
+    if candles is None:
+        return None
+    prices = [c[1] for c in candles]
+    vols = [c[2] for c in candles]
+    return prices, vols
 
-    # Base risk from volatility (stddev proxy using high-low window)
-    window = prices[-24:]
-    mean = sum(window) / len(window)
-    var = sum((x - mean) ** 2 for x in window) / len(window)
-    vol_proxy = math.sqrt(var) / mean if mean > 0 else 0.02  # relative volatility
+def score_metrics(coin_id, m):
+    """
+    Risk score from precomputed metrics
+    (last, chg_24h, ema20, ema50, rsi, vol_surge, vol_proxy).
+    """
+    reasons = []
+    ema20, ema50, _rsi = m["ema20"], m["ema50"], m["rsi"]
+    vol_surge, chg_24h = m["vol_surge"], m["chg_24h"]
 
     # Start with volatility scaled to 1–10
-    risk = min(10, max(1, 1 + vol_proxy * 60))  # tune factor
+    risk = min(10, max(1, 1 + m["vol_proxy"] * 60))  # tune factor
 
     # Trend adjustments
     if ema20 and ema50:
@@ -152,10 +265,57 @@ def score_signal(coin_id, prices, vols):
         "ema50": ema50,
         "rsi": _rsi,
         "vol_surge": vol_surge,
-        "last": last,
+        "last": m["last"],
         "reasons": reasons
     }
 
+def score_signal(coin_id, prices, vols):
+    """
+    Returns a dict with:
+      risk (1-10), reason list, metrics
+    Lower = safer.
+    """
+    if len(prices) < 30 or len(vols) < 30:
+        return None
+
+    last = prices[-1]
+    prev_24 = prices[-25] if len(prices) > 25 else prices[0]
+    chg_24h = percent_change(last, prev_24)
+
+    ema20 = ema(prices[-60:], 20) if len(prices) >= 60 else ema(prices, 20)
+    ema50 = ema(prices[-120:], 50) if len(prices) >= 120 else ema(prices, 50)
+    _rsi = rsi(prices, 14)
+
+    vol_now = vols[-1]
+    vol_avg7 = sum(vols[-8:-1]) / 7 if len(vols) >= 8 else sum(vols) / max(1, len(vols))
+    vol_surge = (vol_now / vol_avg7) if vol_avg7 > 0 else 1.0
+
+    # Base risk from volatility (stddev proxy using high-low window)
+    window = prices[-24:]
+    mean = sum(window) / len(window)
+    var = sum((x - mean) ** 2 for x in window) / len(window)
+    vol_proxy = math.sqrt(var) / mean if mean > 0 else 0.02  # relative volatility
+
+    return score_metrics(coin_id, {
+        "last": last,
+        "chg_24h": chg_24h,
+        "ema20": ema20,
+        "ema50": ema50,
+        "rsi": _rsi,
+        "vol_surge": vol_surge,
+        "vol_proxy": vol_proxy,
+    })
+
+# Streaming indicator state per coin: each refresh only feeds bars newer
+# than what the engine already holds, then scores in O(1).
+ENGINE = IndicatorEngine(bar_seconds=3600)
+
+def ingest_candles(coin_id, candles):
+    since = ENGINE.last_ts(coin_id)
+    for ts, price, vol in candles:
+        if since is None or ts >= since:
+            ENGINE.update(coin_id, ts, price, vol)
+
 def coin_emoji(coin_id):
     mapping = {
         "bitcoin": "₿", "ethereum": "♦", "ripple": "✦", "solana": "◎",
@@ -165,32 +325,54 @@ def coin_emoji(coin_id):
     }
     return mapping.get(coin_id, "•")
 
+def _rank(results, n_safe, n_risky):
+    if not results:
+        return [], []
+
+    # Sort
+    by_safe = sorted(results, key=lambda x: (x["risk"], -x["chg_24h"]))
+    by_risk = sorted(results, key=lambda x: (-x["risk"], -abs(x["chg_24h"])))
+
+    return by_safe[:n_safe], by_risk[:n_risky]
+
 async def build_signals(n_safe=1, n_risky=1):
     """
     Returns (safe_list, risky_list) sorted by risk asc/desc respectively.
-    Each item is a dict from score_signal().
+    Each item is a dict from score_metrics().
     """
+    if UNIVERSE_SIZE:
+        return await build_universe_signals(n_safe, n_risky, size=UNIVERSE_SIZE)
+
     results = []
-    async with aiohttp.ClientSession() as session:
-        tasks = [fetch_market_chart(session, c) for c in COINS]
-        charts = await asyncio.gather(*tasks, return_exceptions=True)
-
-    for coin_id, chart in zip(COINS, charts):
-        if isinstance(chart, Exception) or chart is None:
-            continue
-        prices, vols = chart
-        scored = score_signal(coin_id, prices, vols)
+    await _sync_all(COINS)
+
+    for coin_id in COINS:
+        # only bars the engine hasn't seen; everything on a cold start
+        ingest_candles(coin_id, candle_store.history(coin_id, since_ms=ENGINE.last_ts(coin_id)))
+        m = ENGINE.metrics(coin_id)
+        scored = score_metrics(coin_id, m) if m else None
         if scored:
             results.append(scored)
 
-    if not results:
-        return [], []
+    return _rank(results, n_safe, n_risky)
 
-    # Sort
-    by_safe = sorted(results, key=lambda x: (x["risk"], -x["chg_24h"]))
-    by_risk = sorted(results, key=lambda x: (-x["risk"], -abs(x["chg_24h"])))
-
-    return by_safe[:n_safe], by_risk[:n_risky]
+async def build_universe_signals(n_safe=1, n_risky=1, size=500):
+    """
+    Same as build_signals, but over the top `size` coins by market cap,
+    scored in one vectorized pass (see batch_scoring). Reads candle_store
+    only; the background sync fills it in (coins without history yet are
+    simply not scored).
+    """
+    from batch_scoring import score_universe  # numpy only needed on this path
+
+    ensure_universe_sync(size)
+    coin_ids = await universe_ids(size)
+    series = {}
+    for coin_id in coin_ids:
+        rows = candle_store.history(coin_id, limit=UNIVERSE_BARS)
+        if rows:
+            series[coin_id] = ([r[1] for r in rows], [r[2] for r in rows])
+    return _rank(score_universe(series), n_safe, n_risky)
 
 def format_signal_block(title, items):
     lines = [f"<b>{title}</b>"]
@@ -0,0 +1,168 @@
+# state_store.py
+"""
+Small journaled key-value store for monitor state.
+
+Each store is two files:
+  - <name>.snapshot.json: the full state as of the last compaction
+  - <name>.journal: one JSON line per change since then
+    ({"k": key, "v": value} to set, {"k": key, "d": 1} to delete)
+
+`set`/`delete` update memory and buffer one journal line, so a write costs
+O(changed keys). Buffered lines are appended, and the journal fsynced, at
+most once per FSYNC_INTERVAL seconds (or on `flush()`/`close()`). When the
+journal outgrows the state, it is compacted: a new snapshot is written
+atomically and the journal truncated.
+
+On startup the snapshot is loaded and the journal replayed on top. A torn
+last line from a crash is skipped. Replaying a journal that was already
+folded into the snapshot is harmless, because it ends at the same values.
+"""
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# ===== Config =====
+FSYNC_INTERVAL = 1.0     # seconds between journal appends/fsyncs
+COMPACT_MIN = 1000       # never compact below this many journal lines
+COMPACT_RATIO = 4        # ...or until journal lines exceed RATIO * keys
+
+_open_stores: List["StateStore"] = []
+
+
+class StateStore:
+    def __init__(self, name: str, legacy_json: Optional[str] = None):
+        self.name = name
+        self.snapshot_path = f"{name}.snapshot.json"
+        self.journal_path = f"{name}.journal"
+        self._data: Dict[str, Any] = {}
+        self._buffer: List[str] = []
+        self._journal_lines = 0
+        self._last_sync = time.monotonic()
+        self._load(legacy_json)
+        _open_stores.append(self)
+
+    # ---------- reads ----------
+    # Returned values are the stored objects: treat them as read-only and
+    # pass a new object to set() to change one.
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._data.get(key, default)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        return iter(self._data.items())
+
+    # ---------- writes ----------
+    def set(self, key: str, value: Any) -> None:
+        if self._data.get(key, _MISSING) == value:
+            return
+        self._data[key] = value
+        self._append({"k": key, "v": value})
+
+    def delete(self, key: str) -> None:
+        if self._data.pop(key, _MISSING) is _MISSING:
+            return
+        self._append({"k": key, "d": 1})
+
+    def flush(self) -> None:
+        """Append buffered changes and fsync the journal."""
+        self._last_sync = time.monotonic()
+        if not self._buffer:
+            return
+        try:
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.writelines(self._buffer)
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            logging.warning(f"[state] journal write failed for {self.name}: {e}")
+            return  # keep the buffer; retried on the next flush
+        self._journal_lines += len(self._buffer)
+        self._buffer.clear()
+        if self._journal_lines > max(COMPACT_MIN, COMPACT_RATIO * len(self._data)):
+            self.compact()
+
+    def compact(self) -> None:
+        """Write a fresh snapshot and truncate the journal."""
+        self._buffer.clear()  # folded into the snapshot below
+        tmp = self.snapshot_path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._data, f, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.snapshot_path)
+            # truncate only after the snapshot is durable
+            open(self.journal_path, "w").close()
+            self._journal_lines = 0
+        except OSError as e:
+            logging.warning(f"[state] compaction failed for {self.name}: {e}")
+
+    def close(self) -> None:
+        self.flush()
+        if self in _open_stores:
+            _open_stores.remove(self)
+
+    # ---------- internals ----------
+    def _append(self, record: Dict[str, Any]) -> None:
+        self._buffer.append(json.dumps(record, separators=(",", ":")) + "\n")
+        if time.monotonic() - self._last_sync >= FSYNC_INTERVAL:
+            self.flush()
+
+    def _load(self, legacy_json: Optional[str]) -> None:
+        have_snapshot = os.path.exists(self.snapshot_path)
+        have_journal = os.path.exists(self.journal_path)
+
+        if not have_snapshot and not have_journal:
+            if legacy_json and os.path.exists(legacy_json):
+                # one-time import of the old whole-file JSON state
+                try:
+                    with open(legacy_json, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    if isinstance(data, dict):
+                        self._data = data
+                        logging.info(f"[state] imported {len(data)} keys from {legacy_json}")
+                except Exception as e:
+                    logging.warning(f"[state] could not import {legacy_json}: {e}")
+                self.compact()
+            return
+
+        if have_snapshot:
+            try:
+                with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                    self._data = json.load(f)
+            except Exception as e:
+                logging.warning(f"[state] bad snapshot for {self.name}: {e}")
+
+        torn = False
+        if have_journal:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        torn = True  # partial write at the tail
+                        continue
+                    if rec.get("d"):
+                        self._data.pop(rec["k"], None)
+                    else:
+                        self._data[rec["k"]] = rec.get("v")
+                    self._journal_lines += 1
+        if torn:
+            # start a clean journal so new appends don't land after a partial line
+            self.compact()
+
+
+_MISSING = object()
+
+
+def close_all() -> None:
+    """Flush every open store (call on shutdown)."""
+    for store in list(_open_stores):
+        store.close()
@@ -1,17 +1,13 @@
-import json
+from utils import tier_registry
 
 def load_tiers():
-    with open("tiers.json", "r") as f:
-        return json.load(f)
+    return tier_registry.routing()
 
 def get_user_tier(user_id: int) -> str:
-    tiers = load_tiers()
-    return tiers.get("users", {}).get(str(user_id), "free")
+    return tier_registry.user_tier(user_id, "free")
 
 def get_group_tier(group_id: int) -> str:
-    tiers = load_tiers()
-    return tiers.get("groups", {}).get(str(group_id), "free")
+    return tier_registry.group_tier(group_id, "free")
 
 def get_tier_rules(tier_name: str):
-    tiers = load_tiers()
-    return tiers.get("tiers", {}).get(tier_name, {})
\ No newline at end of file
+    return tier_registry.tier_rules(tier_name)
\ No newline at end of file
@@ -0,0 +1,145 @@
+# telegram_sender.py
+"""
+Rate-limited Telegram sends shared by every alert path.
+
+Telegram's bot limits are roughly 30 messages/second overall, about 1/s per
+private chat and 20/minute per group. One global token bucket plus one
+bucket per chat keep us under them, so many sends can run concurrently
+without triggering flood control. If Telegram still answers with
+TelegramRetryAfter, that chat and the global bucket are paused for the
+requested time (flood waits are often bot-wide) and the send is retried.
+
+Per-chat buckets that have sat idle long enough to be full again are
+dropped by a periodic sweep; recreating one is lossless.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from aiogram.exceptions import TelegramRetryAfter
+
+# ===== Config =====
+GLOBAL_RATE = 30.0            # msgs/second across all chats
+GLOBAL_BURST = 30
+GROUP_RATE = 20 / 60          # msgs/second per group/channel (chat_id < 0)
+GROUP_BURST = 3
+PRIVATE_RATE = 1.0            # msgs/second per private chat
+PRIVATE_BURST = 1
+MAX_RETRIES = 3               # retries after TelegramRetryAfter
+SWEEP_SECONDS = 300           # how often idle per-chat buckets are dropped
+
+
+class TokenBucket:
+    """FIFO async token bucket: waiters are served in arrival order."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def idle(self, now: float) -> bool:
+        """Full, not paused and nobody waiting: dropping it loses nothing."""
+        return (not self._lock.locked() and now >= self.blocked_until
+                and self.tokens + (now - self.updated) * self.rate >= self.capacity)
+
+    def pause(self, seconds: float) -> None:
+        """Block the bucket for `seconds` (e.g. after a flood-wait)."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+@dataclass
+class SendOutcome:
+    chat_id: int
+    ok: bool
+    retries: int = 0
+    error: Optional[str] = None
+    latency: float = 0.0      # seconds from request to delivery (or failure)
+
+
+_global_bucket: Optional[TokenBucket] = None
+_chat_buckets: Dict[int, TokenBucket] = {}
+_last_sweep = 0.0
+
+
+def _global() -> TokenBucket:
+    global _global_bucket
+    if _global_bucket is None:
+        _global_bucket = TokenBucket(GLOBAL_RATE, GLOBAL_BURST)
+    return _global_bucket
+
+def _sweep(now: float) -> None:
+    global _last_sweep
+    _last_sweep = now
+    for chat_id in [c for c, b in _chat_buckets.items() if b.idle(now)]:
+        del _chat_buckets[chat_id]
+
+def chat_bucket(chat_id: int) -> TokenBucket:
+    now = time.monotonic()
+    if now - _last_sweep > SWEEP_SECONDS:
+        _sweep(now)
+    b = _chat_buckets.get(chat_id)
+    if b is None:
+        if chat_id < 0:
+            b = TokenBucket(GROUP_RATE, GROUP_BURST)
+        else:
+            b = TokenBucket(PRIVATE_RATE, PRIVATE_BURST)
+        _chat_buckets[chat_id] = b
+    return b
+
+def reset() -> None:
+    """Drop all bucket state (new event loop, tests, replays)."""
+    global _global_bucket, _last_sweep
+    _global_bucket = None
+    _last_sweep = 0.0
+    _chat_buckets.clear()
+
+
+async def send_message(bot, chat_id: int, text: str, **kwargs: Any) -> SendOutcome:
+    """
+    Send one message within the global and per-chat limits.
+    Never raises; the outcome says what happened.
+    """
+    start = time.monotonic()
+    chat = chat_bucket(chat_id)
+    retries = 0
+    while True:
+        # per-chat first so a busy chat doesn't hold global tokens hostage
+        await chat.acquire()
+        await _global().acquire()
+        try:
+            await bot.send_message(chat_id, text, **kwargs)
+            return SendOutcome(chat_id, True, retries, latency=time.monotonic() - start)
+        except TelegramRetryAfter as e:
+            if retries >= MAX_RETRIES:
+                logging.warning(f"[tg] flood-wait to {chat_id}, giving up after {retries} retries")
+                return SendOutcome(chat_id, False, retries, f"retry_after={e.retry_after}",
+                                   latency=time.monotonic() - start)
+            retries += 1
+            logging.info(f"[tg] flood-wait {e.retry_after}s for {chat_id} (retry {retries})")
+            chat.pause(e.retry_after)
+            _global().pause(e.retry_after)
+        except Exception as e:
+            logging.warning(f"[tg] send error to {chat_id}: {e}")
+            return SendOutcome(chat_id, False, retries, str(e), latency=time.monotonic() - start)
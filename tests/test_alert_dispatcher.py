@@ -0,0 +1,88 @@
+# tests/test_alert_dispatcher.py
+import asyncio
+import unittest
+from unittest import mock
+
+import alert_dispatcher as ad
+import telegram_sender
+
+
+def _alert(i, size):
+    head = f"<b>Alert {i}</b> <a href=\"https://x.test/{i}\">tx</a>\n"
+    return head + "x" * (size - len(head))
+
+
+class CoalesceTest(unittest.TestCase):
+    def test_joins_whole_alerts(self):
+        texts = ["*one*", "*two*", "*three*"]
+        self.assertEqual(ad.coalesce(texts, limit=100), [ad.SEPARATOR.join(texts)])
+
+    def test_flushes_before_an_alert_that_would_overflow(self):
+        texts = [_alert(i, 40) for i in range(5)]
+        msgs = ad.coalesce(texts, limit=100)
+        # two 40-char alerts + separator fit in 100, a third doesn't
+        self.assertEqual(msgs, [texts[0] + ad.SEPARATOR + texts[1],
+                                texts[2] + ad.SEPARATOR + texts[3],
+                                texts[4]])
+        # every alert lands intact in exactly one message
+        for t in texts:
+            self.assertEqual(sum(t in m for m in msgs), 1)
+
+    def test_exact_fit(self):
+        a, b = "a" * 49, "b" * 49
+        self.assertEqual(ad.coalesce([a, b], limit=100), [a + ad.SEPARATOR + b])
+        self.assertEqual(ad.coalesce([a, b + "b"], limit=100), [a, b + "b"])
+
+    def test_oversized_alert_splits_at_newlines_only(self):
+        lines = [f"<i>line {i}</i> " + "y" * 20 for i in range(20)]
+        big = "\n".join(lines)
+        msgs = ad.coalesce(["*small*", big, "*after*"], limit=100)
+        self.assertEqual(msgs[0], "*small*")
+        self.assertEqual(msgs[-1], "*after*")
+        middle = msgs[1:-1]
+        self.assertTrue(all(len(m) <= 100 for m in middle))
+        # no line was cut: splitting only happened between lines
+        self.assertEqual([l for m in middle for l in m.split("\n")], lines)
+
+    def test_overlong_single_line_is_kept_whole(self):
+        line = "z" * 150
+        self.assertEqual(ad.split_text(line, limit=100), [line])
+        self.assertEqual(ad.split_text("a\n" + line + "\nb", limit=100), ["a", line, "b"])
+
+
+class StubBot:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent.append((chat_id, text, kwargs))
+
+
+class DeliverTest(unittest.TestCase):
+    def setUp(self):
+        for name in ("GLOBAL_RATE", "GLOBAL_BURST", "GROUP_RATE", "GROUP_BURST"):
+            p = mock.patch.object(telegram_sender, name, 1e9)
+            p.start()
+            self.addCleanup(p.stop)
+        telegram_sender.reset()
+        self.addCleanup(telegram_sender.reset)
+
+    def test_merges_runs_with_the_same_send_options(self):
+        bot = StubBot()
+        d = ad.AlertDispatcher(bot)
+        html = {"parse_mode": "HTML"}
+        alerts = [
+            ad.Alert(-1, "<b>a</b>", 0, 0, html),
+            ad.Alert(-1, "<b>b</b>", 0, 0, html),
+            ad.Alert(-1, "*c*", 0, 0, {"parse_mode": "Markdown"}),
+        ]
+        asyncio.run(d._deliver(-1, alerts))
+        self.assertEqual([(t, k) for _, t, k in bot.sent], [
+            ("<b>a</b>" + ad.SEPARATOR + "<b>b</b>", html),
+            ("*c*", {"parse_mode": "Markdown"}),
+        ])
+        self.assertEqual((d.sent_messages, d.sent_alerts), (2, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+# tests/test_btc_whale_tracker.py
+import unittest
+from unittest import mock
+
+import btc_whale_tracker as bwt
+from dedup_store import DedupStore
+
+BTC_PRICE = 50_000.0
+
+# mempool/recent: flat summary with a top-level value
+POLLED_TX = {"txid": "a" * 64, "fee": 2_000, "vsize": 141, "value": 10 * 10**8}
+
+# WebSocket "mempool-transactions": full tx, value only in vout
+STREAMED_TX = {
+    "txid": "b" * 64,
+    "fee": 2_000,
+    "weight": 561,
+    "vin": [{"txid": "c" * 64, "vout": 0, "prevout": {"value": 10 * 10**8 + 2_000}}],
+    "vout": [
+        {"scriptpubkey_address": "bc1qbig", "value": 9 * 10**8},
+        {"scriptpubkey_address": "bc1qchange", "value": 10**8},
+    ],
+}
+
+
+class HandleTxTest(unittest.TestCase):
+    def setUp(self):
+        self.sent = []
+        patches = [
+            mock.patch.object(bwt, "SEEN_TX", DedupStore()),
+            mock.patch.object(bwt, "bot", object()),
+            mock.patch.object(bwt, "GROUP_ID", -100),
+            mock.patch.object(bwt.alert_dispatcher, "enqueue",
+                              lambda bot, gid, text, **kw: self.sent.append(text)),
+            mock.patch.object(bwt.exchange_labels, "labels", lambda addrs: [None] * len(addrs)),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_polled_tx_uses_value(self):
+        self.assertTrue(bwt.handle_tx(POLLED_TX, BTC_PRICE))
+        self.assertIn("10.00 BTC (~$500,000)", self.sent[0])
+        self.assertIn("141 vbytes", self.sent[0])
+
+    def test_streamed_tx_sums_vout(self):
+        self.assertEqual(bwt.tx_value_sats(STREAMED_TX), 10 * 10**8)
+        self.assertEqual(bwt.tx_vsize(STREAMED_TX), 141)
+        self.assertTrue(bwt.handle_tx(STREAMED_TX, BTC_PRICE))
+        self.assertIn("10.00 BTC (~$500,000)", self.sent[0])
+        self.assertIn("141 vbytes", self.sent[0])
+
+    def test_stream_payload_alerts(self):
+        with mock.patch.object(bwt.price_oracle, "get_usd", return_value=BTC_PRICE):
+            n = bwt.on_stream_payload({"mempool-transactions": {"added": [STREAMED_TX]}})
+        self.assertEqual(n, 1)
+
+    def test_streamed_tx_labels_largest_output(self):
+        looked_up = []
+
+        def labels(addrs):
+            looked_up.extend(addrs)
+            return ["Binance" if a == "bc1qbig" else None for a in addrs]
+
+        with mock.patch.object(bwt.exchange_labels, "labels", labels):
+            self.assertTrue(bwt.handle_tx(STREAMED_TX, BTC_PRICE))
+            self.assertTrue(bwt.handle_tx(POLLED_TX, BTC_PRICE))
+        self.assertEqual(looked_up, ["bc1qbig"])
+        self.assertIn("To: Binance", self.sent[0])
+        self.assertNotIn("To:", self.sent[1])
+
+    def test_small_streamed_tx_is_ignored(self):
+        small = dict(STREAMED_TX, txid="d" * 64, vout=[{"value": 10**5}])
+        self.assertFalse(bwt.handle_tx(small, BTC_PRICE))
+        self.assertEqual(self.sent, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
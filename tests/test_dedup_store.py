@@ -0,0 +1,100 @@
+# tests/test_dedup_store.py
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import dedup_store
+from dedup_store import DedupStore
+
+T0 = 1_700_000_000.0
+
+
+class DedupStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.now = T0
+        p = mock.patch.object(dedup_store.time, "time", lambda: self.now)
+        p.start()
+        self.addCleanup(p.stop)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.path = os.path.join(self.dir, "seen.log")
+
+    def _lines(self):
+        with open(self.path) as f:
+            return [l.split(" ", 1)[1].strip() for l in f]
+
+    def test_add_and_contains(self):
+        s = DedupStore(ttl=100)
+        self.assertTrue(s.add("a"))
+        self.assertFalse(s.add("a"))
+        self.assertIn("a", s)
+        self.assertNotIn("b", s)
+
+    def test_keys_expire_after_ttl_across_generations(self):
+        s = DedupStore(ttl=100)
+        s.add("old")
+        self.now += 60
+        s.add("mid")                    # same generation
+        self.now += 50                  # ttl passed: next add rotates
+        s.add("new")
+        self.assertEqual((len(s._prev), len(s._cur)), (2, 1))
+        self.assertNotIn("old", s)      # 110 s old: exact age test, even in _prev
+        self.assertIn("mid", s)         # 50 s old, still in the previous generation
+        self.now += 101                 # second rotation drops the old generation whole
+        s.add("newer")
+        self.assertNotIn("mid", s)
+        self.assertEqual(set(s._prev), {"new"})
+
+    def test_memory_ceiling_forces_rotation(self):
+        s = DedupStore(ttl=10**6, max_items=10)
+        for i in range(23):
+            s.add(f"k{i}")
+        self.assertLessEqual(len(s), 10)
+        self.assertIn("k22", s)
+        self.assertNotIn("k0", s)
+
+    def test_flush_appends_and_reload_restores(self):
+        s = DedupStore(self.path, ttl=100)
+        s.add("a")
+        s.add("b")
+        s.flush()
+        s.add("c")                      # not flushed: lost on "crash"
+        self.assertEqual(self._lines(), ["a", "b"])
+        self.now += 10
+        r = DedupStore(self.path, ttl=100)
+        self.assertIn("a", r)
+        self.assertIn("b", r)
+        self.assertNotIn("c", r)
+
+    def test_rotation_compacts_the_log(self):
+        s = DedupStore(self.path, ttl=100)
+        s.add("a")
+        s.flush()
+        self.now += 150
+        s.add("b")                      # rotates; "a" has expired
+        s.flush()
+        self.assertEqual(self._lines(), ["b"])
+
+    def test_load_skips_torn_and_expired_lines(self):
+        with open(self.path, "w") as f:
+            f.write(f"{T0 - 500:.3f} expired\n{T0 - 5:.3f} fresh\n17000")
+        s = DedupStore(self.path, ttl=100)
+        self.assertIn("fresh", s)
+        self.assertNotIn("expired", s)
+        self.assertEqual(self._lines(), ["fresh"])   # rewritten clean on load
+
+    def test_legacy_json_import(self):
+        legacy = os.path.join(self.dir, "seen.json")
+        with open(legacy, "w") as f:
+            json.dump({"x": T0 - 10, "gone": T0 - 1000}, f)
+        s = DedupStore(self.path, ttl=100, legacy_json=legacy)
+        self.assertIn("x", s)
+        self.assertNotIn("gone", s)
+        self.assertTrue(os.path.exists(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
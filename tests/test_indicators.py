@@ -0,0 +1,78 @@
+# tests/test_indicators.py
+import random
+import unittest
+
+from indicators import MIN_BARS, CoinIndicators, IndicatorEngine
+from smart_signals import score_metrics, score_signal
+
+FIELDS = ("last", "chg_24h", "ema20", "ema50", "rsi", "vol_surge", "risk")
+
+
+def _series(n, seed=1):
+    rng = random.Random(seed)
+    prices, vols = [], []
+    p = 100.0
+    for _ in range(n):
+        p *= 1 + rng.gauss(0, 0.02)
+        prices.append(p)
+        vols.append(rng.uniform(1e6, 5e6))
+    return prices, vols
+
+
+class StreamingMatchesBatchTest(unittest.TestCase):
+    def assertSameScore(self, streamed, batch):
+        for f in FIELDS:
+            a, b = streamed[f], batch[f]
+            if a is None or b is None:
+                self.assertEqual(a, b, f)
+            else:
+                self.assertAlmostEqual(a, b, places=6, msg=f)
+        self.assertEqual(streamed["reasons"], batch["reasons"])
+
+    def test_push_matches_score_signal_at_every_length(self):
+        # covers the warm-up, both EMA windows filling and many slides/re-anchors
+        prices, vols = _series(400)
+        ind = CoinIndicators()
+        for i, (p, v) in enumerate(zip(prices, vols), 1):
+            ind.push(p, v)
+            m = ind.metrics()
+            if i < MIN_BARS:
+                self.assertIsNone(m)
+                self.assertIsNone(score_signal("x", prices[:i], vols[:i]))
+                continue
+            self.assertSameScore(score_metrics("x", m), score_signal("x", prices[:i], vols[:i]))
+
+    def test_amend_replaces_the_last_bar(self):
+        prices, vols = _series(200, seed=2)
+        ind = CoinIndicators()
+        for p, v in zip(prices, vols):
+            ind.push(p, v * 0.5)   # forming bar...
+            ind.amend(p, v)        # ...then its final value
+        self.assertSameScore(score_metrics("x", ind.metrics()), score_signal("x", prices, vols))
+
+    def test_flat_series(self):
+        ind = CoinIndicators()
+        for _ in range(60):
+            ind.push(5.0, 0.0)
+        self.assertSameScore(score_metrics("x", ind.metrics()), score_signal("x", [5.0] * 60, [0.0] * 60))
+
+
+class IndicatorEngineTest(unittest.TestCase):
+    def test_buckets_points_into_bars(self):
+        eng = IndicatorEngine(bar_seconds=3600)
+        prices, vols = _series(50, seed=3)
+        hour = 3600 * 1000
+        for i, (p, v) in enumerate(zip(prices, vols)):
+            eng.update("c", i * hour + 60_000, p * 0.9, v)   # early point in the hour
+            eng.update("c", i * hour + 3_000_000, p, v)      # later point amends it
+            eng.update("c", (i - 1) * hour, 1.0, 1.0)        # older bar: ignored
+        self.assertEqual(eng.last_ts("c"), 49 * hour)
+        m = eng.metrics("c")
+        expected = score_signal("c", prices, vols)
+        self.assertAlmostEqual(m["last"], expected["last"])
+        self.assertAlmostEqual(m["rsi"], expected["rsi"])
+        self.assertIsNone(eng.metrics("unknown"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+# tests/test_router.py
+import asyncio
+import importlib.util
+import os
+import unittest
+from unittest import mock
+
+import telegram_sender
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _load_router():
+    # router.py is shadowed by the router/ package on sys.path
+    spec = importlib.util.spec_from_file_location("tier_router_test", os.path.join(ROOT, "router.py"))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+router_mod = _load_router()
+
+CFG = {
+    "tiers": {
+        "free":     {"chains": ["eth"],        "min_usd_buy": 50000, "delay_seconds": 1800},
+        "standard": {"chains": ["ETH"],        "min_usd_buy": 25000, "delay_seconds": 900},
+        "alpha":    {"chains": ["eth", "btc"], "min_usd_buy": 10000, "delay_seconds": 60},
+        "godmode":  {"min_usd_buy": 0, "delay_seconds": 0},  # no chain list: every chain
+    },
+    "groups": {
+        "-1": "free",
+        "-2": "standard",
+        "-3": "alpha",
+        "-4": "godmode",
+        "-5": "unknown-tier",
+        "not-a-chat": "alpha",
+    },
+}
+
+
+def _chats(targets):
+    return sorted(chat_id for _, chat_id in targets)
+
+
+class RoutingIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = router_mod.RoutingIndex(CFG)
+
+    def test_thresholds_are_inclusive(self):
+        # bisect_right: a value equal to min_usd_buy passes
+        self.assertEqual(_chats(self.index.recipients("eth", 50000)), [-4, -3, -2, -1])
+        self.assertEqual(_chats(self.index.recipients("eth", 49999.99)), [-4, -3, -2])
+        self.assertEqual(_chats(self.index.recipients("eth", 25000)), [-4, -3, -2])
+        self.assertEqual(_chats(self.index.recipients("eth", 10000)), [-4, -3])
+        self.assertEqual(_chats(self.index.recipients("eth", 9999)), [-4])
+        self.assertEqual(_chats(self.index.recipients("eth", 0)), [-4])
+
+    def test_below_every_floor_and_above_all(self):
+        self.assertEqual(_chats(self.index.recipients("eth", -1)), [])
+        self.assertEqual(_chats(self.index.recipients("eth", 1e12)), [-4, -3, -2, -1])
+
+    def test_unknown_value_skips_usd_gating(self):
+        self.assertEqual(_chats(self.index.recipients("eth", None)), [-4, -3, -2, -1])
+
+    def test_chain_gating(self):
+        self.assertEqual(_chats(self.index.recipients("btc", 1e9)), [-4, -3])
+        # chain nobody lists: only tiers without a chain list
+        self.assertEqual(_chats(self.index.recipients("sol", 1e9)), [-4])
+        # no chain: every configured group
+        self.assertEqual(_chats(self.index.recipients("", 1e9)), [-4, -3, -2, -1])
+
+    def test_targets_carry_the_tier_delay(self):
+        self.assertEqual(sorted(self.index.recipients("eth", 1e9)),
+                         [(0, -4), (60, -3), (900, -2), (1800, -1)])
+
+    def test_empty_config(self):
+        index = router_mod.RoutingIndex({})
+        self.assertEqual(index.recipients("eth", 1e9), [])
+        self.assertEqual(index.recipients("", None), [])
+
+
+class StubBot:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent.append(chat_id)
+
+
+class TierRouterSendTest(unittest.TestCase):
+    def setUp(self):
+        for name in ("GLOBAL_RATE", "GLOBAL_BURST", "GROUP_RATE", "GROUP_BURST"):
+            p = mock.patch.object(telegram_sender, name, 1e9)
+            p.start()
+            self.addCleanup(p.stop)
+        telegram_sender.reset()
+        self.addCleanup(telegram_sender.reset)
+        index = router_mod.RoutingIndex(CFG)
+        for p in (mock.patch.object(router_mod, "routing_index", lambda: index),
+                  mock.patch.object(router_mod.TierRouter, "cfg", new_callable=mock.PropertyMock,
+                                    return_value={"DEFAULT_GROUP_ID": -99})):
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_gating_cooldown_and_fallback(self):
+        bot = StubBot()
+        tr = router_mod.TierRouter(bot)
+
+        async def run():
+            await tr.send(chain="ETH", est_usd=30000, text="a")
+            await tr.send(chain="eth", est_usd=30000, text="b")   # -3/-2 cooling down
+            await tr.send(chain="sol", est_usd=-1, text="c")      # nobody: fallback
+
+        asyncio.run(run())
+        self.assertEqual(sorted(bot.sent[:3]), [-4, -3, -2])
+        self.assertEqual(bot.sent[3:], [-4, -99])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+# tests/test_state_store.py
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import state_store
+from state_store import StateStore
+
+
+class StateStoreTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.name = os.path.join(self.dir, "mon")
+        # flush only when asked, so each test controls what reaches disk
+        p = mock.patch.object(state_store, "FSYNC_INTERVAL", 10**9)
+        p.start()
+        self.addCleanup(p.stop)
+
+    def _open(self, **kw):
+        s = StateStore(self.name, **kw)
+        self.addCleanup(lambda: s in state_store._open_stores and state_store._open_stores.remove(s))
+        return s
+
+    def _journal(self):
+        with open(self.name + ".journal") as f:
+            return [json.loads(l) for l in f]
+
+    def test_journal_replay_restores_sets_and_deletes(self):
+        s = self._open()
+        s.set("a", [1, 2])
+        s.set("b", {"x": 1})
+        s.set("a", [3])
+        s.delete("b")
+        s.delete("missing")            # no-op, not journaled
+        s.set("c", 1)
+        s.set("c", 1)                  # unchanged, not journaled
+        s.flush()
+        self.assertEqual(len(self._journal()), 5)
+        r = self._open()
+        self.assertEqual(dict(r.items()), {"a": [3], "c": 1})
+
+    def test_unflushed_changes_are_not_on_disk(self):
+        s = self._open()
+        s.set("a", 1)
+        self.assertFalse(os.path.exists(self.name + ".journal"))
+        self.assertEqual(len(self._open()), 0)
+
+    def test_compaction_writes_snapshot_and_truncates_journal(self):
+        with mock.patch.object(state_store, "COMPACT_MIN", 5):
+            s = self._open()
+            for i in range(3):
+                s.set("k", i)
+            s.set("j", "x")
+            s.flush()                  # 4 lines: below the threshold
+            self.assertEqual(len(self._journal()), 4)
+            s.set("k", 99)
+            s.set("k", 100)
+            s.flush()                  # 6 lines <= 4 * 2 keys: still kept
+            self.assertEqual(len(self._journal()), 6)
+            for i in range(3):
+                s.set("k", 200 + i)
+            s.flush()                  # 9 > 8: compacted
+        self.assertEqual(self._journal(), [])
+        with open(self.name + ".snapshot.json") as f:
+            self.assertEqual(json.load(f), {"k": 202, "j": "x"})
+        self.assertEqual(dict(self._open().items()), {"k": 202, "j": "x"})
+
+    def test_snapshot_plus_journal(self):
+        s = self._open()
+        s.set("a", 1)
+        s.compact()
+        s.set("a", 2)
+        s.set("b", 3)
+        s.flush()
+        self.assertEqual(dict(self._open().items()), {"a": 2, "b": 3})
+
+    def test_torn_tail_is_skipped_and_journal_restarted(self):
+        s = self._open()
+        s.set("a", 1)
+        s.set("b", 2)
+        s.flush()
+        with open(self.name + ".journal", "a") as f:
+            f.write('{"k":"c","v":')    # crash mid-append
+        r = self._open()
+        self.assertEqual(dict(r.items()), {"a": 1, "b": 2})
+        self.assertEqual(self._journal(), [])   # compacted into a clean snapshot
+        r.set("d", 4)
+        r.flush()
+        self.assertEqual(dict(self._open().items()), {"a": 1, "b": 2, "d": 4})
+
+    def test_replaying_an_already_folded_journal_is_harmless(self):
+        s = self._open()
+        s.set("a", 1)
+        s.delete("a")
+        s.set("b", 2)
+        s.flush()
+        with open(self.name + ".journal") as f:
+            journal = f.read()
+        s.compact()
+        with open(self.name + ".journal", "w") as f:   # crash before truncation
+            f.write(journal)
+        self.assertEqual(dict(self._open().items()), {"b": 2})
+
+    def test_legacy_json_import(self):
+        legacy = os.path.join(self.dir, "old.json")
+        with open(legacy, "w") as f:
+            json.dump({"w": ["ETH"]}, f)
+        s = self._open(legacy_json=legacy)
+        self.assertEqual(s.get("w"), ["ETH"])
+        self.assertTrue(os.path.exists(self.name + ".snapshot.json"))
+        os.remove(legacy)
+        self.assertEqual(self._open().get("w"), ["ETH"])   # imported once
+
+
+if __name__ == "__main__":
+    unittest.main()
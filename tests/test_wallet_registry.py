@@ -0,0 +1,135 @@
+# tests/test_wallet_registry.py
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+import wallet_registry as wr
+
+ETH = "0x28C6c06298d514Db089934071355E5743bf21d60"
+ETH2 = "0x742d35Cc6634C0532925a3b844Bc454e4438f44e"
+BTC = "1FeexV6bAHb8ybZjqQMjJrcCrHGW9sb6uF"
+XRP = "rDsbeomae4FXwgQTJp9Rs64Qg9vDiTCdBv"
+
+
+class WalletRegistryTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        wr.close()
+        for name, value in (("DB", os.path.join(self.dir, "wallets.db")),
+                            ("LEGACY_FILES", []), ("_listeners", []), ("_seq", 0)):
+            p = mock.patch.object(wr, name, value)
+            p.start()
+            self.addCleanup(p.stop)
+        self.addCleanup(wr.close)
+
+    def _reopen(self):
+        wr.close()
+        wr._db()
+
+    def test_guess_chain(self):
+        self.assertEqual(wr.guess_chain(ETH), "ETH")
+        self.assertEqual(wr.guess_chain(BTC), "BTC")
+        self.assertEqual(wr.guess_chain("bc1qxy2kgdygjrsqtzq2n0yrf2493p83kkfjhx0wlh"), "BTC")
+        self.assertEqual(wr.guess_chain(XRP), "XRP")
+        self.assertIsNone(wr.guess_chain("hello"))
+
+    def test_add_update_remove(self):
+        self.assertTrue(wr.add("eth", ETH, label="a"))
+        self.assertFalse(wr.add("ETH", ETH, label="a"))          # unchanged: no write
+        self.assertFalse(wr.add("ETH", ETH.lower(), label="b"))  # same wallet, any casing
+        self.assertEqual(wr.get("ETH", ETH)["label"], "b")
+        self.assertEqual(wr.addresses("ETH"), [ETH.lower()])
+        self.assertTrue(wr.remove("ETH", ETH))
+        self.assertFalse(wr.remove("ETH", ETH))
+        self.assertFalse(wr.contains("ETH", ETH))
+
+    def test_lists_are_separate(self):
+        wr.add("BTC", BTC)
+        wr.add("BTC", BTC, list_name=wr.TOP_HOLDERS)
+        wr.remove("BTC", BTC)
+        self.assertEqual(wr.addresses("BTC"), [])
+        self.assertEqual(wr.addresses("BTC", wr.TOP_HOLDERS), [BTC])
+
+    def test_tier_and_chain_counts(self):
+        wr.add("ETH", ETH, tier="alpha")
+        wr.add("ETH", ETH2, tier="alpha")
+        wr.add("BTC", BTC)
+        self.assertEqual((wr.count("alpha"), wr.count(wr.DEFAULT_TIER), wr.count()), (2, 1, 3))
+        wr.add("ETH", ETH2, tier="godmode")                      # tier change moves the count
+        self.assertEqual((wr.count("alpha"), wr.count("godmode")), (1, 1))
+        wr.remove("ETH", ETH)
+        self.assertEqual((wr.count("alpha"), wr.count(chain="eth")), (0, 1))
+        self.assertEqual([w["address"] for w in wr.wallets(tier="godmode")], [ETH2])
+        self._reopen()                                           # rebuilt from SQLite
+        self.assertEqual((wr.count("godmode"), wr.count(wr.DEFAULT_TIER), wr.count()), (1, 1, 2))
+
+    def test_change_feed(self):
+        self.assertEqual(wr.version(), 0)
+        wr.add("ETH", ETH)
+        wr.add("ETH", ETH, tier="alpha")
+        wr.add("XRP", XRP)
+        wr.remove("ETH", ETH)
+        self.assertEqual(wr.version(), 4)
+        self.assertEqual(wr.changes_since(2), [
+            (3, "add", wr.WATCH, "XRP", XRP),
+            (4, "remove", wr.WATCH, "ETH", ETH),
+        ])
+        self._reopen()
+        self.assertEqual(wr.version(), 4)
+        self.assertEqual([c[1] for c in wr.changes_since(0)], ["add", "update", "add", "remove"])
+
+    def test_listeners_run_after_each_write(self):
+        calls = []
+        wr.on_change(lambda op, w: calls.append((op, w["address"], wr.contains(w["chain"], w["address"]))))
+        wr.on_change(lambda op, w: 1 / 0)                        # a failing listener doesn't stop the write
+        with self.assertLogs(level="ERROR") as logs:
+            wr.add("BTC", BTC)
+            wr.add("BTC", BTC)                                   # no change: no call
+            wr.remove("BTC", BTC)
+        self.assertEqual(len(logs.records), 2)
+        self.assertEqual(calls, [("add", BTC, True), ("remove", BTC, False)])
+
+    def test_failed_write_leaves_the_indexes_alone(self):
+        wr.add("ETH", ETH, tier="alpha")
+        calls = []
+        wr.on_change(lambda op, w: calls.append(op))
+        with mock.patch.object(wr, "_write", side_effect=sqlite3.OperationalError("disk I/O error")):
+            with self.assertRaises(sqlite3.OperationalError):
+                wr.add("ETH", ETH2, tier="alpha")
+            with self.assertRaises(sqlite3.OperationalError):
+                wr.add("ETH", ETH, tier="godmode")
+            with self.assertRaises(sqlite3.OperationalError):
+                wr.remove("ETH", ETH)
+        self.assertEqual(calls, [])
+        self.assertEqual((wr.count("alpha"), wr.count("godmode")), (1, 0))
+        self.assertFalse(wr.contains("ETH", ETH2))
+        self.assertEqual(wr.version(), 1)
+
+    def test_legacy_files_imported_once(self):
+        tracked = os.path.join(self.dir, "tracked_wallets.json")
+        with open(tracked, "w") as f:
+            json.dump({"alpha": [{"address": ETH, "label": "a"}, "not-an-address"],
+                       "btc": [BTC]}, f)
+        holders = os.path.join(self.dir, "top_holders_btc.json")
+        with open(holders, "w") as f:
+            json.dump([BTC], f)
+        legacy = [(tracked, wr.WATCH, None), (holders, wr.TOP_HOLDERS, "BTC")]
+        with mock.patch.object(wr, "LEGACY_FILES", legacy):
+            wr.close()
+            self.assertEqual(wr.get("ETH", ETH)["tier"], "alpha")
+            self.assertEqual(wr.get("ETH", ETH)["label"], "a")
+            self.assertEqual(wr.addresses("BTC"), [BTC])
+            self.assertEqual(wr.addresses("BTC", wr.TOP_HOLDERS), [BTC])
+            wr.remove("ETH", ETH)
+            self._reopen()                                       # not imported again
+            self.assertFalse(wr.contains("ETH", ETH))
+            self.assertEqual(wr.count(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
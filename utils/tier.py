@@ -1,13 +1,13 @@
 # src/utils/tier.py
 
-import json
-import os
 from enum import Enum
 from typing import Dict
 
+from utils import tier_registry
+
 # ---------- Paths ----------
-DATA_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "data"))
-TIERS_PATH = os.path.join(DATA_DIR, "tiers.json")
+DATA_DIR = tier_registry.DATA_DIR
+TIERS_PATH = tier_registry.ASSIGNMENTS_PATH
 
 # ---------- Admins ----------
 # Add more IDs as needed
@@ -19,36 +19,29 @@ class Tier(str, Enum):
     ALPHA = "Alpha"
     GODMODE = "GodMode"
 
-# ---------- Storage helpers ----------
-def _ensure_store() -> None:
-    os.makedirs(DATA_DIR, exist_ok=True)
-    if not os.path.exists(TIERS_PATH):
-        with open(TIERS_PATH, "w", encoding="utf-8") as f:
-            json.dump({}, f)
+    def __str__(self) -> str:
+        return self.value
 
+# ---------- Storage helpers ----------
 def load_tiers() -> Dict[str, str]:
-    _ensure_store()
-    with open(TIERS_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
+    """Copy of {user_id: tier} from the in-memory registry."""
+    return dict(tier_registry.assignments())
 
 def save_tiers(tiers: Dict[str, str]) -> None:
-    _ensure_store()
-    tmp = TIERS_PATH + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(tiers, f, indent=2, ensure_ascii=False)
-    os.replace(tmp, TIERS_PATH)
+    tier_registry.save_assignments(tiers)
 
 # ---------- Public API ----------
 def get_tier(user_id: int) -> str:
     """Return the user's tier name; defaults to 'Free'."""
-    tiers = load_tiers()
-    return tiers.get(str(user_id), Tier.FREE.value)
+    name = tier_registry.assigned_tier(user_id, Tier.FREE.value)
+    try:
+        return Tier(name)  # str subclass, so plain-string callers keep working
+    except ValueError:
+        return name
 
 def set_tier(user_id: int, tier: str) -> None:
     """Persist a user's tier."""
-    tiers = load_tiers()
-    tiers[str(user_id)] = tier
-    save_tiers(tiers)
+    tier_registry.set_assigned_tier(user_id, tier)
 
 def list_tiers() -> Dict[str, str]:
     """Return the full mapping {user_id: tier}."""
@@ -0,0 +1,146 @@
+# utils/tier_registry.py
+"""
+Single in-memory registry for every tier lookup.
+
+Two files back it:
+  - tiers.json (repo root): routing config — tiers/rules, users, groups,
+    DEFAULT_GROUP_ID and the optional TIERS -> chat id map.
+  - data/tiers.json: per-user tier assignments set with /settier.
+
+Each file is parsed once and kept in memory. Reads are dict lookups; the
+file's mtime is checked at most once per CHECK_INTERVAL seconds and the
+file is re-parsed (and swapped in as a whole) only when it changed.
+Writes go to disk atomically and update memory in the same step.
+"""
+import json
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Optional
+
+# ---------- Paths ----------
+ROUTING_PATH = "tiers.json"
+DATA_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "data"))
+ASSIGNMENTS_PATH = os.path.join(DATA_DIR, "tiers.json")
+
+CHECK_INTERVAL = 1.0  # seconds between mtime checks
+
+DEFAULT_ROUTING: Dict[str, Any] = {
+    "DEFAULT_GROUP_ID": None,
+    "tiers": {
+        "free":      {"wallet_limit": 10,  "chains": ["eth"],               "min_usd_buy": 50000, "delay_seconds": 1800},
+        "standard":  {"wallet_limit": 25,  "chains": ["eth"],               "min_usd_buy": 25000, "delay_seconds": 900},
+        "alpha":     {"wallet_limit": 75,  "chains": ["eth","btc","xrp"],   "min_usd_buy": 10000, "delay_seconds": 60},
+        "godmode":   {"wallet_limit": 200, "chains": ["eth","btc","xrp"],   "min_usd_buy": 0,     "delay_seconds": 0},
+    },
+    "users": {},
+    "groups": {}
+}
+
+
+class JsonDoc:
+    """A JSON file cached in memory and re-read only when its mtime changes."""
+
+    def __init__(self, path: str, default: Callable[[], Any]):
+        self.path = path
+        self.default = default
+        self.version = 0          # bumped on every (re)load or write
+        self._data: Any = None
+        self._mtime: Optional[int] = None
+        self._checked = 0.0
+
+    def _stat(self) -> Optional[int]:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def get(self) -> Any:
+        now = time.monotonic()
+        if self._data is None or now - self._checked >= CHECK_INTERVAL:
+            self._checked = now
+            mtime = self._stat()
+            if self._data is None or mtime != self._mtime:
+                self._load(mtime)
+        return self._data
+
+    def reload(self) -> Any:
+        """Force a re-read regardless of mtime."""
+        self._checked = time.monotonic()
+        self._load(self._stat())
+        return self._data
+
+    def _load(self, mtime: Optional[int]) -> None:
+        data = None
+        if mtime is not None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except Exception as e:
+                logging.warning(f"[tiers] could not load {self.path}: {e}")
+                if self._data is not None:
+                    return  # keep the last good copy
+        # swap the whole object in one assignment
+        self._data = data if data is not None else self.default()
+        self._mtime = mtime
+        self.version += 1
+
+    def write(self, data: Any) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.path)
+        self._data = data
+        self._mtime = self._stat()
+        self._checked = time.monotonic()
+        self.version += 1
+
+
+def _default_routing() -> Dict[str, Any]:
+    return json.loads(json.dumps(DEFAULT_ROUTING))
+
+_routing = JsonDoc(ROUTING_PATH, _default_routing)
+_assignments = JsonDoc(ASSIGNMENTS_PATH, dict)
+
+
+# ---------- Routing config (tiers.json) ----------
+def routing() -> Dict[str, Any]:
+    """Full routing config. Treat as read-only."""
+    return _routing.get()
+
+def routing_version() -> int:
+    _routing.get()
+    return _routing.version
+
+def reload_routing() -> Dict[str, Any]:
+    return _routing.reload()
+
+def user_tier(user_id: int, default: str = "free") -> str:
+    return routing().get("users", {}).get(str(user_id), default)
+
+def group_tier(group_id: int, default: str = "free") -> str:
+    return routing().get("groups", {}).get(str(group_id), default)
+
+def tier_rules(tier_name: str) -> Dict[str, Any]:
+    return routing().get("tiers", {}).get(tier_name, {})
+
+def save_routing(cfg: Dict[str, Any]) -> None:
+    _routing.write(cfg)
+
+
+# ---------- User assignments (data/tiers.json) ----------
+def assignments() -> Dict[str, str]:
+    """{user_id: tier}. Treat as read-only."""
+    return _assignments.get()
+
+def assigned_tier(user_id: Any, default: Optional[str] = None) -> Optional[str]:
+    return assignments().get(str(user_id), default)
+
+def set_assigned_tier(user_id: Any, tier: str) -> None:
+    data = dict(assignments())
+    data[str(user_id)] = tier
+    _assignments.write(data)
+
+def save_assignments(data: Dict[str, str]) -> None:
+    _assignments.write(dict(data))
@@ -0,0 +1,327 @@
+# wallet_registry.py
+"""
+One indexed registry for every tracked wallet.
+
+Replaces tracked_wallets.json, tracked_{btc,eth,xrp}_wallets.json,
+eth_whales.json and top_holders_btc.json; they are imported once, the
+first time the database is opened.
+
+Each wallet belongs to a list (who consumes it: WATCH for the wallet
+watchers, NEW_TOKEN, TOP_HOLDERS), a chain and a tier. Rows live
+in SQLite (WAL) and are mirrored in memory, indexed by:
+  - (list, chain, address)  -> O(1) membership / lookup
+  - (list, chain)           -> the wallets a monitor polls
+  - (list, tier)            -> a counter, for wallet_limit checks
+so reads never touch the disk.
+
+Writes go through to SQLite in one transaction together with a row in
+`changes`, the change feed: every add/update/remove gets a sequence number.
+Listeners registered with on_change() are called after each write in this
+process; other processes can follow changes_since(seq).
+"""
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# ===== Config =====
+DB = "wallets.db"
+CHAINS = ("BTC", "ETH", "XRP")
+DEFAULT_TIER = "watch"
+CHANGES_KEEP = 10_000      # change-feed rows kept for changes_since()
+
+# lists
+WATCH = "watch"            # btc/eth/xrp wallet watchers (watcher_engine)
+NEW_TOKEN = "new_token"    # new_token_monitor
+TOP_HOLDERS = "top_holders"  # top_holder_tracker
+
+# imported once: (file, list, chain or None to detect from the address)
+LEGACY_FILES: List[Tuple[str, str, Optional[str]]] = [
+    ("tracked_btc_wallets.json", WATCH, "BTC"),
+    ("tracked_eth_wallets.json", WATCH, "ETH"),
+    ("tracked_xrp_wallets.json", WATCH, "XRP"),
+    ("tracked_wallets.json", WATCH, None),
+    ("eth_whales.json", NEW_TOKEN, "ETH"),
+    ("top_holders_btc.json", TOP_HOLDERS, "BTC"),
+]
+
+Wallet = Dict[str, Any]   # {"list_name", "chain", "address", "label", "tier", "added"}
+Listener = Callable[[str, Wallet], Any]
+
+_ETH_RE = re.compile(r"^0x[0-9a-fA-F]{40}$")
+_XRP_RE = re.compile(r"^r[1-9A-HJ-NP-Za-km-z]{24,34}$")
+_BTC_RE = re.compile(r"^([13][1-9A-HJ-NP-Za-km-z]{25,34}|bc1[0-9a-z]{8,87})$", re.IGNORECASE)
+
+_con: Optional[sqlite3.Connection] = None
+_rows: Dict[Tuple[str, str, str], Wallet] = {}          # (list, chain, key) -> wallet
+_by_chain: Dict[Tuple[str, str], Dict[str, Wallet]] = {}  # (list, chain) -> {key: wallet}
+_tiers: Counter = Counter()                              # (list, tier) -> count
+_seq = 0
+_listeners: List[Listener] = []
+
+
+# ---------- Addresses ----------
+def guess_chain(address: str) -> Optional[str]:
+    a = address.strip()
+    if _ETH_RE.match(a):
+        return "ETH"
+    if _XRP_RE.match(a):
+        return "XRP"
+    if _BTC_RE.match(a):
+        return "BTC"
+    return None
+
+def _key(chain: str, address: str) -> str:
+    # EVM addresses are case-insensitive (checksum casing is cosmetic)
+    a = address.strip()
+    return a.lower() if chain == "ETH" else a
+
+
+# ---------- Storage ----------
+def _db() -> sqlite3.Connection:
+    global _con, _seq
+    if _con is None:
+        _con = sqlite3.connect(DB)
+        _con.execute("PRAGMA journal_mode=WAL")
+        _con.execute("PRAGMA synchronous=NORMAL")
+        _con.executescript("""
+          CREATE TABLE IF NOT EXISTS wallets(
+            list_name TEXT NOT NULL,
+            chain TEXT NOT NULL,
+            addr_key TEXT NOT NULL,
+            address TEXT NOT NULL,
+            label TEXT,
+            tier TEXT NOT NULL DEFAULT 'watch',
+            added REAL NOT NULL,
+            PRIMARY KEY(list_name, chain, addr_key)
+          );
+          CREATE INDEX IF NOT EXISTS wallets_tier ON wallets(list_name, tier);
+          CREATE TABLE IF NOT EXISTS changes(
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts REAL NOT NULL,
+            op TEXT NOT NULL,
+            list_name TEXT NOT NULL,
+            chain TEXT NOT NULL,
+            address TEXT NOT NULL
+          );
+          CREATE TABLE IF NOT EXISTS meta(k TEXT PRIMARY KEY, v TEXT);
+        """)
+        _con.commit()
+        for list_name, chain, key, address, label, tier, added in _con.execute(
+            "SELECT list_name, chain, addr_key, address, label, tier, added FROM wallets ORDER BY added, rowid"
+        ):
+            _index(key, {"list_name": list_name, "chain": chain, "address": address,
+                         "label": label, "tier": tier, "added": added})
+        _seq = _con.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+        if _con.execute("SELECT 1 FROM meta WHERE k='legacy_imported'").fetchone() is None:
+            _import_legacy(_con)
+    return _con
+
+def _index(key: str, w: Wallet) -> None:
+    rk = (w["list_name"], w["chain"], key)
+    old = _rows.get(rk)
+    if old is not None:
+        _tiers[(old["list_name"], old["tier"])] -= 1
+    _rows[rk] = w
+    _by_chain.setdefault((w["list_name"], w["chain"]), {})[key] = w
+    _tiers[(w["list_name"], w["tier"])] += 1
+
+def _unindex(rk: Tuple[str, str, str]) -> Optional[Wallet]:
+    w = _rows.pop(rk, None)
+    if w is not None:
+        _by_chain.get(rk[:2], {}).pop(rk[2], None)
+        _tiers[(w["list_name"], w["tier"])] -= 1
+    return w
+
+def _legacy_entries(path: str) -> List[Tuple[Optional[str], str, Optional[str]]]:
+    """
+    Read a wallets file in any of the formats the repo has used: a list,
+    {"wallets": [...]}, or {group: [...]} where group is a tier or a chain.
+    Entries are address strings or dicts (address/addr/wallet, label).
+    Returns [(group, address, label)].
+    """
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except Exception:
+        return []
+    if isinstance(data, list):
+        groups = {None: data}
+    elif isinstance(data, dict) and isinstance(data.get("wallets"), list):
+        groups = {None: data["wallets"]}
+    elif isinstance(data, dict):
+        groups = {k: v for k, v in data.items() if isinstance(v, list)}
+    else:
+        return []
+    out = []
+    for group, items in groups.items():
+        for w in items:
+            if isinstance(w, str):
+                addr, label = w.strip(), None
+            elif isinstance(w, dict):
+                addr = (w.get("address") or w.get("addr") or w.get("wallet") or "").strip()
+                label = w.get("label")
+            else:
+                continue
+            if addr:
+                out.append((group, addr, label))
+    return out
+
+def _import_legacy(con: sqlite3.Connection) -> None:
+    now = time.time()
+    rows = []
+    for path, list_name, file_chain in LEGACY_FILES:
+        if not os.path.exists(path):
+            continue
+        for group, address, label in _legacy_entries(path):
+            tier = DEFAULT_TIER
+            chain = file_chain
+            if group and group.upper() in CHAINS:
+                chain = group.upper()    # {"eth": [...], "btc": [...]}
+            elif group:
+                tier = group             # {"alpha": [...], ...}
+            chain = chain or guess_chain(address)
+            if chain is None:
+                logging.warning(f"[wallets] {path}: can't tell the chain of {address}; skipped")
+                continue
+            key = _key(chain, address)
+            if (list_name, chain, key) in _rows:
+                continue
+            w = {"list_name": list_name, "chain": chain, "address": address,
+                 "label": label, "tier": tier, "added": now}
+            _index(key, w)
+            rows.append((list_name, chain, key, address, label, tier, now))
+            now += 1e-6  # keep file order
+    con.executemany("""
+      INSERT OR IGNORE INTO wallets(list_name, chain, addr_key, address, label, tier, added)
+      VALUES(?,?,?,?,?,?,?)
+    """, rows)
+    con.execute("INSERT OR REPLACE INTO meta(k, v) VALUES('legacy_imported', ?)", (str(int(time.time())),))
+    con.commit()
+    if rows:
+        logging.info(f"[wallets] imported {len(rows)} wallets from the legacy JSON files")
+
+def _write(op: str, key: str, w: Wallet) -> None:
+    """Persist one change (row + change-feed entry) in one transaction; raises if it fails."""
+    global _seq
+    con = _db()
+    with con:
+        if op == "remove":
+            con.execute("DELETE FROM wallets WHERE list_name=? AND chain=? AND addr_key=?",
+                        (w["list_name"], w["chain"], key))
+        else:
+            con.execute("""
+              INSERT INTO wallets(list_name, chain, addr_key, address, label, tier, added)
+              VALUES(?,?,?,?,?,?,?)
+              ON CONFLICT(list_name, chain, addr_key) DO UPDATE SET
+                address=excluded.address, label=excluded.label, tier=excluded.tier
+            """, (w["list_name"], w["chain"], key, w["address"], w["label"], w["tier"], w["added"]))
+        cur = con.execute("INSERT INTO changes(ts, op, list_name, chain, address) VALUES(?,?,?,?,?)",
+                          (time.time(), op, w["list_name"], w["chain"], w["address"]))
+        seq = cur.lastrowid
+        if seq % 1000 == 0:
+            con.execute("DELETE FROM changes WHERE seq <= ?", (seq - CHANGES_KEEP,))
+    _seq = seq
+
+def _notify(op: str, w: Wallet) -> None:
+    for cb in list(_listeners):
+        try:
+            cb(op, w)
+        except Exception as e:
+            logging.exception(f"[wallets] change listener failed: {e}")
+
+
+# ---------- Writes ----------
+def add(chain: str, address: str, label: Optional[str] = None, tier: str = DEFAULT_TIER,
+        list_name: str = WATCH) -> bool:
+    """Add a wallet, or update its label/tier. Returns True if it was new."""
+    _db()
+    chain = chain.upper()
+    key = _key(chain, address)
+    old = _rows.get((list_name, chain, key))
+    if old is not None and old["label"] == label and old["tier"] == tier:
+        return False
+    w = {"list_name": list_name, "chain": chain, "address": address.strip(),
+         "label": label, "tier": tier, "added": old["added"] if old else time.time()}
+    op = "update" if old else "add"
+    _write(op, key, w)  # persist first: the indexes only ever reflect committed rows
+    _index(key, w)
+    _notify(op, w)
+    return old is None
+
+def remove(chain: str, address: str, list_name: str = WATCH) -> bool:
+    _db()
+    chain = chain.upper()
+    key = _key(chain, address)
+    w = _rows.get((list_name, chain, key))
+    if w is None:
+        return False
+    _write("remove", key, w)
+    _unindex((list_name, chain, key))
+    _notify("remove", w)
+    return True
+
+
+# ---------- Reads ----------
+def get(chain: str, address: str, list_name: str = WATCH) -> Optional[Wallet]:
+    _db()
+    chain = chain.upper()
+    return _rows.get((list_name, chain, _key(chain, address)))
+
+def contains(chain: str, address: str, list_name: str = WATCH) -> bool:
+    return get(chain, address, list_name) is not None
+
+def wallets(chain: Optional[str] = None, list_name: str = WATCH,
+            tier: Optional[str] = None) -> List[Wallet]:
+    """Wallets in a list (optionally one chain / one tier), oldest first. Treat as read-only."""
+    _db()
+    chains: Iterable[str] = [chain.upper()] if chain else CHAINS
+    out: List[Wallet] = []
+    for c in chains:
+        out.extend(_by_chain.get((list_name, c), {}).values())
+    if tier is not None:
+        out = [w for w in out if w["tier"] == tier]
+    return out
+
+def addresses(chain: str, list_name: str = WATCH) -> List[str]:
+    return [w["address"] for w in wallets(chain, list_name)]
+
+def count(tier: Optional[str] = None, list_name: str = WATCH, chain: Optional[str] = None) -> int:
+    """Wallets in a list, per tier (for wallet_limit) or per chain."""
+    _db()
+    if tier is not None:
+        return _tiers[(list_name, tier)]
+    if chain is not None:
+        return len(_by_chain.get((list_name, chain.upper()), {}))
+    return sum(n for (ln, _), n in _tiers.items() if ln == list_name)
+
+
+# ---------- Change feed ----------
+def version() -> int:
+    """Sequence number of the latest change."""
+    _db()
+    return _seq
+
+def changes_since(seq: int, limit: int = 1000) -> List[Tuple[int, str, str, str, str]]:
+    """[(seq, op, list_name, chain, address), ...] after `seq`, oldest first."""
+    return _db().execute(
+        "SELECT seq, op, list_name, chain, address FROM changes WHERE seq > ? ORDER BY seq LIMIT ?",
+        (seq, limit),
+    ).fetchall()
+
+def on_change(cb: Listener) -> None:
+    """Call cb(op, wallet) after every add/update/remove in this process."""
+    _listeners.append(cb)
+
+def close() -> None:
+    global _con
+    if _con is not None:
+        _con.close()
+        _con = None
+        _rows.clear()
+        _by_chain.clear()
+        _tiers.clear()
@@ -0,0 +1,186 @@
+# watcher_engine.py
+"""
+Chain-agnostic wallet watcher.
+
+A chain plugs in with a ChainAdapter that supplies two things:
+  - fetch_since(address, cursor): raw activity newer than the cursor
+    (newest first) plus the new cursor
+  - normalize(address, raw): one raw item -> Transfer (or None to ignore)
+
+Everything else is shared and runs in one event loop for all chains:
+  - the wallets: wallet_registry's WATCH list, re-read as soon as it changes
+  - one AdaptivePoller (poll_scheduler) over every (chain, address)
+  - per-chain cursor stores (state_store), so restarts resume
+  - one DedupStore of alerted (chain, txid, address)
+  - one alert path: USD valuation via price_oracle, the counterparty's
+    exchange label (exchange_labels), whale_log for the summaries/rollups,
+    alert_dispatcher for Telegram
+
+Per-address memory is one scheduler slot and one cursor string, so 10k+
+wallets across chains stay cheap. A wallet seen for the first time only
+primes its cursor; it doesn't alert on history.
+"""
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import alert_dispatcher
+import exchange_labels
+import poll_scheduler
+import price_oracle
+import wallet_registry
+import whale_log
+from dedup_store import DedupStore
+from state_store import StateStore
+
+# ===== Config =====
+POLL_FLOOR = 20              # seconds, most active wallets
+POLL_INITIAL = 60            # wallets we know nothing about yet
+POLL_CEILING = 3600          # dormant wallets
+POLL_CONCURRENCY = 200       # workers mostly wait on batchers / provider pacing
+POLL_STATE_NAME = "wallet_watch_poll"
+SEEN_FILE = "wallet_watch_seen.log"
+SEEN_TTL = 7 * 24 * 3600
+
+# Injected by start_wallet_watchers()
+bot = None
+GROUP_ID = None
+
+
+@dataclass(frozen=True)
+class Transfer:
+    chain: str
+    address: str                       # the watched wallet
+    txid: str
+    ts: Optional[float] = None         # unix seconds
+    amount: Optional[float] = None     # native units, absolute
+    direction: str = ""                # "in" | "out" | ""
+    counterparty: Optional[str] = None
+
+
+class ChainAdapter(ABC):
+    """Base class for chain plugins; subclasses set the attributes and two methods."""
+    chain: str = ""                    # "BTC", "ETH", "XRP" (also the price_oracle asset)
+    unit: str = ""
+    tx_url: str = "{}"                 # explorer link, formatted with the txid
+    cursor_store: Optional[str] = None # StateStore name; default "<chain>_wallet_cursors"
+    cursor_legacy_json: Optional[str] = None  # old {address: cursor} file to import once
+    min_usd: float = 0.0               # alert only at or above this value (0 = every transfer)
+
+    @abstractmethod
+    async def fetch_since(self, address: str, cursor: Optional[str]) -> Optional[Tuple[List[Any], Optional[str]]]:
+        """(raw items newer than `cursor`, newest first; new cursor), or None if the fetch failed."""
+
+    @abstractmethod
+    def normalize(self, address: str, raw: Any) -> Optional[Transfer]:
+        """One raw item -> Transfer, or None to ignore it."""
+
+    def load_wallets(self) -> List[Dict[str, Any]]:
+        return wallet_registry.wallets(self.chain, wallet_registry.WATCH)
+
+
+class WatcherEngine:
+    def __init__(self, adapters: Iterable[ChainAdapter], *, floor: float = POLL_FLOOR,
+                 initial: float = POLL_INITIAL, ceiling: float = POLL_CEILING,
+                 concurrency: int = POLL_CONCURRENCY):
+        self.adapters: Dict[str, ChainAdapter] = {a.chain: a for a in adapters}
+        self.cursors: Dict[str, StateStore] = {
+            a.chain: StateStore(a.cursor_store or f"{a.chain.lower()}_wallet_cursors",
+                                legacy_json=a.cursor_legacy_json)
+            for a in self.adapters.values()
+        }
+        self.seen = DedupStore(SEEN_FILE, ttl=SEEN_TTL)
+        self.poller = poll_scheduler.AdaptivePoller(
+            "wallet-watch", self._check,
+            floor=floor, ceiling=ceiling, initial=initial,
+            key=lambda w: f"{w['chain']}:{w['address']}",
+            concurrency=concurrency, state_name=POLL_STATE_NAME,
+        )
+        wallet_registry.on_change(self._on_registry_change)
+
+    def _on_registry_change(self, op: str, wallet: Dict[str, Any]) -> None:
+        if wallet["list_name"] == wallet_registry.WATCH and wallet["chain"] in self.adapters:
+            self.poller.refresh_now()
+
+    def _wallets(self) -> List[Dict[str, Any]]:
+        out: List[Dict[str, Any]] = []
+        for chain, adapter in self.adapters.items():
+            try:
+                out.extend(adapter.load_wallets())
+            except Exception as e:
+                logging.exception(f"[watch:{chain}] could not load wallets: {e}")
+        return out
+
+    async def _check(self, wallet: Dict[str, Any]) -> Optional[bool]:
+        adapter = self.adapters[wallet["chain"]]
+        cursors = self.cursors[adapter.chain]
+        addr = wallet["address"]
+        cursor = cursors.get(addr)
+
+        res = await adapter.fetch_since(addr, cursor)
+        if res is None:
+            return None
+        raws, new_cursor = res
+        if new_cursor is not None and new_cursor != cursor:
+            cursors.set(addr, new_cursor)
+        if cursor is None:
+            return False  # first sight: prime the cursor, don't alert on history
+
+        for raw in reversed(raws):  # oldest first
+            t = adapter.normalize(addr, raw)
+            if t is None or not self.seen.add(f"{t.chain}:{t.txid}:{addr}"):
+                continue
+            self._alert(adapter, wallet, t)
+        return bool(raws)
+
+    def _alert(self, adapter: ChainAdapter, wallet: Dict[str, Any], t: Transfer) -> None:
+        usd = price_oracle.to_usd(adapter.chain, t.amount) if t.amount is not None else None
+        if adapter.min_usd and (usd or 0) < adapter.min_usd:
+            return
+        label = wallet.get("label") or f"{t.address[:6]}...{t.address[-4:]}"
+        lines = [
+            f"👀 **{adapter.chain} Wallet Watch — {wallet['tier'].upper()}**",
+            f"Label: {label}",
+            f"Address: `{t.address}`",
+        ]
+        if t.amount is not None:
+            arrow = {"in": "📥 Received", "out": "📤 Sent"}.get(t.direction, "🔁 Moved")
+            value = f" (~${usd:,.0f})" if usd is not None else ""
+            exch = exchange_labels.label(t.counterparty)
+            via = f" {'to' if t.direction == 'out' else 'from'} {exch}" if exch else ""
+            lines.append(f"{arrow}: {t.amount:,.4f} {adapter.unit}{value}{via}")
+        lines.append(f"Latest tx: {t.txid}")
+        lines.append(adapter.tx_url.format(t.txid))
+        text = "\n".join(lines)
+
+        whale_log.log_event(adapter.chain, f"{label}: {t.txid[:12]}…", wallet=t.address, usd=usd)
+        if bot and GROUP_ID is not None:
+            alert_dispatcher.enqueue(bot, GROUP_ID, text, chain=adapter.chain, usd=usd,
+                                     disable_web_page_preview=True, parse_mode="Markdown")
+        logging.info(f"[watch:{adapter.chain}] alert queued for {label} ({t.txid})")
+
+    def flush(self) -> None:
+        self.seen.flush()
+        for store in self.cursors.values():
+            store.flush()
+
+    async def run(self) -> None:
+        logging.info(f"✅ Wallet watcher live for {', '.join(self.adapters)}.")
+        price_oracle.ensure_started()
+        await self.poller.run(self._wallets, after_cycle=self.flush)
+
+
+def default_adapters() -> List[ChainAdapter]:
+    from btc_wallet_watcher import BtcAdapter
+    from eth_wallet_watcher import EthAdapter
+    from xrp_wallet_watcher import XrpAdapter
+    return [BtcAdapter(), EthAdapter(), XrpAdapter()]
+
+async def start_wallet_watchers(injected_bot, group_id, adapters: Optional[List[ChainAdapter]] = None,
+                                **engine_kwargs: Any):
+    """Entrypoint for main.py: every chain's wallets in one engine."""
+    global bot, GROUP_ID
+    bot = injected_bot
+    GROUP_ID = group_id
+    await WatcherEngine(adapters or default_adapters(), **engine_kwargs).run()
@@ -1,30 +1,233 @@
 # whale_log.py
-import json, os, datetime
+"""
+Whale event log, split into daily segments with a small offset index.
 
-LOG_PATH = "whale_log.jsonl"
+whale_log/
+  2025-08-05.jsonl   one JSON event per line (UTC day of the event)
+  2025-08-05.idx     packed (epoch_seconds, byte_offset) records, one per
+                     minute that has events, pointing at its first line
+
+Appends go through one buffered writer kept open for the life of the
+process; data is flushed at least every FLUSH_INTERVAL seconds, before any
+read, and on close(). Index records are written only after the data they
+point at has been flushed.
+
+`read_events(hours)` opens only the segments that overlap the window and
+seeks straight to the cutoff minute in the first one.
+"""
+import datetime
+import json
+import logging
+import os
+import shutil
+import struct
+import time
+from bisect import bisect_right
+from typing import Any, Dict, IO, List, Optional, Tuple
+
+import whale_rollups
+
+LOG_DIR = "whale_log"
+LOG_PATH = "whale_log.jsonl"   # pre-segment log, migrated on first use (left in place)
+FLUSH_INTERVAL = 2.0           # seconds
+INDEX_STEP = 60                # one index record per minute with events
+TAIL_BYTES = 64 * 1024         # tail() reads at most this much of the newest segment
+
+_IDX = struct.Struct("<IQ")    # (epoch seconds, byte offset)
+
+
+def _utc(t: float) -> datetime.datetime:
+    return datetime.datetime.fromtimestamp(t, datetime.timezone.utc).replace(tzinfo=None)
+
+def _day(t: float) -> str:
+    return _utc(t).strftime("%Y-%m-%d")
+
+def _segment(day: str, log_dir: Optional[str] = None) -> str:
+    return os.path.join(log_dir or LOG_DIR, f"{day}.jsonl")
+
+def _index(day: str, log_dir: Optional[str] = None) -> str:
+    return os.path.join(log_dir or LOG_DIR, f"{day}.idx")
+
+
+class _Writer:
+    def __init__(self, log_dir: Optional[str] = None):
+        self.log_dir = log_dir or LOG_DIR
+        self.day: Optional[str] = None
+        self.f: Optional[IO[bytes]] = None
+        self.offset = 0
+        self.last_bucket = -1
+        self.pending_index: List[bytes] = []
+        self.last_flush = time.monotonic()
+
+    def _open(self, day: str) -> None:
+        self.close()
+        os.makedirs(self.log_dir, exist_ok=True)
+        self.f = open(_segment(day, self.log_dir), "ab")
+        self.offset = self.f.tell()
+        self.day = day
+        self.last_bucket = -1
+        idx = _load_index(day, self.log_dir)
+        if idx:
+            self.last_bucket = idx[-1][0] // INDEX_STEP
+
+    def write(self, t: float, line: bytes) -> None:
+        day = _day(t)
+        if day != self.day:
+            self._open(day)
+        bucket = int(t) // INDEX_STEP
+        if bucket != self.last_bucket:
+            self.pending_index.append(_IDX.pack(bucket * INDEX_STEP, self.offset))
+            self.last_bucket = bucket
+        self.f.write(line)
+        self.offset += len(line)
+        if time.monotonic() - self.last_flush >= FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self) -> None:
+        self.last_flush = time.monotonic()
+        if self.f is None:
+            return
+        self.f.flush()
+        if self.pending_index:
+            with open(_index(self.day, self.log_dir), "ab") as idx:
+                idx.write(b"".join(self.pending_index))
+            self.pending_index.clear()
+
+    def close(self) -> None:
+        if self.f is not None:
+            self.flush()
+            self.f.close()
+            self.f = None
+            self.day = None
+
+
+_writer: Optional[_Writer] = None
 
-def log_event(chain: str, message: str):
-    entry = {
-        "ts": datetime.datetime.utcnow().isoformat() + "Z",
-        "chain": chain.upper(),
-        "message": message
-    }
-    with open(LOG_PATH, "a", encoding="utf-8") as f:
-        f.write(json.dumps(entry) + "\n")
 
-def read_events(hours: int = 24):
-    """Return entries from the last `hours` hours."""
-    if not os.path.exists(LOG_PATH):
+def _get_writer() -> _Writer:
+    global _writer
+    if _writer is None:
+        _migrate_legacy()
+        _writer = _Writer()
+    return _writer
+
+
+def _load_index(day: str, log_dir: Optional[str] = None) -> List[Tuple[int, int]]:
+    try:
+        with open(_index(day, log_dir), "rb") as f:
+            raw = f.read()
+    except FileNotFoundError:
         return []
-    cutoff = datetime.datetime.utcnow() - datetime.timedelta(hours=hours)
-    out = []
+    usable = len(raw) - len(raw) % _IDX.size  # ignore a torn tail record
+    return [_IDX.unpack_from(raw, i) for i in range(0, usable, _IDX.size)]
+
+
+def _migrate_legacy() -> None:
+    """
+    Split an old single-file whale_log.jsonl into daily segments once.
+    The segments are built in a scratch directory and renamed to LOG_DIR in
+    one step, so LOG_DIR existing is the "done" marker and a crash midway
+    leaves nothing half-migrated. The old file is left untouched.
+    """
+    if not os.path.exists(LOG_PATH) or os.path.isdir(LOG_DIR):
+        return
+    tmp_dir = LOG_DIR + ".migrating"
+    if os.path.isdir(tmp_dir):
+        shutil.rmtree(tmp_dir)  # leftover of an interrupted attempt
+    w = _Writer(tmp_dir)
+    n = 0
     with open(LOG_PATH, "r", encoding="utf-8") as f:
         for line in f:
             try:
                 e = json.loads(line)
-                ts = datetime.datetime.fromisoformat(e["ts"].replace("Z",""))
-                if ts >= cutoff:
-                    out.append(e)
+                ts = datetime.datetime.fromisoformat(e["ts"].replace("Z", ""))
+                e["t"] = ts.replace(tzinfo=datetime.timezone.utc).timestamp()
             except Exception:
                 continue
-    return out
\ No newline at end of file
+            w.write(e["t"], (json.dumps(e) + "\n").encode("utf-8"))
+            n += 1
+    w.close()
+    os.makedirs(tmp_dir, exist_ok=True)  # even if nothing parsed: mark it done
+    os.replace(tmp_dir, LOG_DIR)
+    logging.info(f"[whale_log] migrated {n} events into {LOG_DIR}/")
+
+
+# ---------- Public API ----------
+def log_event(chain: str, message: str, *, wallet: Optional[str] = None, usd: Optional[float] = None):
+    t = time.time()
+    entry = {
+        "ts": _utc(t).isoformat() + "Z",
+        "t": round(t, 3),
+        "chain": chain.upper(),
+        "message": message
+    }
+    if wallet:
+        entry["wallet"] = wallet
+    if usd is not None:
+        entry["usd"] = round(float(usd), 2)
+    # rollups first: on their very first load they backfill from this log
+    whale_rollups.ingest(chain, wallet, usd, t=t, message=message)
+    _get_writer().write(t, (json.dumps(entry) + "\n").encode("utf-8"))
+
+def read_events(hours: int = 24) -> List[Dict[str, Any]]:
+    """Return entries from the last `hours` hours, oldest first."""
+    w = _get_writer()
+    w.flush()
+    if not os.path.isdir(LOG_DIR):
+        return []
+    cutoff = time.time() - hours * 3600
+    first_day = _day(cutoff)
+    days = sorted(
+        name[:-len(".jsonl")] for name in os.listdir(LOG_DIR)
+        if name.endswith(".jsonl") and name[:-len(".jsonl")] >= first_day
+    )
+
+    out = []
+    for day in days:
+        start = 0
+        if day == first_day:
+            idx = _load_index(day)
+            i = bisect_right([ts for ts, _ in idx], cutoff) - 1
+            if i >= 0:
+                start = idx[i][1]
+        with open(_segment(day), "rb") as f:
+            f.seek(start)
+            for line in f:
+                try:
+                    e = json.loads(line)
+                except ValueError:
+                    continue
+                if e.get("t", 0) >= cutoff:
+                    out.append(e)
+    return out
+
+def tail(n: int = 20) -> List[Dict[str, Any]]:
+    """Up to the last `n` entries of the newest segment, oldest first (reads only its end)."""
+    w = _get_writer()
+    w.flush()
+    if not os.path.isdir(LOG_DIR):
+        return []
+    days = sorted(name[:-len(".jsonl")] for name in os.listdir(LOG_DIR) if name.endswith(".jsonl"))
+    if not days:
+        return []
+    with open(_segment(days[-1]), "rb") as f:
+        size = f.seek(0, os.SEEK_END)
+        start = max(0, size - TAIL_BYTES)
+        f.seek(start)
+        lines = f.read().splitlines()
+    if start > 0:
+        lines = lines[1:]  # first line is probably cut
+    out = []
+    for line in lines[-n:]:
+        try:
+            out.append(json.loads(line))
+        except ValueError:
+            continue
+    return out
+
+def close() -> None:
+    """Flush and close the writer (call on shutdown)."""
+    global _writer
+    if _writer is not None:
+        _writer.close()
+        _writer = None
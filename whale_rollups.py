@@ -0,0 +1,143 @@
+# whale_rollups.py
+"""
+Rolling aggregates of whale events, maintained as events are logged.
+
+Per UTC hour we keep, for each chain and each wallet, an event count and a
+USD total. Summaries over 24h/7d/30d then read at most a few hundred hour
+buckets instead of rescanning the log, so any number of chats can get
+their own summary on their own schedule.
+
+Buckets are held in memory and persisted through a StateStore, one small
+journal line per (hour, chain) / (hour, wallet) change. Windows are
+hour-aligned: "last 24h" means the current (partial) hour plus the 24
+full hours before it, so nothing recent is ever left out; `window_start`
+gives the exact start for display.
+
+The last few events are also kept in a small in-memory ring (`recent`),
+seeded on load from the tail of the newest log segment, so summaries can
+show recent activity without reading the log.
+"""
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from state_store import StateStore
+
+# ===== Config =====
+STATE_NAME = "whale_rollups"
+BUCKET_SECONDS = 3600
+RETENTION_DAYS = 35        # enough for 30d summaries
+RECENT_KEEP = 20           # events kept for "recent activity"
+
+# hour -> {"c": {chain: [count, usd]}, "w": {wallet: [count, usd]}}
+Bucket = Dict[str, Dict[str, List[float]]]
+
+_store: Optional[StateStore] = None
+_buckets: Dict[int, Bucket] = {}
+_recent: Deque[Dict[str, Any]] = deque(maxlen=RECENT_KEEP)
+
+
+def _hour(t: float) -> int:
+    return int(t // BUCKET_SECONDS) * BUCKET_SECONDS
+
+def _key(hour: int, kind: str, name: str) -> str:
+    return f"{hour}|{kind}|{name}"
+
+def _load() -> StateStore:
+    global _store
+    if _store is None:
+        _store = StateStore(STATE_NAME)
+        for key, val in _store.items():
+            hour, kind, name = key.split("|", 2)
+            b = _buckets.setdefault(int(hour), {"c": {}, "w": {}})
+            b[kind][name] = list(val)
+        if not _buckets:
+            _backfill()
+        else:
+            import whale_log  # imported here: whale_log imports this module
+            _recent.extend(whale_log.tail(RECENT_KEEP))
+    return _store
+
+def _backfill() -> None:
+    """Seed empty rollups from the whale log once (events logged before rollups existed)."""
+    import whale_log  # imported here: whale_log imports this module
+    for e in whale_log.read_events(hours=RETENTION_DAYS * 24):
+        ingest(e.get("chain", ""), e.get("wallet"), e.get("usd"), t=e.get("t"), message=e.get("message"))
+
+
+# ---------- Ingest ----------
+def ingest(chain: str, wallet: Optional[str] = None, usd: Optional[float] = None,
+           t: Optional[float] = None, message: Optional[str] = None) -> None:
+    """Count one event. Called by whale_log.log_event."""
+    store = _load()
+    t = time.time() if t is None else t
+    if message is not None:
+        _recent.append({"t": t, "chain": chain.upper(), "message": message})
+    hour = _hour(t)
+    b = _buckets.get(hour)
+    if b is None:
+        b = _buckets[hour] = {"c": {}, "w": {}}
+        prune()
+    usd = float(usd or 0.0)
+    for kind, name in (("c", chain.upper()), ("w", wallet)):
+        if not name:
+            continue
+        cell = b[kind].setdefault(name, [0, 0.0])
+        cell[0] += 1
+        cell[1] += usd
+        store.set(_key(hour, kind, name), [cell[0], cell[1]])
+
+def prune(max_age_days: float = RETENTION_DAYS) -> None:
+    store = _load()
+    cutoff = _hour(time.time() - max_age_days * 86400)
+    for hour in [h for h in _buckets if h < cutoff]:
+        for kind, cells in _buckets.pop(hour).items():
+            for name in cells:
+                store.delete(_key(hour, kind, name))
+
+
+# ---------- Queries ----------
+def window_start(hours: int) -> int:
+    """Start (unix seconds) of the window that `hours` covers: `hours` full hours plus the current one."""
+    return _hour(time.time()) - hours * BUCKET_SECONDS
+
+def _window(hours: int) -> List[Bucket]:
+    _load()
+    start = window_start(hours)
+    return [b for h, b in _buckets.items() if h >= start]
+
+def _merge(hours: int, kind: str) -> Dict[str, Tuple[int, float]]:
+    out: Dict[str, List[float]] = {}
+    for b in _window(hours):
+        for name, (n, usd) in b[kind].items():
+            cell = out.setdefault(name, [0, 0.0])
+            cell[0] += n
+            cell[1] += usd
+    return {k: (int(v[0]), v[1]) for k, v in out.items()}
+
+def by_chain(hours: int = 24) -> Dict[str, Tuple[int, float]]:
+    """{chain: (events, usd)} over the last `hours` hours."""
+    return _merge(hours, "c")
+
+def totals(hours: int = 24) -> Tuple[int, float]:
+    counts = by_chain(hours).values()
+    return sum(n for n, _ in counts), sum(u for _, u in counts)
+
+def top_wallets(hours: int = 168, n: int = 10) -> List[Tuple[str, int, float]]:
+    """[(wallet, events, usd), ...] by USD volume, largest first."""
+    merged = _merge(hours, "w")
+    ranked = sorted(merged.items(), key=lambda kv: (kv[1][1], kv[1][0]), reverse=True)
+    return [(w, cnt, usd) for w, (cnt, usd) in ranked[:n]]
+
+def recent(n: int = 6, hours: Optional[int] = None) -> List[Dict[str, Any]]:
+    """The last `n` events (optionally within `hours`), oldest first."""
+    _load()
+    events = list(_recent)
+    if hours is not None:
+        cutoff = time.time() - hours * 3600
+        events = [e for e in events if e.get("t", 0) >= cutoff]
+    return events[-n:] if n else []
+
+def flush() -> None:
+    if _store is not None:
+        _store.flush()
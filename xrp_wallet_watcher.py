@@ -0,0 +1,90 @@
+# xrp_wallet_watcher.py
+"""
+XRP plugin for watcher_engine: XRP payments to and from the registry's
+XRP watch wallets, from XRPSCAN's account history.
+The cursor is the ledger index of the newest transaction seen.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+import http_client
+from watcher_engine import ChainAdapter, Transfer
+
+XRPSCAN_TXS = "https://api.xrpscan.com/api/v1/account/{}/transactions"
+TF_PARTIAL_PAYMENT = 0x00020000
+
+
+def _tx(raw: Dict[str, Any]) -> Dict[str, Any]:
+    # entries are either flat or wrapped as {"tx": {...}, "meta": {...}}
+    return raw.get("tx") if isinstance(raw.get("tx"), dict) else raw
+
+def _ledger(raw: Dict[str, Any]) -> int:
+    try:
+        return int(raw.get("ledger_index") or _tx(raw).get("ledger_index") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+def _meta(raw: Dict[str, Any]) -> Dict[str, Any]:
+    meta = raw.get("meta") or _tx(raw).get("meta") or raw.get("metaData") or _tx(raw).get("metaData")
+    return meta if isinstance(meta, dict) else {}
+
+def _delivered(raw: Dict[str, Any]) -> Any:
+    """
+    What the payment actually delivered. With tfPartialPayment, Amount is
+    only an upper bound, so prefer meta.delivered_amount and fall back to
+    Amount only when it is absent (never for an unknown partial payment).
+    """
+    tx = _tx(raw)
+    meta = _meta(raw)
+    delivered = meta.get("delivered_amount", meta.get("DeliveredAmount"))
+    if delivered is not None and delivered != "unavailable":
+        return delivered
+    try:
+        partial = int(tx.get("Flags") or 0) & TF_PARTIAL_PAYMENT
+    except (TypeError, ValueError):
+        partial = 0
+    return None if partial else tx.get("Amount")
+
+def _xrp_amount(amount: Any) -> Optional[float]:
+    """Native XRP amount, or None for issued currencies."""
+    try:
+        if isinstance(amount, (str, int)):
+            return int(amount) / 1e6  # drops
+        if isinstance(amount, dict) and amount.get("currency") == "XRP":
+            return float(amount.get("value") or 0)
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+class XrpAdapter(ChainAdapter):
+    chain = "XRP"
+    unit = "XRP"
+    tx_url = "https://xrpscan.com/tx/{}"
+
+    async def fetch_since(self, address: str, cursor: Optional[int]) -> Optional[Tuple[List[Dict[str, Any]], Optional[int]]]:
+        data = await http_client.get_json(XRPSCAN_TXS.format(address))
+        if isinstance(data, dict):
+            data = data.get("transactions")
+        if not isinstance(data, list):
+            return None
+        if not data:
+            return [], cursor
+        data = sorted(data, key=_ledger, reverse=True)
+        last = cursor or 0
+        return [raw for raw in data if _ledger(raw) > last], _ledger(data[0])
+
+    def normalize(self, address: str, raw: Dict[str, Any]) -> Optional[Transfer]:
+        tx = _tx(raw)
+        txid = tx.get("hash") or raw.get("hash")
+        if not txid or tx.get("TransactionType") != "Payment":
+            return None
+        amount = _xrp_amount(_delivered(raw))
+        if not amount:
+            return None
+        out = tx.get("Account") == address
+        return Transfer(
+            self.chain, address, txid,
+            amount=amount,
+            direction="out" if out else "in",
+            counterparty=tx.get("Destination") if out else tx.get("Account"),
+        )